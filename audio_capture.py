@@ -0,0 +1,188 @@
+# audio_capture.py
+import threading
+
+import numpy as np
+
+
+class BufferCircular:
+    """
+    Buffer circular preasignado de muestras int16, con un escritor y varios lectores.
+
+    El escritor (el callback de captura) nunca espera: si un lector se queda
+    atrás más que la capacidad del buffer, pierde el audio más antiguo y se le
+    cuenta un desborde.
+    """
+
+    def __init__(self, capacidad_muestras):
+        self.capacidad = int(capacidad_muestras)
+        self._datos = np.zeros(self.capacidad, dtype=np.int16)
+        self.escritas = 0  # Total de muestras escritas desde el inicio (no se reinicia)
+        self._cond = threading.Condition()
+        self._cerrado = False
+
+    def escribir(self, muestras):
+        """Copia las muestras al buffer, sobrescribiendo las más antiguas si hace falta."""
+        n = len(muestras)
+        with self._cond:
+            if n > self.capacidad:
+                # Las más antiguas se pierden sin llegar a escribirse, pero cuentan como escritas
+                muestras = muestras[-self.capacidad:]
+                self.escritas += n - self.capacidad
+                n = self.capacidad
+            inicio = self.escritas % self.capacidad
+            primera = min(n, self.capacidad - inicio)
+            self._datos[inicio:inicio + primera] = muestras[:primera]
+            if primera < n:
+                self._datos[:n - primera] = muestras[primera:]
+            self.escritas += n
+            self._cond.notify_all()
+
+    def cerrar(self):
+        """Despierta a los lectores en espera; las lecturas posteriores no bloquean."""
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+
+    def nuevo_lector(self):
+        """Crea un lector con su propio cursor, posicionado en el audio más reciente."""
+        return LectorAudio(self, self.escritas)
+
+
+class LectorAudio:
+    """
+    Cursor de lectura independiente sobre un BufferCircular.
+
+    Ofrece `read(n, exception_on_overflow=False)` como un stream de PyAudio, así que
+    puede pasarse a escuchar_comando o grabar_mensaje_voz_pcm sin cambios.
+    """
+
+    def __init__(self, buffer, posicion):
+        self.buffer = buffer
+        self.posicion = posicion
+        self.desbordes = 0  # Veces que el escritor pisó audio aún no leído
+        self.muestras_perdidas = 0
+        self.esperas = 0  # Veces que el lector tuvo que esperar audio nuevo (underrun)
+        self._interrumpido = False
+
+    def disponibles(self):
+        """Muestras escritas que este lector aún no ha leído."""
+        return self.buffer.escritas - self.posicion
+
+    def copia(self):
+        """Otro lector independiente en la misma posición que este (no mueve este cursor)."""
+        return LectorAudio(self.buffer, self.posicion)
+
+    def saltar_al_final(self):
+        """Descarta el audio pendiente: la próxima lectura empieza con audio nuevo."""
+        self.posicion = self.buffer.escritas
+
+    def interrumpir(self):
+        """Despierta la lectura en espera (o la próxima), que retorna con lo que haya disponible."""
+        with self.buffer._cond:
+            self._interrumpido = True
+            self.buffer._cond.notify_all()
+
+    def leer_en(self, destino, timeout=None):
+        """
+        Copia las siguientes `len(destino)` muestras directamente en `destino`
+        (un array int16, p. ej. una vista de un buffer preasignado), esperando a
+        que se capturen. Retorna cuántas muestras se copiaron: menos si vence el
+        timeout, se cierra el buffer o se llama a `interrumpir()`.
+        """
+        buffer = self.buffer
+        n = len(destino)
+        with buffer._cond:
+            if buffer.escritas - self.posicion < n:
+                self.esperas += 1
+                buffer._cond.wait_for(
+                    lambda: buffer.escritas - self.posicion >= n or buffer._cerrado or self._interrumpido, timeout)
+            self._interrumpido = False
+
+            atraso = buffer.escritas - self.posicion
+            if atraso > buffer.capacidad:
+                self.desbordes += 1
+                self.muestras_perdidas += atraso - buffer.capacidad
+                self.posicion = buffer.escritas - buffer.capacidad
+
+            n = min(n, buffer.escritas - self.posicion)
+            inicio = self.posicion % buffer.capacidad
+            primera = min(n, buffer.capacidad - inicio)
+            destino[:primera] = buffer._datos[inicio:inicio + primera]
+            destino[primera:n] = buffer._datos[:n - primera]
+            self.posicion += n
+        return n
+
+    def leer_muestras(self, n, timeout=None):
+        """
+        Retorna un array con las siguientes `n` muestras, esperando a que se capturen.
+        Si vence el timeout (o se cierra el buffer) retorna las que haya disponibles.
+        """
+        salida = np.empty(n, dtype=np.int16)
+        return salida[:self.leer_en(salida, timeout)]
+
+    def read(self, num_frames, exception_on_overflow=False):
+        """Compatible con pyaudio.Stream.read: retorna `num_frames` muestras como bytes."""
+        return self.leer_muestras(num_frames).tobytes()
+
+
+class CapturaAudio:
+    """
+    Captura del micrófono en modo callback de PyAudio.
+
+    PortAudio llama a `_callback` desde su propio hilo en cuanto hay audio, y
+    este se copia al BufferCircular. Así el micrófono se sigue grabando mientras
+    el bucle principal está ocupado (voz, Gemini, Telegram) y cada consumidor
+    (reconocedor, grabador de mensajes, VAD) lee a su propio ritmo.
+    """
+
+    def __init__(self, fs=16000, segundos_buffer=30, frames_per_buffer=1024):
+        self.fs = fs
+        self.frames_per_buffer = frames_per_buffer
+        self.buffer = BufferCircular(fs * segundos_buffer)
+        self.desbordes_dispositivo = 0  # Desbordes reportados por PortAudio
+        self._p = None
+        self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        import pyaudio
+
+        if status & pyaudio.paInputOverflow:
+            self.desbordes_dispositivo += 1
+        self.buffer.escribir(np.frombuffer(in_data, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+
+    def iniciar(self):
+        """Abre el micrófono y empieza a capturar."""
+        import pyaudio
+
+        self._p = pyaudio.PyAudio()
+        self._stream = self._p.open(format=pyaudio.paInt16, channels=1, rate=self.fs, input=True,
+                                    frames_per_buffer=self.frames_per_buffer, stream_callback=self._callback)
+        self._stream.start_stream()
+        return self
+
+    def nuevo_lector(self):
+        """Crea un consumidor independiente, empezando por el audio más reciente."""
+        return self.buffer.nuevo_lector()
+
+    def estadisticas(self, lectores=()):
+        """Diccionario con los contadores de desbordes y esperas."""
+        return {
+            "muestras_capturadas": self.buffer.escritas,
+            "desbordes_dispositivo": self.desbordes_dispositivo,
+            "lectores": [
+                {"desbordes": l.desbordes, "muestras_perdidas": l.muestras_perdidas, "esperas": l.esperas}
+                for l in lectores
+            ],
+        }
+
+    def detener(self):
+        """Detiene la captura y libera PyAudio."""
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._p is not None:
+            self._p.terminate()
+            self._p = None
+        self.buffer.cerrar()
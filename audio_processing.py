@@ -1,33 +1,81 @@
 # Audio/audio_processing.py
-import pyaudio
 import json
 import time
-import wavio 
-from pydub import AudioSegment 
+import wave
 import numpy as np 
-import os # Importar os para la ruta de archivos temporales
+import io
+import subprocess
+import threading
+from audio_capture import CapturaAudio
+from vad import CompuertaVAD
 
-# Asegúrate de tener FFmpeg instalado y en tu PATH para que pydub funcione con OGG/Opus
+# Asegúrate de tener FFmpeg instalado y en tu PATH para codificar los mensajes de voz a OGG/Opus
 
-# Importa el directorio temporal desde main_A.py o defínelo aquí si lo prefieres local
-# Para este ejemplo, lo haré localmente para que este módulo sea autocontenido,
-# pero en tu setup, lo ideal es que main_A.py lo defina y lo pase o lo importe si es global.
-TEMP_AUDIO_DIR_LOCAL = "TempAudio" 
-if not os.path.exists(TEMP_AUDIO_DIR_LOCAL):
-    os.makedirs(TEMP_AUDIO_DIR_LOCAL)
+def setup_captura(segundos_buffer=30):
+    """
+    Inicia la captura del micrófono en modo callback hacia un buffer circular.
+    Retorna la CapturaAudio; cada consumidor obtiene su lector con `nuevo_lector()`.
+    """
+    return CapturaAudio(fs=16000, segundos_buffer=segundos_buffer).iniciar()
 
+# Estadísticas del modo de despacho temprano de escuchar_comando
+estadisticas_despacho_temprano = {"disparos": 0, "mediciones": 0, "sin_medir": 0, "ahorro_total_s": 0.0}
+# Silencio tras la voz con el que Vosk da la frase por terminada (regla de fin de frase por defecto de Kaldi)
+SILENCIO_FIN_FRASE_VOSK_S = 0.5
 
-def setup_pyaudio():
-    """Configura el flujo de audio con PyAudio."""
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=8000)
-    stream.start_stream()
-    return p, stream
+def _estimar_ahorro_despacho_temprano(lector, umbral_voz_db, max_segundos=3.0, fs=16000):
+    """
+    Hilo: estima cuánto habría tardado Vosk en dar el resultado final de la
+    frase que se despachó por adelantado. Sigue el audio desde el punto del
+    resultado parcial hasta que hay `SILENCIO_FIN_FRASE_VOSK_S` seguidos por
+    debajo de `umbral_voz_db` (el umbral de la VAD de la escucha, fijo: aquí
+    no hay silencio previo con el que estimar el ruido) y registra esos
+    segundos de audio como la latencia ahorrada. No usa el reconocedor, así
+    que la siguiente escucha no tiene que esperarlo ni cortarlo; `lector` es
+    una copia del cursor de quien escuchaba y no le quita audio.
+    """
+    bloque = np.empty(2048, dtype=np.int16)
+    muestras = 0
+    silencio = 0
+    while muestras < max_segundos * fs:
+        leidas = lector.leer_en(bloque, timeout=1.0)
+        if leidas == 0:
+            break
+        muestras += leidas
+        senal = bloque[:leidas].astype(np.float32) / 32768.0
+        energia_db = 10.0 * np.log10(np.mean(senal * senal) + 1e-10)
+        silencio = 0 if energia_db > umbral_voz_db else silencio + leidas
+        if silencio >= SILENCIO_FIN_FRASE_VOSK_S * fs:
+            _registrar_ahorro(muestras / fs)
+            return
+    estadisticas_despacho_temprano["sin_medir"] += 1
 
-def escuchar_comando(stream, recognizer, timeout=5):
+def _registrar_ahorro(ahorro):
+    estadisticas_despacho_temprano["mediciones"] += 1
+    estadisticas_despacho_temprano["ahorro_total_s"] += ahorro
+    promedio = estadisticas_despacho_temprano["ahorro_total_s"] / estadisticas_despacho_temprano["mediciones"]
+    print(f"Despacho temprano: se ahorraron unos {ahorro * 1000:.0f} ms frente al resultado final (promedio {promedio * 1000:.0f} ms).")
+
+def escuchar_comando(stream, recognizer, timeout=5, matcher=None, puntuacion_minima=0.5, parciales_estables=2, vad=None,
+                     interrumpir=None):
     """
     Escucha un comando de voz, lo transcribe usando Vosk y lo retorna.
     Tiene un tiempo máximo de escucha.
+
+    Si se pasa un `matcher` (IntentMatcher), se activa el modo de despacho temprano:
+    en cada bloque se revisa el resultado parcial de Vosk y se retorna en cuanto una
+    intención con puntuación >= `puntuacion_minima` se mantiene igual durante
+    `parciales_estables` bloques seguidos, sin esperar a que Vosk detecte el final
+    de la frase. Con un LectorAudio, el ahorro se estima en segundo plano sobre
+    una copia del cursor, detectando el final de la voz con una VAD propia (sin
+    quitarle audio ni el reconocedor a la siguiente escucha).
+
+    Si se pasa una `vad` (CompuertaVAD), los bloques de silencio no se envían al
+    reconocedor; al empezar se reinicia (conserva el piso de ruido).
+
+    Si se pasa `interrumpir` (threading.Event), la escucha se abandona y se
+    retorna "" en cuanto se activa (p. ej. al llegar una emergencia). Para que sea
+    inmediato, quien lo activa debe llamar también a `stream.interrumpir()`.
     """
     print("Escuchando comando...")
     
@@ -35,14 +83,53 @@ def escuchar_comando(stream, recognizer, timeout=5):
     
     # Resetear el reconocedor para asegurar que no haya resultados parciales anteriores
     recognizer.Reset()
+    if vad is not None:
+        # El pre-roll y el hangover de la escucha anterior no son de esta frase
+        vad.reiniciar()
+
+    intencion_previa = None
+    repeticiones = 0
 
     while True:
         data = stream.read(4096, exception_on_overflow=False) # Usar un chunk más pequeño para procesamiento más rápido
-        if recognizer.AcceptWaveform(data):
-            result = recognizer.Result()
-            texto = json.loads(result)["text"]
-            if texto:
-                return texto
+        if interrumpir is not None and interrumpir.is_set():
+            print("Escucha interrumpida.")
+            return ""
+        # Con VAD, el silencio no se decodifica (y la voz llega con su pre-roll).
+        # Una lectura interrumpida puede volver vacía: no hay nada que decodificar
+        bloques = (vad.filtrar(data) if vad is not None else [data]) if data else []
+        aceptado = False
+        for bloque in bloques:
+            inicio_cpu = time.process_time()
+            aceptado = recognizer.AcceptWaveform(bloque)
+            if vad is not None:
+                vad.registrar_decodificacion(time.process_time() - inicio_cpu)
+            if aceptado:
+                result = recognizer.Result()
+                texto = json.loads(result)["text"]
+                if texto:
+                    return texto
+                intencion_previa, repeticiones = None, 0
+
+        if matcher is not None and bloques and not aceptado:
+            parcial = json.loads(recognizer.PartialResult()).get("partial", "")
+            coincidencia = matcher.buscar(parcial) if parcial else None
+            if coincidencia and coincidencia.puntuacion >= puntuacion_minima:
+                if coincidencia.intencion == intencion_previa:
+                    repeticiones += 1
+                else:
+                    intencion_previa, repeticiones = coincidencia.intencion, 1
+                if repeticiones >= parciales_estables:
+                    estadisticas_despacho_temprano["disparos"] += 1
+                    if hasattr(stream, "copia"):
+                        # Sin VAD, el umbral por defecto de CompuertaVAD (piso -60 dB + margen 9 dB)
+                        umbral_voz_db = vad.piso_ruido_db + vad.margen_db if vad is not None else -51.0
+                        threading.Thread(target=_estimar_ahorro_despacho_temprano, args=(stream.copia(), umbral_voz_db),
+                                         name="estimar-despacho-temprano", daemon=True).start()
+                    print(f"Despacho temprano de '{coincidencia.intencion}' con el resultado parcial: '{parcial}'")
+                    return parcial
+            else:
+                intencion_previa, repeticiones = None, 0
         
         if time.time() - start_time > timeout:
             print("Tiempo máximo de escucha de comando alcanzado.")
@@ -51,70 +138,101 @@ def escuchar_comando(stream, recognizer, timeout=5):
             return final_result
 
 
-def grabar_mensaje_voz(stream, duration=10, filename_suffix="voice_message"):
+def grabar_mensaje_voz_pcm(stream, duration=10, silencio_final=2.0, fs=16000):
     """
-    Graba audio del micrófono por una duración específica y lo guarda en un archivo WAV temporal.
+    Graba audio del micrófono en un buffer preasignado y lo retorna como array int16.
+    
+    La grabación termina al llegar a `duration` segundos o cuando, después de
+    haber detectado voz, pasan `silencio_final` segundos seguidos de silencio.
+    Si nunca se detecta voz se graba la duración completa (una voz débil no debe
+    perderse en una emergencia).
     
     Args:
-        stream: El objeto stream de PyAudio para la captura.
+        stream: Stream de PyAudio o LectorAudio del buffer de captura.
         duration (int): Duración máxima de la grabación en segundos.
-        filename_suffix (str): Sufijo para el nombre del archivo (ej. "emergency_voice_message").
+        silencio_final (float): Segundos de silencio tras la voz que terminan la grabación.
     
     Returns:
-        str: La ruta del archivo grabado si la grabación fue exitosa, None en caso contrario.
+        np.ndarray: Vista del buffer con el audio grabado (sin copias adicionales).
     """
-    fs = 16000 
-    frames = []
-    print(f"Grabando mensaje de voz por hasta {duration} segundos. Habla ahora...")
-    
-    start_time = time.time()
-    
-    # Generar un nombre de archivo único para evitar colisiones
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(TEMP_AUDIO_DIR_LOCAL, f"{filename_suffix}_{timestamp}.wav")
+    bloque = fs // 4  # 250 ms
+    audio = np.empty(int(duration * fs), dtype=np.int16)
+    vad = CompuertaVAD(fs=fs, bloque_muestras=bloque)
+    n = 0
+    fin_voz = None
+    while n < len(audio):
+        destino = audio[n:n + bloque]
+        if hasattr(stream, "leer_en"):
+            # Lector del buffer circular: copia directa al buffer de la grabación
+            leidas = stream.leer_en(destino, timeout=1.0)
+        else:
+            datos = stream.read(len(destino), exception_on_overflow=False)
+            leidas = len(datos) // 2
+            destino[:leidas] = np.frombuffer(datos, dtype=np.int16)
+        if leidas == 0:
+            break
+        n += leidas
 
-    try:
-        while True:
-            data = stream.read(8000, exception_on_overflow=False) 
-            frames.append(data)
-            
-            if time.time() - start_time > duration:
-                break
-        
-        print(f"Grabación finalizada. Guardando como {filename}")
-        
-        audio_data = np.frombuffer(b''.join(frames), dtype=np.int16)
-        wavio.write(filename, audio_data, fs, sampwidth=2) 
-        
-        return filename
-    except Exception as e:
-        print(f"Error durante la grabación del mensaje de voz: {e}")
-        return None
+        if vad.es_voz(audio[n - leidas:n]):
+            fin_voz = n
+        elif fin_voz is not None and (n - fin_voz) >= silencio_final * fs:
+            print(f"Silencio de {silencio_final} s tras el mensaje: fin de la grabación.")
+            # Conservar un margen corto de silencio al final
+            n = min(n, fin_voz + int(0.3 * fs))
+            break
+    return audio[:n]
+
+def codificar_wav(audio_data, fs=16000):
+    """
+    Empaqueta audio PCM int16 (mono) como WAV en memoria. No necesita FFmpeg:
+    es el respaldo cuando no se puede codificar a OGG/Opus.
     
-def convertir_a_ogg_opus(input_wav_file, output_ogg_file_suffix="voice_message_converted"):
+    Returns:
+        io.BytesIO: El WAV listo para subir (con `.name` para Telegram).
+    """
+    wav_bytes = io.BytesIO()
+    with wave.open(wav_bytes, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(fs)
+        # Escribir directamente desde el buffer de la grabación, sin copiarlo
+        wav.writeframes(memoryview(np.ascontiguousarray(audio_data)).cast("B"))
+    wav_bytes.seek(0)
+    wav_bytes.name = "mensaje_de_voz.wav"
+    return wav_bytes
+
+def codificar_ogg_opus(audio_data, fs=16000, bitrate="24k", timeout_s=5.0):
     """
-    Convierte un archivo WAV a OGG (Opus codec), ideal para mensajes de voz de Telegram.
+    Codifica audio PCM int16 (mono) a OGG/Opus en memoria, sin archivos temporales.
+    El PCM se envía por stdin a FFmpeg y el OGG se lee de su stdout.
     Requiere FFmpeg.
     
     Args:
-        input_wav_file (str): Ruta al archivo WAV de entrada.
-        output_ogg_file_suffix (str): Sufijo para el nombre del archivo OGG de salida.
+        audio_data (np.ndarray): Muestras int16, p. ej. de grabar_mensaje_voz_pcm.
+        fs (int): Frecuencia de muestreo.
+        bitrate (str): Tasa de bits de Opus (24k es de sobra para voz).
+        timeout_s (float): Tiempo máximo para FFmpeg; se usa en la alerta de
+            emergencia, así que un FFmpeg colgado no puede bloquearla.
         
     Returns:
-        str: La ruta del archivo OGG convertido si fue exitoso, None en caso contrario.
+        io.BytesIO: El OGG listo para subir (con `.name` para Telegram), o None si
+        falló (en ese caso puede enviarse el audio con codificar_wav).
     """
-    # Generar un nombre de archivo único para la salida OGG
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    output_ogg_file = os.path.join(TEMP_AUDIO_DIR_LOCAL, f"{output_ogg_file_suffix}_{timestamp}.ogg")
-
+    comando = ["ffmpeg", "-hide_banner", "-loglevel", "error",
+               "-f", "s16le", "-ar", str(fs), "-ac", "1", "-i", "pipe:0",
+               "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"]
     try:
-        audio = AudioSegment.from_wav(input_wav_file)
-        audio.export(output_ogg_file, format="ogg", codec="libopus")
-        print(f"Archivo convertido a OGG Opus: {output_ogg_file}")
-        return output_ogg_file
+        proceso = subprocess.run(comando, input=memoryview(np.ascontiguousarray(audio_data)).cast("B"),
+                                 capture_output=True, check=True, timeout=timeout_s)
+        ogg = io.BytesIO(proceso.stdout)
+        ogg.name = "mensaje_de_voz.ogg"
+        return ogg
     except FileNotFoundError:
         print("Error: FFmpeg no encontrado. Asegúrate de tenerlo instalado y en tu PATH.")
         return None
-    except Exception as e:
-        print(f"Error al convertir a OGG Opus: {e}")
-        return None
\ No newline at end of file
+    except subprocess.TimeoutExpired:
+        print(f"Error: FFmpeg no terminó de codificar a OGG Opus en {timeout_s:.1f} s.")
+        return None
+    except subprocess.CalledProcessError as e:
+        print(f"Error al codificar a OGG Opus: {e.stderr.decode(errors='replace').strip()}")
+        return None
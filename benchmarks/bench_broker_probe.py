@@ -0,0 +1,90 @@
+# benchmarks/bench_broker_probe.py
+"""
+Mide el sondeo de disponibilidad del broker MQTT contra un broker simulado local
+que empieza a escuchar con retraso (como Mosquitto recién lanzado): cuánto
+tarda el arranque en seguir una vez que el broker está listo, frente a la
+antigua espera fija de 7 s, y que falla enseguida si el broker rechaza la
+conexión o si nunca llega a escuchar.
+
+Uso: python benchmarks/bench_broker_probe.py [--retraso 2.0]
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mqtt_utils_A import esperar_broker
+
+ESPERA_FIJA_ANTERIOR_S = 7.0
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def broker_simulado(puerto, retraso_s, codigo_connack=0):
+    """Escucha en `puerto` tras `retraso_s` y responde a cada CONNECT con un CONNACK. Retorna el instante en que escucha."""
+    listo = {}
+
+    def servir():
+        time.sleep(retraso_s)
+        servidor = socket.socket()
+        servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        servidor.bind(("127.0.0.1", puerto))
+        servidor.listen()
+        listo["t"] = time.monotonic()
+        while True:
+            conexion, _ = servidor.accept()
+            with conexion:
+                conexion.recv(256)
+                conexion.sendall(bytes([0x20, 0x02, 0x00, codigo_connack]))
+                conexion.recv(16)
+
+    threading.Thread(target=servir, daemon=True).start()
+    return listo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retraso", type=float, default=2.0, help="segundos hasta que el broker simulado escucha")
+    args = parser.parse_args()
+    errores = 0
+
+    puerto = puerto_libre()
+    listo = broker_simulado(puerto, args.retraso)
+    inicio = time.monotonic()
+    ok = esperar_broker("127.0.0.1", puerto, plazo_s=args.retraso + 5)
+    fin = time.monotonic()
+    retraso_extra = fin - listo.get("t", fin)
+    print(f"Broker listo a los {args.retraso:.1f} s: sondeo OK={ok} en {fin - inicio:.2f} s "
+          f"({retraso_extra * 1000:.0f} ms después de que escuchara; antes se esperaban {ESPERA_FIJA_ANTERIOR_S:.0f} s fijos)")
+    errores += not ok
+
+    puerto = puerto_libre()
+    broker_simulado(puerto, 0, codigo_connack=5)
+    time.sleep(0.1)
+    inicio = time.monotonic()
+    ok = esperar_broker("127.0.0.1", puerto, plazo_s=10)
+    duracion = time.monotonic() - inicio
+    print(f"Broker que rechaza la conexión: OK={ok} en {duracion:.2f} s")
+    errores += ok or duracion > 1.0
+
+    puerto = puerto_libre()
+    inicio = time.monotonic()
+    ok = esperar_broker("127.0.0.1", puerto, plazo_s=2.0)
+    duracion = time.monotonic() - inicio
+    print(f"Sin broker: OK={ok} en {duracion:.2f} s (plazo 2 s)")
+    errores += ok or duracion > 2.5
+
+    print("OK" if not errores else f"{errores} comprobaciones fallidas")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/bench_emergency.py
+"""
+Mide cuánto tarda una emergencia publicada en el canal de eventos (como hace
+el callback de MQTT) en cortar cada cosa que puede estar haciendo el asistente:
+la escucha de un comando (hasta que el bucle principal inicia la alerta), una
+frase que está sonando y una consulta a Gemini en curso (contra el servidor
+simulado local). El objetivo es quedar en decenas de milisegundos.
+
+Uso: python benchmarks/bench_emergency.py [--repeticiones 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from audio_capture import BufferCircular
+from audio_processing import escuchar_comando
+from emergency_events import CanalEmergencias
+from fake_gemini_server import crear_servidor
+from gemini_async import ClienteGeminiAsync, ConsultaCancelada
+from speech_queue import ColaVoz, ReproductorPygame
+
+OBJETIVO_MS = 50
+
+
+class ReconocedorMudo:
+    """Reconocedor con la interfaz de Vosk que nunca termina una frase (habitación en silencio)."""
+
+    def Reset(self):
+        pass
+
+    def AcceptWaveform(self, datos):
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+
+class ReproductorSimulado:
+    """Reproduce 'en silencio' durante `duracion_s`, consultando `debe_parar` como ReproductorPygame."""
+
+    def __init__(self, duracion_s=5.0):
+        self.duracion_s = duracion_s
+        self.t_parada = None
+
+    def reproducir(self, ruta, debe_parar):
+        fin = time.perf_counter() + self.duracion_s
+        while time.perf_counter() < fin:
+            if debe_parar():
+                self.t_parada = time.perf_counter()
+                return False
+            time.sleep(ReproductorPygame.PERIODO_SONDEO_S)
+        return True
+
+
+def publicar_tras(canal, retraso_s, fuente="detección de caída"):
+    threading.Timer(retraso_s, canal.publicar, args=(fuente,)).start()
+
+
+def escucha(repeticiones):
+    """Detección -> alerta iniciada por el bucle principal mientras escucha un comando."""
+    buffer = BufferCircular(16000 * 5)
+    activo = threading.Event()
+    activo.set()
+
+    def microfono():
+        bloque = np.zeros(1024, dtype=np.int16)
+        while activo.is_set():
+            buffer.escribir(bloque)
+            time.sleep(1024 / 16000)
+
+    threading.Thread(target=microfono, daemon=True).start()
+    lector = buffer.nuevo_lector()
+    canal = CanalEmergencias()
+    canal.suscribir(lambda evento: lector.interrumpir())
+    reconocedor = ReconocedorMudo()
+    for _ in range(repeticiones):
+        publicar_tras(canal, 0.3)
+        escuchar_comando(lector, reconocedor, timeout=5, interrumpir=canal.activa)
+        canal.registrar_alerta(canal.siguiente())
+    activo.clear()
+    return list(canal.latencias)
+
+
+def voz(repeticiones):
+    """Detección -> la frase en curso deja de sonar."""
+    reproductor = ReproductorSimulado()
+    cola = ColaVoz(lambda texto: texto, reproductor=reproductor)
+    canal = CanalEmergencias()
+    canal.suscribir(lambda evento: cola.interrumpir())
+    latencias = []
+    for _ in range(repeticiones):
+        solicitud = cola.decir("Te recuerdo que tienes que tomar la pastilla.")
+        solicitud.empezo.wait()
+        evento = canal.publicar("botón de pánico")
+        solicitud.esperar()
+        latencias.append(reproductor.t_parada - evento.t_deteccion)
+        canal.siguiente()
+    cola.detener()
+    return latencias
+
+
+async def gemini(repeticiones, puerto):
+    """Detección -> la consulta a Gemini en curso lanza ConsultaCancelada."""
+    cliente = ClienteGeminiAsync("clave-falsa", url_base=f"http://127.0.0.1:{puerto}", timeout_s=10)
+    canal = CanalEmergencias()
+    loop = asyncio.get_running_loop()
+    latencias = []
+    for _ in range(repeticiones):
+        cancelar = asyncio.Event()
+        oyente = canal.suscribir(lambda evento: loop.call_soon_threadsafe(cancelar.set))
+        publicar_tras(canal, 0.2)
+        try:
+            await cliente.generar("¿Qué tiempo hace hoy?", cancelar=cancelar)
+        except ConsultaCancelada:
+            pass
+        latencias.append(time.perf_counter() - canal.siguiente().t_deteccion)
+        canal.desuscribir(oyente)
+    return latencias
+
+
+def informe(nombre, latencias):
+    mediana = statistics.median(latencias) * 1000
+    maximo = max(latencias) * 1000
+    print(f"{nombre:<28} mediana {mediana:6.1f} ms   máx {maximo:6.1f} ms   ({len(latencias)} eventos)")
+    return maximo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--puerto", type=int, default=8775)
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, latencia_s=5.0, latencia_fragmento_s=0.0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    maximos = [
+        informe("Escucha -> alerta", escucha(args.repeticiones)),
+        informe("Frase en curso cortada", voz(args.repeticiones)),
+        informe("Consulta Gemini cancelada", asyncio.run(gemini(args.repeticiones, args.puerto))),
+    ]
+    servidor.shutdown()
+    fuera = sum(m > OBJETIVO_MS for m in maximos)
+    print("OK" if not fuera else f"{fuera} caminos superan {OBJETIVO_MS} ms")
+    sys.exit(1 if fuera else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_gemini_async.py
+"""
+Prueba el cliente asíncrono de Gemini contra el servidor simulado local:
+latencia hasta el primer fragmento y hasta la respuesta completa, respuesta
+del bucle de eventos mientras se espera, corte por plazo, reintentos ante
+errores 503 y rapidez de la cancelación (como al llegar una emergencia).
+
+Uso: python benchmarks/bench_gemini_async.py [--latencia 1.0] [--latencia-fragmento 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_gemini_server import crear_servidor
+from gemini_async import ClienteGeminiAsync, ConsultaCancelada, TiempoAgotado
+
+
+async def retraso_maximo_del_bucle(tarea, periodo=0.01):
+    """Ejecuta `tarea` y mide el mayor retraso de un temporizador de `periodo` s mientras tanto."""
+    maximo = 0.0
+    terminado = False
+
+    async def latido():
+        nonlocal maximo
+        while not terminado:
+            inicio = time.perf_counter()
+            await asyncio.sleep(periodo)
+            maximo = max(maximo, time.perf_counter() - inicio - periodo)
+
+    vigilante = asyncio.ensure_future(latido())
+    try:
+        return await tarea, maximo
+    finally:
+        terminado = True
+        await vigilante
+
+
+async def escenarios(args, url):
+    cliente = ClienteGeminiAsync("clave-falsa", url_base=url, timeout_s=10, reintentos=2, espera_reintento_s=0.1)
+
+    inicio = time.perf_counter()
+    texto, retraso = await retraso_maximo_del_bucle(cliente.generar("qué es la tensión arterial"))
+    print(f"generateContent:       {(time.perf_counter() - inicio) * 1000:6.0f} ms, "
+          f"retraso máximo del bucle {retraso * 1000:.1f} ms, {len(texto)} caracteres")
+
+    inicio = time.perf_counter()
+    primero = None
+    async for _ in cliente.generar_en_fragmentos("qué es la tensión arterial"):
+        primero = primero or time.perf_counter() - inicio
+    print(f"streamGenerateContent: primer fragmento {primero * 1000:6.0f} ms, "
+          f"completo {(time.perf_counter() - inicio) * 1000:6.0f} ms")
+
+    inicio = time.perf_counter()
+    try:
+        await cliente.generar("pregunta lenta", timeout_s=args.latencia / 2)
+        print("plazo:                 ERROR, no se cortó")
+    except TiempoAgotado:
+        print(f"plazo de {args.latencia / 2:.1f} s:        cortado a los {(time.perf_counter() - inicio) * 1000:6.0f} ms")
+
+    cancelar = asyncio.Event()
+    asyncio.get_running_loop().call_later(0.2, cancelar.set)
+    inicio = time.perf_counter()
+    try:
+        async for _ in cliente.generar_en_fragmentos("pregunta cancelada", cancelar=cancelar):
+            pass
+        print("cancelación:           ERROR, no se canceló")
+    except ConsultaCancelada:
+        print(f"cancelación a 200 ms:  abandonada a los {(time.perf_counter() - inicio) * 1000:6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia", type=float, default=1.0)
+    parser.add_argument("--latencia-fragmento", type=float, default=0.2)
+    parser.add_argument("--puerto", type=int, default=8766)
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, args.latencia, args.latencia_fragmento)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{args.puerto}"
+    asyncio.run(escenarios(args, url))
+    servidor.shutdown()
+
+    # Reintentos: la mitad de las peticiones falla con 503
+    servidor = crear_servidor(args.puerto + 1, 0.05, 0.0, tasa_errores=0.5)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    cliente = ClienteGeminiAsync("clave-falsa", url_base=f"http://127.0.0.1:{args.puerto + 1}",
+                                 timeout_s=10, reintentos=3, espera_reintento_s=0.05)
+
+    async def con_errores(n=20):
+        correctas = 0
+        for _ in range(n):
+            try:
+                await cliente.generar("hola qué tal")
+                correctas += 1
+            except Exception:
+                pass
+        return correctas
+
+    correctas = asyncio.run(con_errores())
+    print(f"503 en el 50 %:        {correctas}/20 consultas correctas con 3 reintentos "
+          f"({servidor.RequestHandlerClass.peticiones} peticiones HTTP)")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
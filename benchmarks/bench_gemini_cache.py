@@ -0,0 +1,69 @@
+# benchmarks/bench_gemini_cache.py
+"""
+Prueba la caché de respuestas de Gemini: que preguntas equivalentes compartan
+clave y que las que cambian de sentido (por un posesivo, un pronombre o un
+verbo) no, y el tiempo de un acierto.
+
+Uso: python benchmarks/bench_gemini_cache.py [--consultas 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_cache import CacheRespuestas, normalizar_pregunta
+
+# Pares que deben compartir clave
+EQUIVALENTES = [
+    ("¿Qué tiempo hace?", "Oye, ¿qué tiempo hace, por favor?"),
+    ("¿Qué es la tensión arterial?", "Dime qué es la tensión arterial"),
+]
+
+# Pares que deben tener claves distintas
+DISTINTAS = [
+    ("¿Cuál es mi nombre?", "¿Cuál es tu nombre?"),
+    ("¿Cómo se llama mi hija?", "¿Cómo se llama su hija?"),
+    ("¿Me recuerdas la receta?", "¿Te recuerdas la receta?"),
+    ("¿Dónde está la farmacia?", "¿Dónde la farmacia?"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultas", type=int, default=1000)
+    args = parser.parse_args()
+
+    fallos = 0
+    for a, b in EQUIVALENTES:
+        if normalizar_pregunta(a) != normalizar_pregunta(b):
+            print(f"ERROR: '{a}' y '{b}' deberían compartir clave ({normalizar_pregunta(a)!r} != {normalizar_pregunta(b)!r})")
+            fallos += 1
+    for a, b in DISTINTAS:
+        if normalizar_pregunta(a) == normalizar_pregunta(b):
+            print(f"ERROR: '{a}' y '{b}' comparten la clave {normalizar_pregunta(a)!r}")
+            fallos += 1
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheRespuestas(os.path.join(directorio, "cache.db"))
+        cache.guardar("¿Cuál es mi nombre?", "Te llamas Carmen.")
+        if cache.obtener("¿Cuál es tu nombre?") is not None:
+            print("ERROR: la pregunta por el nombre del asistente devolvió el nombre del usuario")
+            fallos += 1
+
+        pregunta = "¿Qué es la tensión arterial?"
+        cache.guardar(pregunta, "Es la fuerza de la sangre contra las arterias.")
+        inicio = time.perf_counter()
+        for _ in range(args.consultas):
+            cache.obtener(pregunta)
+        por_acierto = (time.perf_counter() - inicio) / args.consultas * 1000
+        print(f"Acierto de caché: {por_acierto:.3f} ms por consulta ({args.consultas} consultas)")
+        cache.cerrar()
+
+    print("OK" if not fallos else f"{fallos} comprobaciones fallidas")
+
+
+if __name__ == "__main__":
+    main()
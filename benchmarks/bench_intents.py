@@ -0,0 +1,89 @@
+# benchmarks/bench_intents.py
+"""
+Mide el costo por frase de resolver la intención de un comando: la cadena
+lineal de `any(variant in comando ...)` frente al IntentMatcher compilado,
+con cientos de comandos personalizados.
+
+Uso: python benchmarks/bench_intents.py [--comandos N] [--variantes N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_matcher import IntentMatcher
+
+COMANDOS_BASE = {
+    "encender luces": ["enciende las luces", "prender luces", "luces encendidas", "encender luces"],
+    "apagar luces": ["apaga luces", "apaga las luces", "luces apagadas", "apagar luces"],
+    "temperatura": ["cuál es la temperatura", "consulta temperatura", "dime la temperatura"],
+    "mensaje cuidador": ["mensaje al cuidador", "avisar cuidador", "llamar cuidador", "aviso cuidador", "enviar mensaje", "auxilio", "emergencia"],
+    "gemini": ["gemini", "pregunta a gemini", "una consulta", "una pregunta"],
+    "hora": ["qué hora es", "dime la hora", "hora actual", "cuál es la hora"],
+    "encender sistema": ["enciende el sistema", "iniciar sistema", "prende el sistema"],
+    "fecha y dia": ["qué día es hoy", "cuál es la fecha", "dime el día", "dime la fecha de hoy"],
+    "añadir recordatorio": ["pon un recordatorio", "recuérdame", "añadir recordatorio de pastillas", "programar recordatorio"],
+    "listar recordatorios": ["qué recordatorios tengo", "mis recordatorios", "dime mis recordatorios"],
+    "eliminar recordatorio": ["borrar recordatorio", "quitar recordatorio", "eliminar recordatorio"],
+}
+
+PALABRAS = ("abre cierra sube baja pon quita la el las los de del cocina sala baño cuarto persiana "
+            "radio televisión música volumen ventilador calefacción puerta alarma riego jardín").split()
+
+
+def generar_comandos(num_comandos, num_variantes, rng):
+    comandos = {k: list(v) for k, v in COMANDOS_BASE.items()}
+    for i in range(num_comandos):
+        comandos[f"personalizado {i}"] = [
+            " ".join(rng.choice(PALABRAS) for _ in range(rng.randint(2, 4))) + f" {i}"
+            for _ in range(num_variantes)
+        ]
+    return comandos
+
+
+def buscar_lineal(comandos, comando):
+    for intencion, variantes in comandos.items():
+        if any(variant in comando for variant in variantes):
+            return intencion
+    return None
+
+
+def medir(funcion, frases, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for frase in frases:
+            funcion(frase)
+    return (time.perf_counter() - inicio) / (repeticiones * len(frases))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comandos", type=int, default=500, help="comandos personalizados a generar")
+    parser.add_argument("--variantes", type=int, default=5, help="variantes por comando personalizado")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    comandos = generar_comandos(args.comandos, args.variantes, rng)
+    frases = ["por favor apaga las luces", "qué hora es", "dime mis recordatorios",
+              "quiero hacer una pregunta", "nada que ver con ningún comando hoy"]
+    frases += [rng.choice(v) for v in rng.sample(list(comandos.values()), 20)]
+
+    inicio = time.perf_counter()
+    matcher = IntentMatcher(comandos)
+    t_compilar = time.perf_counter() - inicio
+
+    t_lineal = medir(lambda f: buscar_lineal(comandos, f), frases, args.repeticiones)
+    t_matcher = medir(matcher.buscar, frases, args.repeticiones)
+
+    print(f"{len(comandos)} intenciones, {matcher.num_variantes} variantes, {len(frases)} frases")
+    print(f"compilación del matcher: {t_compilar * 1000:.1f} ms (una vez al arrancar)")
+    print(f"cadena lineal:           {t_lineal * 1e6:9.1f} µs/frase")
+    print(f"IntentMatcher:           {t_matcher * 1e6:9.1f} µs/frase ({t_lineal / t_matcher:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
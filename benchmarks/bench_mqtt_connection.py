@@ -0,0 +1,185 @@
+# benchmarks/bench_mqtt_connection.py
+"""
+Prueba la conexión MQTT en segundo plano con un broker mínimo local: se
+configuran dos brokers (el primero sin nadie escuchando), se llama a
+`iniciar` y se comprueba que retorna al momento; el broker arranca tarde, el
+cliente llega a él alternando entre los dos y se suscribe. Después el broker
+corta la conexión y se mide cuánto tarda el cliente en reconectar y volver a
+suscribirse. También comprueba que las esperas entre intentos crecen y
+respetan el máximo.
+
+Uso: python benchmarks/bench_mqtt_connection.py [--retraso-broker 2.0] [--espera-max 1.0]
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paho.mqtt.client as mqtt
+
+from mqtt_connection import CONECTADO, RECONECTANDO, GestorConexionMQTT
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BrokerMinimo:
+    """Broker MQTT 3.1.1 de juguete: acepta CONNECT, SUBSCRIBE y PINGREQ; `cortar` cierra las conexiones."""
+
+    def __init__(self, puerto):
+        self.puerto = puerto
+        self.suscripciones = []  # (t, filtros)
+        self._conexiones = []
+        self._servidor = None
+
+    def iniciar(self):
+        self._servidor = socket.create_server(("127.0.0.1", self.puerto))
+        threading.Thread(target=self._aceptar, daemon=True).start()
+
+    def _aceptar(self):
+        while True:
+            try:
+                conexion, _ = self._servidor.accept()
+            except OSError:
+                return
+            self._conexiones.append(conexion)
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    @staticmethod
+    def _leer(conexion, n):
+        datos = b""
+        while len(datos) < n:
+            trozo = conexion.recv(n - len(datos))
+            if not trozo:
+                raise ConnectionError
+            datos += trozo
+        return datos
+
+    def _atender(self, conexion):
+        try:
+            while True:
+                tipo = self._leer(conexion, 1)[0] >> 4
+                longitud, multiplicador = 0, 1
+                while True:
+                    byte = self._leer(conexion, 1)[0]
+                    longitud += (byte & 0x7F) * multiplicador
+                    multiplicador *= 128
+                    if not byte & 0x80:
+                        break
+                cuerpo = self._leer(conexion, longitud)
+                if tipo == 1:  # CONNECT
+                    conexion.sendall(b"\x20\x02\x00\x00")
+                elif tipo == 8:  # SUBSCRIBE
+                    filtros, i = [], 2
+                    while i < len(cuerpo):
+                        n = int.from_bytes(cuerpo[i:i + 2], "big")
+                        filtros.append(cuerpo[i + 2:i + 2 + n].decode())
+                        i += 3 + n
+                    self.suscripciones.append((time.perf_counter(), filtros))
+                    conexion.sendall(bytes([0x90, 2 + len(filtros)]) + cuerpo[:2] + b"\x00" * len(filtros))
+                elif tipo == 12:  # PINGREQ
+                    conexion.sendall(b"\xd0\x00")
+                elif tipo == 14:  # DISCONNECT
+                    return
+        except OSError:
+            pass
+        finally:
+            conexion.close()
+
+    def cortar(self):
+        for conexion in self._conexiones:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._conexiones = []
+
+    def detener(self):
+        self.cortar()
+        if self._servidor:
+            self._servidor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retraso-broker", type=float, default=2.0)
+    parser.add_argument("--espera-max", type=float, default=1.0)
+    args = parser.parse_args()
+    fallos = 0
+
+    puerto = puerto_libre()
+    broker = BrokerMinimo(puerto)
+    client = mqtt.Client()
+    gestor = GestorConexionMQTT(client, [("127.0.0.1", puerto_libre()), ("127.0.0.1", puerto)],
+                                keepalive=10, espera_min_s=0.1, espera_max_s=args.espera_max)
+    esperas = []  # (fallos seguidos, espera antes del siguiente intento)
+    estados = []
+
+    @gestor.al_cambiar_estado
+    def al_cambiar(estado, host, port):
+        estados.append((time.perf_counter(), estado, port))
+        if estado == RECONECTANDO:
+            esperas.append((gestor.fallos_seguidos, gestor.espera_s))
+        elif estado == CONECTADO:
+            client.subscribe([("hogar/+/temperatura", 0), ("hogar/emergencia/panico/pulsado", 1)])
+
+    inicio = time.perf_counter()
+    gestor.iniciar()
+    t_iniciar = (time.perf_counter() - inicio) * 1000
+    print(f"iniciar() retornó en {t_iniciar:.1f} ms sin ningún broker disponible")
+    if t_iniciar > 100:
+        print("ERROR: iniciar() no debería bloquear")
+        fallos += 1
+
+    time.sleep(args.retraso_broker)
+    broker.iniciar()
+    t_broker = time.perf_counter()
+    if not gestor.esperar_conexion(timeout=args.espera_max * 3 + 2):
+        print("ERROR: el cliente no se conectó al broker que arrancó tarde")
+        fallos += 1
+    else:
+        time.sleep(0.2)
+        print(f"Conectado {time.perf_counter() - t_broker:.2f} s después de arrancar el broker, "
+              f"tras {len(esperas)} intentos fallidos (alternando brokers)")
+    print("Esperas entre intentos (s): " + ", ".join(f"{e:.2f}" for _, e in esperas))
+    for n, espera in esperas:
+        base = min(args.espera_max, 0.1 * 2 ** (n - 1))
+        if not base / 2 - 1e-9 <= espera <= base + 1e-9:
+            print(f"ERROR: espera {espera:.2f} s fuera de [{base / 2:.2f}, {base:.2f}] en el fallo {n}")
+            fallos += 1
+
+    broker.cortar()
+    t_corte = time.perf_counter()
+    limite = time.time() + args.espera_max * 3 + 2
+    while len(broker.suscripciones) < 2 and time.time() < limite:
+        time.sleep(0.005)
+    if len(broker.suscripciones) < 2:
+        print("ERROR: el cliente no volvió a suscribirse tras la reconexión")
+        fallos += 1
+    else:
+        t_resuscrito = broker.suscripciones[-1][0]
+        print(f"Reconexión y nueva suscripción {(t_resuscrito - t_corte) * 1000:.0f} ms después del corte "
+              f"({gestor.conexiones} conexiones)")
+        if broker.suscripciones[-1][1] != broker.suscripciones[0][1]:
+            print("ERROR: la nueva suscripción no coincide con la original")
+            fallos += 1
+    if not any(estado == RECONECTANDO for _, estado, _ in estados):
+        print("ERROR: no se notificó el estado 'reconectando'")
+        fallos += 1
+    print(f"Estadísticas: {gestor.estadisticas()}")
+
+    gestor.detener()
+    broker.detener()
+    print("OK" if not fallos else f"{fallos} comprobaciones fallidas")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/bench_mqtt_outbox.py
+"""
+Prueba la bandeja de salida MQTT con un broker simulado: con el broker caído
+se piden cambios de estado de las luces (que se coalescen) y eventos que no se
+coalescen; después se reabre la bandeja (como tras reiniciar el programa), se
+"reconecta" y se mide el ritmo de vaciado. Comprueba que se envía solo el
+último estado, en orden, y que cada mensaje se borra al confirmarse. Por último
+corta la conexión con mensajes sin confirmar, que reenvía el cliente MQTT (como
+hace paho), y comprueba que no llegan duplicados y que lo nuevo va detrás.
+
+Uso: python benchmarks/bench_mqtt_outbox.py [--eventos 500] [--latencia-puback-ms 2]
+"""
+import argparse
+import collections
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paho.mqtt.client as mqtt
+
+from mqtt_outbox import BandejaSalida
+
+InfoPublicacion = collections.namedtuple("InfoPublicacion", ["rc", "mid"])
+
+
+class BrokerSimulado:
+    """Recibe publicaciones y confirma cada una (PUBACK) desde otro hilo tras `latencia_s`."""
+
+    def __init__(self, bandeja, latencia_s):
+        self.bandeja = bandeja
+        self.latencia_s = latencia_s
+        self.recibidos = []
+        self._mids = itertools.count(1)
+
+    def publicar(self, topico, payload, qos, retain):
+        mid = next(self._mids)
+        self.recibidos.append((topico, payload))
+        threading.Timer(self.latencia_s, self.bandeja.confirmar, args=(mid,)).start()
+        return InfoPublicacion(0, mid)
+
+
+class ClienteConCorte:
+    """
+    Imita a paho con QoS 1: guarda lo enviado hasta el PUBACK, acepta mensajes
+    sin conexión (rc=MQTT_ERR_NO_CONN) y al reconectar reenvía lo que tiene.
+    """
+
+    def __init__(self, bandeja):
+        self.bandeja = bandeja
+        self.conectado = True
+        self.recibidos = []
+        self.guardados = {}
+        self._mids = itertools.count(1)
+
+    def publicar(self, topico, payload, qos, retain):
+        mid = next(self._mids)
+        self.guardados[mid] = (topico, payload)
+        if not self.conectado:
+            return InfoPublicacion(mqtt.MQTT_ERR_NO_CONN, mid)
+        self.recibidos.append((topico, payload))
+        return InfoPublicacion(mqtt.MQTT_ERR_SUCCESS, mid)
+
+    def confirmar_todo(self):
+        listos = []
+        for mid in list(self.guardados):
+            del self.guardados[mid]
+            listos.append(self.bandeja.confirmar(mid))
+        return any(listos)
+
+    def reconectar(self):
+        self.conectado = True
+        self.recibidos.extend(self.guardados.values())
+
+
+def corte_con_mensajes_en_vuelo(db):
+    """Retorna cuántas comprobaciones fallaron."""
+    fallos = 0
+    bandeja = BandejaSalida(db)
+    cliente = ClienteConCorte(bandeja)
+    bandeja.encolar("hogar/eventos", "antes 1")
+    bandeja.encolar("hogar/eventos", "antes 2")
+    bandeja.vaciar(cliente.publicar)  # Se envían, pero el PUBACK no llega
+    cliente.conectado = False
+    bandeja.desconectado()
+    bandeja.encolar("hogar/eventos", "durante")
+    bandeja.vaciar(cliente.publicar, lambda: cliente.conectado)
+
+    cliente.reconectar()
+    bandeja.encolar("hogar/eventos", "después")
+    if bandeja.vaciar(cliente.publicar, lambda: cliente.conectado):
+        print("ERROR: se enviaron mensajes nuevos antes de confirmar los reenvíos")
+        fallos += 1
+    if not cliente.confirmar_todo():
+        print("ERROR: confirmar los reenvíos no avisó de que se puede vaciar")
+        fallos += 1
+    bandeja.vaciar(cliente.publicar, lambda: cliente.conectado)
+    cliente.confirmar_todo()
+
+    recibidos = [p.decode() for _, p in cliente.recibidos]
+    print(f"Corte con mensajes en vuelo: el broker recibió {recibidos}")
+    if recibidos != ["antes 1", "antes 2", "antes 1", "antes 2", "durante", "después"]:
+        print("ERROR: se esperaban los reenvíos del cliente MQTT, sin duplicados de la bandeja y en orden")
+        fallos += 1
+    if bandeja.pendientes():
+        print("ERROR: quedaron mensajes sin confirmar tras el corte")
+        fallos += 1
+    bandeja.cerrar()
+    return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eventos", type=int, default=500)
+    parser.add_argument("--latencia-puback-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    fallos = 0
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        db = os.path.join(carpeta, "mqtt_outbox.db")
+        bandeja = BandejaSalida(db, max_pendientes=args.eventos + 100)
+        inicio = time.perf_counter()
+        for i in range(args.eventos):
+            bandeja.encolar("robot/luces", "ON" if i % 2 else "OFF", coalescer=True)
+            bandeja.encolar("hogar/eventos", f"evento {i}")
+        t_encolar = (time.perf_counter() - inicio) / (2 * args.eventos) * 1e6
+        print(f"Encolar con el broker caído: {t_encolar:.0f} µs por mensaje; pendientes: {bandeja.pendientes()} "
+              f"({bandeja.coalescidos} estados de las luces coalescidos)")
+        bandeja.cerrar()
+
+        # "Reinicio": otra instancia sobre el mismo archivo
+        bandeja = BandejaSalida(db, max_pendientes=args.eventos + 100)
+        broker = BrokerSimulado(bandeja, args.latencia_puback_ms / 1000)
+        print(f"Tras reabrir la bandeja: {bandeja.pendientes()} pendientes")
+        bandeja.vaciar(broker.publicar)
+        limite = time.time() + 10
+        while bandeja.pendientes() and time.time() < limite:
+            time.sleep(0.01)
+        estadisticas = bandeja.estadisticas()
+        print(f"Vaciado al reconectar: {estadisticas.get('ultimo_vaciado')}")
+        print(f"Estadísticas: {estadisticas}")
+
+        luces = [p for t, p in broker.recibidos if t == "robot/luces"]
+        eventos = [p.decode() for t, p in broker.recibidos if t == "hogar/eventos"]
+        if luces != [b"ON" if (args.eventos - 1) % 2 else b"OFF"]:
+            print(f"ERROR: se esperaba un solo estado final de las luces, se enviaron {luces}")
+            fallos += 1
+        if eventos != [f"evento {i}" for i in range(args.eventos)]:
+            print("ERROR: los eventos no llegaron todos y en orden")
+            fallos += 1
+        if broker.recibidos[-2][0] != "robot/luces":
+            print("ERROR: el estado coalescido debería enviarse en la posición de su última actualización")
+            fallos += 1
+        if estadisticas["pendientes"]:
+            print("ERROR: quedaron mensajes sin confirmar")
+            fallos += 1
+        bandeja.cerrar()
+
+        fallos += corte_con_mensajes_en_vuelo(os.path.join(carpeta, "corte.db"))
+
+    print("OK" if not fallos else f"{fallos} comprobaciones fallidas")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_mqtt_router.py
+"""
+Mide el enrutador de mensajes MQTT: búsqueda de manejadores en el árbol de
+tópicos frente a comprobar cada filtro con paho (topic_matches_sub), coste de
+`despachar` en el hilo de red aunque los manejadores sean lentos, y latencia
+de un mensaje de emergencia (urgente) en plena ráfaga de lecturas de sensores.
+
+Uso: python benchmarks/bench_mqtt_router.py [--habitaciones 50]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mqtt_router import ArbolTopicos, EnrutadorMQTT
+
+MAGNITUDES = ["temperatura", "humedad", "luz", "co2"]
+
+
+def filtros_de_prueba(habitaciones):
+    filtros = [f"hogar/habitacion{h}/{m}" for h in range(habitaciones) for m in MAGNITUDES]
+    filtros += [f"hogar/+/{m}" for m in MAGNITUDES] + ["hogar/emergencia/#", "robot/temperatura", "$SYS/#"]
+    return filtros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--habitaciones", type=int, default=50)
+    parser.add_argument("--mensajes", type=int, default=20000)
+    args = parser.parse_args()
+
+    filtros = filtros_de_prueba(args.habitaciones)
+    topicos = [f"hogar/habitacion{i % args.habitaciones}/{MAGNITUDES[i % len(MAGNITUDES)]}" for i in range(args.mensajes)]
+
+    arbol = ArbolTopicos(max_cache=0)  # Sin caché: cada búsqueda recorre el árbol
+    for filtro in filtros:
+        arbol.agregar(filtro, filtro)
+    inicio = time.perf_counter()
+    for topico in topicos:
+        arbol.buscar(topico)
+    t_arbol = (time.perf_counter() - inicio) / len(topicos) * 1e6
+
+    inicio = time.perf_counter()
+    for topico in topicos[:2000]:
+        [f for f in filtros if mqtt.topic_matches_sub(f, topico)]
+    t_lineal = (time.perf_counter() - inicio) / 2000 * 1e6
+
+    arbol_cache = ArbolTopicos()
+    for filtro in filtros:
+        arbol_cache.agregar(filtro, filtro)
+    inicio = time.perf_counter()
+    for topico in topicos:
+        arbol_cache.buscar(topico)
+    t_cache = (time.perf_counter() - inicio) / len(topicos) * 1e6
+    print(f"Buscar manejadores entre {len(filtros)} filtros: árbol {t_arbol:.2f} µs, con caché {t_cache:.2f} µs, "
+          f"topic_matches_sub uno a uno {t_lineal:.1f} µs")
+
+    # Manejadores lentos (5 ms): el hilo de red solo paga el despacho
+    enrutador = EnrutadorMQTT(max_hilos=4, max_cola_topico=50)
+    enrutador.registrar("hogar/+/temperatura", lambda topico, payload: time.sleep(0.005))
+    recibido = threading.Event()
+    t_emergencia = {}
+
+    def emergencia(topico, payload):
+        t_emergencia["fin"] = time.perf_counter()
+        recibido.set()
+
+    enrutador.registrar("hogar/emergencia/#", emergencia, qos=1, urgente=True)
+    n = 5000
+    inicio = time.perf_counter()
+    for i in range(n):
+        enrutador.despachar(f"hogar/habitacion{i % args.habitaciones}/temperatura", b"21.5")
+    t_despacho = (time.perf_counter() - inicio) / n * 1e6
+    t_emergencia["inicio"] = time.perf_counter()
+    enrutador.despachar("hogar/emergencia/caida/detectada", b"salon")
+    recibido.wait(5)
+    latencia_ms = (t_emergencia["fin"] - t_emergencia["inicio"]) * 1000
+    print(f"Despachar con manejadores de 5 ms: {t_despacho:.2f} µs por mensaje en el hilo de red")
+    print(f"Emergencia en plena ráfaga ({n} lecturas en cola): manejada a los {latencia_ms:.1f} ms")
+
+    estadisticas = enrutador.estadisticas()
+    descartados = sum(e["descartados"] for e in estadisticas.values())
+    print(f"Lecturas descartadas por colas llenas: {descartados}; "
+          f"profundidad máxima por tópico: {max(e['profundidad_max'] for e in estadisticas.values())}")
+    print(f"hogar/emergencia/caida/detectada: {estadisticas['hogar/emergencia/caida/detectada']}")
+    enrutador.detener()
+
+    # Comodines según la especificación de MQTT
+    casos = [("hogar/#", "hogar", True), ("hogar/+/temperatura", "hogar/cocina/temperatura", True),
+             ("hogar/+", "hogar/cocina/temperatura", False), ("#", "$SYS/broker/uptime", False),
+             ("+/broker/uptime", "$SYS/broker/uptime", False), ("$SYS/#", "$SYS/broker/uptime", True)]
+    fallos = 0
+    for filtro, topico, esperado in casos:
+        arbol = ArbolTopicos()
+        arbol.agregar(filtro, filtro)
+        if bool(arbol.buscar(topico)) != esperado:
+            print(f"ERROR: '{filtro}' con '{topico}' debería {'coincidir' if esperado else 'no coincidir'}")
+            fallos += 1
+    fallos += latencia_ms > 50
+    print("OK" if not fallos else f"{fallos} comprobaciones fallidas")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
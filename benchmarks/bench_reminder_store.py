@@ -0,0 +1,101 @@
+# benchmarks/bench_reminder_store.py
+"""
+Compara el rendimiento de inserción, consulta y actualización de recordatorios:
+funciones con una conexión nueva por llamada (como antes de ReminderStore)
+frente a ReminderStore (conexión persistente por hilo, WAL, sentencias preparadas).
+Los dos lados usan el mismo esquema, el mismo SQL y la misma conversión de filas:
+solo cambia el manejo de la conexión.
+
+Uso: python benchmarks/bench_reminder_store.py [--filas N] [--consultas N]
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_store import ReminderStore
+from time_parser import RECURRENCIA_DIARIA, RECURRENCIA_UNA_VEZ
+
+
+class ConexionPorLlamada:
+    """
+    Réplica de las funciones originales: abre y cierra la base de datos en cada
+    operación. El esquema (con las migraciones aplicadas), el SQL y la conversión
+    de filas son los de ReminderStore, para comparar solo el manejo de la conexión.
+    """
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        store = ReminderStore(db_name)
+        store.migrar()
+        store.cerrar()
+
+    def agregar(self, hour, minute, message, due_date=None, recurrence=RECURRENCIA_DIARIA):
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO reminders (time_hour, time_minute, message, last_triggered_date, due_date, recurrence) "
+                       "VALUES (?, ?, ?, NULL, ?, ?)",
+                       (hour, minute, message, due_date.isoformat() if due_date else None, recurrence))
+        new_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return new_id
+
+    def obtener_todos(self):
+        conn = sqlite3.connect(self.db_name)
+        rows = conn.execute(
+            "SELECT id, time_hour, time_minute, message, last_triggered_date, due_date, recurrence FROM reminders"
+        ).fetchall()
+        conn.close()
+        return ReminderStore._a_diccionarios(rows)
+
+    def actualizar_fecha_disparo(self, reminder_id, new_date_str):
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("UPDATE reminders SET last_triggered_date = ? WHERE id = ?", (new_date_str, reminder_id))
+        conn.commit()
+        conn.close()
+
+
+def medir(nombre, almacen, filas, consultas):
+    inicio = time.perf_counter()
+    # Un tercio de una sola vez (con fecha), como en el uso real
+    ids = [almacen.agregar(i % 24, i % 60, f"recordatorio de prueba {i}",
+                           *((datetime.date(2025, 1, 2), RECURRENCIA_UNA_VEZ) if i % 3 == 0 else ()))
+           for i in range(filas)]
+    t_insertar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(consultas):
+        almacen.obtener_todos()
+    t_consultar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for reminder_id in ids:
+        almacen.actualizar_fecha_disparo(reminder_id, "2025-01-01")
+    t_actualizar = time.perf_counter() - inicio
+
+    print(f"{nombre:22s} | inserciones {filas / t_insertar:9.0f}/s | consultas completas {consultas / t_consultar:7.0f}/s "
+          f"| actualizaciones {filas / t_actualizar:9.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=500)
+    parser.add_argument("--consultas", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        medir("conexión por llamada", ConexionPorLlamada(os.path.join(directorio, "antes.db")), args.filas, args.consultas)
+        store = ReminderStore(os.path.join(directorio, "store.db"))
+        store.migrar()
+        medir("ReminderStore", store, args.filas, args.consultas)
+        store.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_sensor_series.py
+"""
+Mide las series de sensores: coste de añadir una lectura al buffer circular
+(frente a guardar el mismo histórico en una lista recortada con pop(0)), de
+calcular las estadísticas de la última hora y de registrar lecturas con el
+guardado por lotes en SQLite activo. Comprueba que se guardan todas.
+
+Uso: python benchmarks/bench_sensor_series.py [--lecturas 100000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sensor_series import SerieSensor, SeriesSensores
+
+
+def por_lectura_us(funcion, n):
+    inicio = time.perf_counter()
+    funcion(n)
+    return (time.perf_counter() - inicio) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lecturas", type=int, default=100000)
+    parser.add_argument("--capacidad", type=int, default=16384)
+    args = parser.parse_args()
+    n, capacidad = args.lecturas, args.capacidad
+    ahora = time.time()
+
+    serie = SerieSensor(capacidad)
+
+    def buffer_circular(n):
+        for i in range(n):
+            serie.agregar(ahora - n + i, 20.0 + i % 50 / 10)
+
+    historico = []
+
+    def lista_pop0(n):
+        for i in range(n):
+            historico.append((ahora - n + i, 20.0 + i % 50 / 10))
+            if len(historico) > capacidad:
+                historico.pop(0)
+
+    print(f"Añadir lectura (histórico de {capacidad}): buffer circular {por_lectura_us(buffer_circular, n):.2f} µs, "
+          f"lista con pop(0) {por_lectura_us(lista_pop0, n):.2f} µs")
+
+    repeticiones = 200
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        est = serie.estadisticas(3600, ahora=ahora)
+    print(f"Estadísticas de la última hora ({est.lecturas} lecturas): {(time.perf_counter() - inicio) / repeticiones * 1000:.3f} ms")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        db = os.path.join(carpeta, "sensores.db")
+        series = SeriesSensores(capacidad)
+        series.iniciar_persistencia(db, intervalo_s=0.2, max_lote=2000)
+
+        def con_persistencia(n):
+            for i in range(n):
+                series.registrar(f"hogar/habitacion{i % 4}/temperatura", 20.0 + i % 50 / 10, ahora - n + i)
+
+        coste = por_lectura_us(con_persistencia, n)
+        series.cerrar()
+        conn = sqlite3.connect(db)
+        guardadas = conn.execute("SELECT COUNT(*) FROM lecturas").fetchone()[0]
+        conn.close()
+        print(f"Registrar con guardado por lotes: {coste:.2f} µs por lectura; "
+              f"{guardadas} filas en {series.lotes_escritos} lotes")
+
+    if guardadas != n:
+        print(f"ERROR: se esperaban {n} filas guardadas")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_startup.py
+"""
+Perfil de importación del asistente (al estilo de `python -X importtime`):
+importa main_test_reminders_sqlite en un proceso nuevo, agrupa el tiempo por
+paquete de primer nivel y comprueba que las integraciones pesadas (pygame,
+python-telegram-bot, pywhatkit, SDK de Gemini, pydub, vosk, pyaudio) no se
+cargan al importar, sino en su primer uso.
+
+Se ejecuta en un directorio temporal, así que no toca la configuración ni las
+bases de datos del asistente. Sale con código 1 si se importa algún módulo pesado.
+
+Uso: python benchmarks/bench_startup.py [--repeticiones N] [--top N]
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_PESADOS = ["pygame", "telegram", "pywhatkit", "google.generativeai", "pydub", "vosk", "pyaudio"]
+
+CODIGO = f"""
+import sys, time, json
+inicio = time.perf_counter()
+import main_test_reminders_sqlite
+fin = time.perf_counter()
+print("@@" + json.dumps({{"segundos": fin - inicio,
+                         "pesados": [m for m in {MODULOS_PESADOS!r} if m in sys.modules]}}))
+"""
+
+
+def importar(con_importtime):
+    """Importa el asistente en un proceso nuevo. Retorna (resultado, stderr)."""
+    entorno = dict(os.environ, PYTHONPATH=RAIZ + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory() as directorio:
+        argumentos = [sys.executable] + (["-X", "importtime"] if con_importtime else []) + ["-c", CODIGO]
+        proceso = subprocess.run(argumentos, cwd=directorio, env=entorno, capture_output=True, text=True, timeout=120)
+    lineas = [l for l in proceso.stdout.splitlines() if l.startswith("@@")]
+    if proceso.returncode != 0 or not lineas:
+        sys.exit(f"No se pudo importar el asistente:\n{proceso.stderr[-2000:]}")
+    return json.loads(lineas[-1][2:]), proceso.stderr
+
+
+def agrupar_importtime(stderr):
+    """Suma el tiempo propio (self) de cada módulo por paquete de primer nivel, en segundos."""
+    por_paquete = collections.Counter()
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, _, nombre = linea[len("import time:"):].split("|")
+        por_paquete[nombre.strip().split(".")[0]] += int(propio) / 1e6
+    return por_paquete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="paquetes a mostrar en el desglose")
+    args = parser.parse_args()
+
+    resultado, stderr = importar(con_importtime=True)
+    por_paquete = agrupar_importtime(stderr)
+    total = sum(por_paquete.values())
+    print(f"Desglose de importación ({total * 1000:.0f} ms en total, tiempo propio por paquete):")
+    for paquete, segundos in por_paquete.most_common(args.top):
+        print(f"  {paquete:<28} {segundos * 1000:8.1f} ms  {segundos / total:5.1%}")
+
+    tiempos = [importar(con_importtime=False)[0]["segundos"] for _ in range(args.repeticiones)]
+    print(f"import main_test_reminders_sqlite: mediana {statistics.median(tiempos) * 1000:.0f} ms "
+          f"(mín {min(tiempos) * 1000:.0f}, máx {max(tiempos) * 1000:.0f}, {args.repeticiones} procesos)")
+
+    if resultado["pesados"]:
+        print(f"ERROR: módulos pesados importados al arrancar: {', '.join(resultado['pesados'])}")
+        sys.exit(1)
+    print(f"OK: ninguno de {', '.join(MODULOS_PESADOS)} se importa al arrancar.")
+
+
+if __name__ == "__main__":
+    main()
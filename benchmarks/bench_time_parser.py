@@ -0,0 +1,135 @@
+# benchmarks/bench_time_parser.py
+"""
+Comprueba el intérprete de horas contra un corpus de transcripciones reales de
+Vosk y mide el costo por frase frente al parse_time_from_text anterior (veinte
+str.replace seguidos y una regex sin compilar).
+
+Sale con código 1 si alguna frase del corpus no se interpreta como se espera.
+
+Uso: python benchmarks/bench_time_parser.py [--repeticiones N]
+"""
+import argparse
+import datetime
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from time_parser import interpretar_tiempo, RECURRENCIA_DIARIA, RECURRENCIA_SEMANAL, RECURRENCIA_UNA_VEZ
+
+# Domingo 18 de octubre de 2026, 10:00
+AHORA = datetime.datetime(2026, 10, 18, 10, 0)
+
+# (transcripción, hora "HH:MM" o None, días desde AHORA de la fecha o None, recurrencia, mensaje)
+CORPUS = [
+    ("necesito tomar pastillas a las siete de la noche", "19:00", None, RECURRENCIA_DIARIA, "necesito tomar pastillas"),
+    ("los recordar pastillas a las siete treinta y dos de la noche de hoy", "19:32", 0, RECURRENCIA_UNA_VEZ, "los recordar pastillas"),
+    ("recuérdame tomar la pastilla a las ocho de la mañana", "08:00", None, RECURRENCIA_DIARIA, "tomar la pastilla"),
+    ("recordar tomar pastillas a las ocho de la noche", "20:00", None, RECURRENCIA_DIARIA, "tomar pastillas"),
+    ("recuérdame llamar a todos mis hijos a las tres y cuarto de la tarde", "15:15", None, RECURRENCIA_DIARIA, "llamar a todos mis hijos"),
+    ("recuérdame alguna cosa a las diez y media", "10:30", None, RECURRENCIA_DIARIA, "alguna cosa"),
+    ("recuérdame desayunar a las ocho menos cuarto", "07:45", None, RECURRENCIA_DIARIA, "desayunar"),
+    ("a las nueve menos diez de la noche ver las noticias", "20:50", None, RECURRENCIA_DIARIA, "ver las noticias"),
+    ("recuérdame comer a la una de la tarde", "13:00", None, RECURRENCIA_DIARIA, "comer"),
+    ("recuérdame la medicina a la una de la noche", "01:00", None, RECURRENCIA_DIARIA, "la medicina"),
+    ("a las doce de la noche cerrar la puerta", "00:00", None, RECURRENCIA_DIARIA, "cerrar la puerta"),
+    ("recuérdame almorzar al mediodía", "12:00", None, RECURRENCIA_DIARIA, "almorzar"),
+    ("recuérdame tomar agua a las cinco cuarenta y cinco de la tarde", "17:45", None, RECURRENCIA_DIARIA, "tomar agua"),
+    ("recuérdame la insulina a las 7 30", "07:30", None, RECURRENCIA_DIARIA, "la insulina"),
+    ("recuérdame en veinte minutos sacar la ropa de la lavadora", "10:20", 0, RECURRENCIA_UNA_VEZ, "sacar la ropa de la lavadora"),
+    ("recuérdame dentro de una hora y media apagar el horno", "11:30", 0, RECURRENCIA_UNA_VEZ, "apagar el horno"),
+    ("recuérdame en media hora tomar el jarabe", "10:30", 0, RECURRENCIA_UNA_VEZ, "tomar el jarabe"),
+    ("en dos horas llamar al médico", "12:00", 0, RECURRENCIA_UNA_VEZ, "llamar al médico"),
+    ("recuérdame mañana a las nueve y media llamar a maría", "09:30", 1, RECURRENCIA_UNA_VEZ, "llamar a maría"),
+    ("pasado mañana por la tarde a las cinco ir al dentista", "17:00", 2, RECURRENCIA_UNA_VEZ, "ir al dentista"),
+    ("recuérdame esta noche a las once sacar la basura", "23:00", 0, RECURRENCIA_UNA_VEZ, "sacar la basura"),
+    ("recuérdame el lunes a las diez ir al centro de salud", "10:00", 1, RECURRENCIA_UNA_VEZ, "ir al centro de salud"),
+    ("recuérdame el cinco de marzo a las once la cita del oculista", "11:00", 138, RECURRENCIA_UNA_VEZ, "la cita del oculista"),
+    ("recordar regar las plantas cada día a las siete de la mañana", "07:00", None, RECURRENCIA_DIARIA, "regar las plantas"),
+    ("recuérdame todos los días a las nueve de la noche tomar la pastilla", "21:00", None, RECURRENCIA_DIARIA, "tomar la pastilla"),
+    ("recuérdame todos los lunes a las diez sacar la basura", "10:00", 1, RECURRENCIA_SEMANAL, "sacar la basura"),
+    ("los domingos a las doce llamar a mi hermana", "12:00", 0, RECURRENCIA_SEMANAL, "llamar a mi hermana"),
+    ("recuérdame comprar pan", None, None, None, None),
+    ("qué hora es", None, None, None, None),
+]
+
+
+def parse_time_anterior(text):
+    """Copia del parse_time_from_text original, como referencia."""
+    time_map_hour = {
+        'una': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5, 'seis': 6, 'siete': 7,
+        'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12
+    }
+    time_map_minute = {
+        'cuarto': 15, 'media': 30, 'treinta': 30, 'quince': 15, 'cero': 0, 'y cuarto': 15, 'y media': 30
+    }
+    for word, num in time_map_hour.items():
+        text = text.replace(word, str(num))
+    for word, num in time_map_minute.items():
+        text = text.replace(word, str(num))
+    match = re.search(r'a las (\d+)(?: y (\d+))? (?:de la (mañana|tarde|noche))?', text)
+    if match:
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+        period = match.group(3)
+        if period == 'tarde' and hour < 12:
+            hour += 12
+        elif period == 'noche':
+            if 1 <= hour < 12:
+                hour += 12
+            elif hour == 12:
+                hour = 0
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            return None
+        return datetime.time(hour, minute)
+    return None
+
+
+def comprobar_corpus():
+    """Retorna (aciertos_nuevo, aciertos_anterior, errores del intérprete nuevo)."""
+    errores = []
+    aciertos_anterior = 0
+    for texto, hora, dias, recurrencia, mensaje in CORPUS:
+        esperado = None
+        if hora is not None:
+            fecha = AHORA.date() + datetime.timedelta(days=dias) if dias is not None else None
+            esperado = (datetime.time.fromisoformat(hora), fecha, recurrencia, mensaje)
+        obtenido = interpretar_tiempo(texto, AHORA)
+        if (tuple(obtenido) if obtenido else None) != esperado:
+            errores.append((texto, esperado, obtenido))
+        anterior = parse_time_anterior(texto)
+        if anterior == (esperado[0] if esperado else None):
+            aciertos_anterior += 1
+    return len(CORPUS) - len(errores), aciertos_anterior, errores
+
+
+def medir(funcion, frases, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for frase in frases:
+            funcion(frase)
+    return (time.perf_counter() - inicio) / (repeticiones * len(frases))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=500)
+    args = parser.parse_args()
+
+    aciertos, aciertos_anterior, errores = comprobar_corpus()
+    for texto, esperado, obtenido in errores:
+        print(f"FALLO: '{texto}'\n  esperado: {esperado}\n  obtenido: {obtenido}")
+    print(f"corpus: {aciertos}/{len(CORPUS)} frases correctas (la versión anterior acertaba la hora en {aciertos_anterior})")
+
+    frases = [texto for texto, *_ in CORPUS]
+    t_anterior = medir(parse_time_anterior, frases, args.repeticiones)
+    t_nuevo = medir(lambda f: interpretar_tiempo(f, AHORA), frases, args.repeticiones)
+    print(f"parse_time_from_text anterior: {t_anterior * 1e6:7.1f} µs/frase (solo hora)")
+    print(f"interpretar_tiempo:            {t_nuevo * 1e6:7.1f} µs/frase (hora, fecha, repetición y mensaje)")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_tts.py
+"""
+Compara el tiempo hasta el primer audio (síntesis lista para reproducir) de
+cada motor de voz disponible, sin caché y con caché.
+
+Uso: python benchmarks/bench_tts.py [--repeticiones N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_cache import TTSCache
+from tts_engines import MOTORES_TTS, crear_motor
+
+FRASES = [
+    "Luces encendidas.",
+    "Consultando temperatura",
+    "¡Alerta! Se ha detectado una emergencia. Activando protocolo de seguridad.",
+    "La temperatura actual es de 22.5 grados Celsius.",
+    "Hoy es lunes, 3 de marzo de 2025.",
+]
+
+
+def resumen(tiempos):
+    tiempos = sorted(tiempos)
+    p95 = tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))]
+    return f"mediana {statistics.median(tiempos) * 1000:8.1f} ms | p95 {p95 * 1000:8.1f} ms | máx {tiempos[-1] * 1000:8.1f} ms"
+
+
+def medir_motor(motor, repeticiones):
+    sin_cache, con_cache = [], []
+    with tempfile.TemporaryDirectory() as directorio:
+        for i in range(repeticiones):
+            # Cada repetición usa una caché nueva para medir la síntesis real
+            cache = TTSCache(os.path.join(directorio, f"r{i}"))
+            for frase in FRASES:
+                inicio = time.perf_counter()
+                cache.obtener_o_sintetizar(frase, "es", motor.nombre,
+                                           lambda t, ruta: motor.sintetizar(t, "es", ruta), motor.extension)
+                sin_cache.append(time.perf_counter() - inicio)
+
+                inicio = time.perf_counter()
+                cache.obtener(frase, "es", motor.nombre, motor.extension)
+                con_cache.append(time.perf_counter() - inicio)
+    return sin_cache, con_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    for nombre in MOTORES_TTS:
+        motor = crear_motor(nombre)
+        if not motor.disponible():
+            print(f"{nombre:8s} | no disponible en este equipo")
+            continue
+        try:
+            sin_cache, con_cache = medir_motor(motor, args.repeticiones)
+        except Exception as e:
+            print(f"{nombre:8s} | error: {e}")
+            continue
+        print(f"{nombre:8s} | sin caché: {resumen(sin_cache)}")
+        print(f"{'':8s} | con caché: {resumen(con_cache)}")
+
+
+if __name__ == "__main__":
+    main()
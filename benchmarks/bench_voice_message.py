@@ -0,0 +1,114 @@
+# benchmarks/bench_voice_message.py
+"""
+Mide el camino del mensaje de voz de emergencia, de PCM grabado a bytes listos
+para subir a Telegram:
+
+  archivos: WAV en disco -> pydub/FFmpeg -> OGG en disco -> abrir y leer
+            (el camino anterior, reproducido aquí como referencia)
+  ogg:      PCM -> FFmpeg por pipes -> BytesIO (codificar_ogg_opus)
+  wav:      PCM -> WAV en memoria (codificar_wav), el respaldo si FFmpeg falla
+
+y comprueba que un FFmpeg colgado no bloquea la alerta: con un `ffmpeg` falso
+que nunca termina, codificar_ogg_opus debe rendirse al vencer su timeout.
+
+Uso: python benchmarks/bench_voice_message.py [--segundos N] [--repeticiones N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_processing import codificar_ogg_opus, codificar_wav
+
+
+def camino_archivos(audio_data, fs):
+    """El camino anterior a codificar_ogg_opus: grabar_mensaje_voz + convertir_a_ogg_opus."""
+    from pydub import AudioSegment
+    with tempfile.TemporaryDirectory() as carpeta:
+        wav_path = os.path.join(carpeta, "voice_message.wav")
+        with wave.open(wav_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(fs)
+            wav.writeframes(audio_data.tobytes())
+        ogg_path = os.path.join(carpeta, "voice_message.ogg")
+        AudioSegment.from_wav(wav_path).export(ogg_path, format="ogg", codec="libopus")
+        with open(ogg_path, "rb") as f:
+            return len(f.read())
+
+
+def camino_ogg(audio_data, fs):
+    return len(codificar_ogg_opus(audio_data, fs).getbuffer())
+
+
+def camino_wav(audio_data, fs):
+    return len(codificar_wav(audio_data, fs).getbuffer())
+
+
+def comprobar_ffmpeg_colgado(audio_data, fs, timeout_s=0.5):
+    """Retorna los segundos que tardó codificar_ogg_opus en rendirse, o None si no se rindió."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        falso = os.path.join(carpeta, "ffmpeg")
+        with open(falso, "w") as f:
+            f.write("#!/bin/sh\nexec sleep 60\n")
+        os.chmod(falso, 0o755)
+        path_original = os.environ.get("PATH", "")
+        os.environ["PATH"] = carpeta + os.pathsep + path_original
+        try:
+            inicio = time.perf_counter()
+            resultado = codificar_ogg_opus(audio_data, fs, timeout_s=timeout_s)
+            segundos = time.perf_counter() - inicio
+        finally:
+            os.environ["PATH"] = path_original
+    return segundos if resultado is None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+    fallos = 0
+
+    fs = 16000
+    t = np.arange(int(args.segundos * fs)) / fs
+    rng = np.random.default_rng(0)
+    audio_data = (3000 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 2 * t)) / 2
+                  + rng.normal(0, 100, len(t))).astype(np.int16)
+
+    for nombre, camino in (("archivos", camino_archivos), ("ogg", camino_ogg), ("wav", camino_wav)):
+        tiempos = []
+        try:
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                tamano = camino(audio_data, fs)
+                tiempos.append(time.perf_counter() - inicio)
+        except Exception as e:
+            print(f"{nombre:8s} | error: {e} (¿FFmpeg y pydub instalados?)")
+            continue
+        print(f"{nombre:8s} | mediana {statistics.median(tiempos) * 1000:7.1f} ms | "
+              f"mín {min(tiempos) * 1000:7.1f} ms | {tamano / 1024:.0f} KB para {args.segundos:.0f} s de audio")
+
+    if os.name == "nt":
+        print("FFmpeg colgado: comprobación omitida en Windows.")
+    else:
+        segundos = comprobar_ffmpeg_colgado(audio_data, fs)
+        if segundos is None or segundos > 2.0:
+            print("ERROR: codificar_ogg_opus no se rindió a tiempo con un FFmpeg colgado")
+            fallos += 1
+        else:
+            print(f"FFmpeg colgado: codificar_ogg_opus se rindió a los {segundos:.2f} s (timeout 0.5 s).")
+
+    print("OK" if not fallos else f"{fallos} comprobaciones fallidas")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
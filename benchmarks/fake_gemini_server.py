@@ -0,0 +1,116 @@
+# benchmarks/fake_gemini_server.py
+"""
+Servidor HTTP local que imita la API REST de Gemini (generateContent y
+streamGenerateContent con alt=sse), para probar sin red la latencia, los
+plazos, los reintentos y la cancelación del cliente asíncrono.
+
+Para usarlo con el asistente, poner en config.json
+"GEMINI_BASE_URL": "http://127.0.0.1:8765".
+
+Uso: python benchmarks/fake_gemini_server.py [--puerto 8765] [--latencia 1.0]
+     [--latencia-fragmento 0.3] [--tasa-errores 0.2]
+"""
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPUESTA = ("Claro, con mucho gusto. {pregunta} es una buena pregunta. "
+             "Lo más importante es beber agua a menudo y descansar bien. "
+             "Si tienes dudas, consulta siempre con tu médico.")
+
+
+class ManejadorGemini(BaseHTTPRequestHandler):
+    """Responde a POST /v1beta/models/<modelo>:generateContent y :streamGenerateContent."""
+
+    # HTTP/1.1 con codificación por trozos en el stream, como la API real
+    protocol_version = "HTTP/1.1"
+
+    # Se configuran en crear_servidor
+    latencia_s = 1.0
+    latencia_fragmento_s = 0.3
+    tasa_errores = 0.0
+    peticiones = 0
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _json(self, codigo, datos):
+        cuerpo = json.dumps(datos).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        try:
+            self.wfile.write(cuerpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El cliente abandonó la consulta (plazo agotado)
+
+    @staticmethod
+    def _candidato(texto):
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": texto}]}}]}
+
+    def do_POST(self):
+        type(self).peticiones += 1
+        coincidencia = re.match(r"^/v1beta/models/[^:/]+:(generateContent|streamGenerateContent)", self.path)
+        if not coincidencia:
+            return self._json(404, {"error": {"message": "ruta desconocida"}})
+        peticion = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if random.random() < self.tasa_errores:
+            return self._json(503, {"error": {"message": "servicio no disponible (simulado)"}})
+
+        pregunta = peticion["contents"][-1]["parts"][0]["text"].strip().rstrip("?¿").capitalize()
+        texto = RESPUESTA.format(pregunta=pregunta or "Esa")
+        time.sleep(self.latencia_s)
+        if coincidencia.group(1) == "generateContent":
+            return self._json(200, self._candidato(texto))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        palabras = texto.split(" ")
+        try:
+            for i in range(0, len(palabras), 6):
+                if i:
+                    time.sleep(self.latencia_fragmento_s)
+                fragmento = " ".join(palabras[i:i + 6]) + " "
+                evento = f"data: {json.dumps(self._candidato(fragmento))}\r\n\r\n".encode("utf-8")
+                self.wfile.write(f"{len(evento):X}\r\n".encode("ascii") + evento + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El cliente canceló la consulta
+
+
+def crear_servidor(puerto=8765, latencia_s=1.0, latencia_fragmento_s=0.3, tasa_errores=0.0):
+    """Crea el servidor (sin arrancarlo) con su propia clase de manejador."""
+    manejador = type("Manejador", (ManejadorGemini,), {
+        "latencia_s": latencia_s, "latencia_fragmento_s": latencia_fragmento_s,
+        "tasa_errores": tasa_errores, "peticiones": 0,
+    })
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=1.0, help="segundos antes del primer byte")
+    parser.add_argument("--latencia-fragmento", type=float, default=0.3, help="segundos entre fragmentos del stream")
+    parser.add_argument("--tasa-errores", type=float, default=0.0, help="fracción de peticiones que responden 503")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, args.latencia, args.latencia_fragmento, args.tasa_errores)
+    print(f"Gemini simulado escuchando en http://127.0.0.1:{args.puerto} (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# chat_history.py
+import threading
+
+
+def estimar_tokens(texto):
+    """Estimación barata de tokens (unos 4 caracteres por token en español)."""
+    return len(texto) // 4 + 1
+
+
+class HistorialChat:
+    """
+    Historial acotado de la conversación con Gemini.
+
+    Se guardan literalmente los últimos `max_turnos` turnos (pregunta y
+    respuesta) mientras quepan en `presupuesto_tokens`; los más antiguos se
+    resumen en un texto corto que se envía al principio de cada consulta. Así el
+    tamaño de cada petición no crece con los días de funcionamiento.
+
+    Args:
+        resumir: función (resumen_anterior, turnos) -> nuevo resumen, por
+            ejemplo una llamada barata al modelo. Se ejecuta en segundo plano; si
+            falla o no se indica, se usa un resumen extractivo local.
+        max_tokens_resumen: tamaño máximo del resumen.
+    """
+
+    def __init__(self, max_turnos=4, presupuesto_tokens=1500, resumir=None, max_tokens_resumen=300):
+        self.max_turnos = max_turnos
+        self.presupuesto_tokens = presupuesto_tokens
+        self.resumir = resumir
+        self.max_tokens_resumen = max_tokens_resumen
+        self.resumen = ""
+        self._turnos = []
+        self._lock = threading.Lock()
+        self._resumiendo = False
+        self._por_resumir = []
+
+    def contenido(self, pregunta):
+        """Mensajes a enviar al modelo para `pregunta`: resumen, últimos turnos y la pregunta."""
+        with self._lock:
+            mensajes = []
+            if self.resumen:
+                mensajes.append({"role": "user", "parts": [f"Resumen de nuestra conversación anterior: {self.resumen}"]})
+                mensajes.append({"role": "model", "parts": ["Entendido."]})
+            for pregunta_anterior, respuesta in self._turnos:
+                mensajes.append({"role": "user", "parts": [pregunta_anterior]})
+                mensajes.append({"role": "model", "parts": [respuesta]})
+        mensajes.append({"role": "user", "parts": [pregunta]})
+        return mensajes
+
+    def tokens(self):
+        """Tokens estimados que ocupa el historial (resumen más turnos literales)."""
+        with self._lock:
+            return self._tokens()
+
+    def _tokens(self):
+        return estimar_tokens(self.resumen) + sum(estimar_tokens(p) + estimar_tokens(r) for p, r in self._turnos)
+
+    def registrar(self, pregunta, respuesta):
+        """Añade un turno y pasa al resumen los más antiguos si se supera el límite."""
+        with self._lock:
+            self._turnos.append((pregunta, respuesta))
+            while len(self._turnos) > 1 and (len(self._turnos) > self.max_turnos or self._tokens() > self.presupuesto_tokens):
+                self._por_resumir.append(self._turnos.pop(0))
+            if not self._por_resumir or self._resumiendo:
+                return
+            self._resumiendo = True
+        threading.Thread(target=self._resumir_pendientes, name="resumen-chat", daemon=True).start()
+
+    def _resumir_pendientes(self):
+        while True:
+            with self._lock:
+                turnos, self._por_resumir = self._por_resumir, []
+                if not turnos:
+                    self._resumiendo = False
+                    return
+                resumen_anterior = self.resumen
+            nuevo = None
+            if self.resumir is not None:
+                try:
+                    nuevo = self.resumir(resumen_anterior, turnos)
+                except Exception as e:
+                    print(f"No se pudo resumir el historial del chat con el modelo: {e}")
+            if not nuevo:
+                nuevo = self._resumen_extractivo(resumen_anterior, turnos)
+            with self._lock:
+                self.resumen = self._recortar(nuevo.strip())
+
+    def _resumen_extractivo(self, resumen_anterior, turnos):
+        """Resumen local de respaldo: los temas preguntados, del más antiguo al más reciente."""
+        temas = "; ".join(pregunta.strip() for pregunta, _ in turnos)
+        return f"{resumen_anterior} El usuario también preguntó: {temas}." if resumen_anterior else f"El usuario preguntó: {temas}."
+
+    def _recortar(self, texto):
+        """Deja el resumen dentro de `max_tokens_resumen`, conservando lo más reciente."""
+        max_caracteres = self.max_tokens_resumen * 4
+        if len(texto) <= max_caracteres:
+            return texto
+        return "…" + texto[-max_caracteres:].split(" ", 1)[-1]
+
+    def olvidar(self):
+        """Empieza una conversación nueva."""
+        with self._lock:
+            self._turnos = []
+            self._por_resumir = []
+            self.resumen = ""
@@ -0,0 +1,89 @@
+# emergency_events.py
+import collections
+import datetime
+import queue
+import statistics
+import threading
+import time
+
+EventoEmergencia = collections.namedtuple("EventoEmergencia", ["fuente", "detalle", "t_deteccion", "fecha"])
+
+
+class CanalEmergencias:
+    """
+    Canal de eventos de emergencia (caída, botón de pánico) entre el hilo que
+    los detecta (el callback de MQTT) y el bucle principal.
+
+    Al publicar un evento se activa `activa` y se llama enseguida, en el hilo
+    que publica, a cada función suscrita: así la escucha, la voz y las consultas
+    a Gemini se interrumpen al momento, sin esperar a que el bucle principal
+    vuelva a mirar. El bucle toma los eventos con `siguiente()` y registra con
+    `registrar_alerta()` la latencia desde la detección hasta la alerta.
+    """
+
+    def __init__(self, max_latencias=100):
+        self.activa = threading.Event()
+        self.latencias = collections.deque(maxlen=max_latencias)
+        self._cola = queue.SimpleQueue()
+        self._oyentes = []
+        self._lock = threading.Lock()
+
+    def suscribir(self, oyente):
+        """Registra `oyente(evento)`; se llama en el hilo que publica, así que debe ser rápido."""
+        with self._lock:
+            self._oyentes.append(oyente)
+        return oyente
+
+    def desuscribir(self, oyente):
+        with self._lock:
+            if oyente in self._oyentes:
+                self._oyentes.remove(oyente)
+
+    def publicar(self, fuente, detalle=""):
+        """Encola un evento de emergencia y avisa a los suscriptores. Se puede llamar desde cualquier hilo."""
+        evento = EventoEmergencia(fuente, detalle, time.perf_counter(), datetime.datetime.now())
+        self._cola.put(evento)
+        self.activa.set()
+        with self._lock:
+            oyentes = list(self._oyentes)
+        for oyente in oyentes:
+            try:
+                oyente(evento)
+            except Exception as e:
+                print(f"Error al avisar de la emergencia a {getattr(oyente, '__name__', oyente)}: {e}")
+        return evento
+
+    def siguiente(self):
+        """Retorna el siguiente evento pendiente, o None si no hay ninguno. `activa` queda activa si quedan más."""
+        try:
+            evento = self._cola.get_nowait()
+        except queue.Empty:
+            evento = None
+        if self._cola.empty():
+            self.activa.clear()
+            # Un evento pudo publicarse entre empty() y clear()
+            if not self._cola.empty():
+                self.activa.set()
+        return evento
+
+    def descartar_pendientes(self):
+        """Descarta los eventos repetidos que llegaron mientras se atendía uno. Retorna cuántos."""
+        descartados = 0
+        while self.siguiente() is not None:
+            descartados += 1
+        return descartados
+
+    def registrar_alerta(self, evento):
+        """Anota la latencia desde la detección del evento hasta ahora (inicio de la alerta)."""
+        latencia = time.perf_counter() - evento.t_deteccion
+        self.latencias.append(latencia)
+        print(f"Emergencia ({evento.fuente}): alerta iniciada a los {latencia * 1000:.1f} ms de la detección.")
+        return latencia
+
+    def estadisticas(self):
+        """Mediana y máximo (en ms) de la latencia detección -> alerta."""
+        if not self.latencias:
+            return {"alertas": 0}
+        return {"alertas": len(self.latencias),
+                "mediana_ms": round(statistics.median(self.latencias) * 1000, 1),
+                "max_ms": round(max(self.latencias) * 1000, 1)}
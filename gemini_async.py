@@ -0,0 +1,181 @@
+# gemini_async.py
+import asyncio
+import json
+import random
+import threading
+
+import requests
+
+URL_BASE_GEMINI = "https://generativelanguage.googleapis.com"
+
+
+class ErrorGemini(Exception):
+    """Fallo al consultar Gemini."""
+
+
+class TiempoAgotado(ErrorGemini):
+    """La consulta superó su plazo (incluidos los reintentos)."""
+
+
+class ConsultaCancelada(ErrorGemini):
+    """La consulta se canceló (por ejemplo, por una emergencia)."""
+
+
+class _ErrorReintentable(ErrorGemini):
+    """Error transitorio (sin conexión, 429, 5xx): se puede volver a intentar."""
+
+
+_FIN = object()
+
+
+class ClienteGeminiAsync:
+    """
+    Cliente asíncrono de la API REST de Gemini (generateContent y streamGenerateContent).
+
+    Cada consulta tiene un plazo total `timeout_s` que incluye los reintentos;
+    los errores transitorios se reintentan hasta `reintentos` veces con espera
+    exponencial. Si se pasa `cancelar` (asyncio.Event) la consulta se abandona en
+    cuanto se activa. Las llamadas HTTP corren en hilos aparte, así que el bucle
+    de eventos sigue atendiendo otras tareas mientras Gemini piensa.
+
+    `url_base` permite apuntar a un servidor local de pruebas
+    (benchmarks/fake_gemini_server.py) para medir latencias y plazos sin red.
+    """
+
+    def __init__(self, api_key, modelo="gemini-1.5-flash", url_base=URL_BASE_GEMINI,
+                 timeout_s=15.0, reintentos=2, espera_reintento_s=0.5, instruccion_sistema=None):
+        self.api_key = api_key
+        self.modelo = modelo
+        self.url_base = url_base.rstrip("/")
+        self.timeout_s = timeout_s
+        self.reintentos = reintentos
+        self.espera_reintento_s = espera_reintento_s
+        self.instruccion_sistema = instruccion_sistema
+        self._sesion = requests.Session()  # Reutiliza la conexión TLS entre consultas
+
+    def _url(self, metodo):
+        return f"{self.url_base}/v1beta/models/{self.modelo}:{metodo}"
+
+    def _cuerpo(self, contenidos):
+        """Convierte mensajes {'role', 'parts': [str]} (los del HistorialChat) al formato REST."""
+        if isinstance(contenidos, str):
+            contenidos = [{"role": "user", "parts": [contenidos]}]
+        cuerpo = {"contents": [{"role": m["role"], "parts": [{"text": p} for p in m["parts"]]} for m in contenidos]}
+        if self.instruccion_sistema:
+            cuerpo["systemInstruction"] = {"parts": [{"text": self.instruccion_sistema}]}
+        return cuerpo
+
+    @staticmethod
+    def _texto(respuesta):
+        try:
+            return "".join(p.get("text", "") for p in respuesta["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError, TypeError):
+            return ""
+
+    @staticmethod
+    def _comprobar(r):
+        if r.status_code == 429 or r.status_code >= 500:
+            raise _ErrorReintentable(f"HTTP {r.status_code}")
+        if r.status_code != 200:
+            raise ErrorGemini(f"HTTP {r.status_code}: {r.text[:200]}")
+
+    def _post(self, contenidos, timeout):
+        try:
+            r = self._sesion.post(self._url("generateContent"), params={"key": self.api_key},
+                                  json=self._cuerpo(contenidos), timeout=timeout)
+        except requests.RequestException as e:
+            # Sin el mensaje original: incluye la URL con la clave de la API
+            raise _ErrorReintentable(f"error de conexión ({type(e).__name__})") from e
+        self._comprobar(r)
+        return self._texto(r.json())
+
+    def _leer_stream(self, contenidos, timeout, cola, loop, parar):
+        """Hilo lector de streamGenerateContent (SSE): pasa cada fragmento a la cola del bucle."""
+        try:
+            with self._sesion.post(self._url("streamGenerateContent"), params={"key": self.api_key, "alt": "sse"},
+                                   json=self._cuerpo(contenidos), timeout=timeout, stream=True) as r:
+                self._comprobar(r)
+                # chunk_size=None: entregar cada fragmento en cuanto llega, sin esperar a llenar un búfer
+                for linea in r.iter_lines(chunk_size=None, decode_unicode=True):
+                    if parar.is_set():
+                        return
+                    if linea and linea.startswith("data:"):
+                        texto = self._texto(json.loads(linea[5:]))
+                        if texto:
+                            loop.call_soon_threadsafe(cola.put_nowait, texto)
+            loop.call_soon_threadsafe(cola.put_nowait, _FIN)
+        except requests.RequestException as e:
+            loop.call_soon_threadsafe(cola.put_nowait, _ErrorReintentable(f"error de conexión ({type(e).__name__})"))
+        except Exception as e:
+            loop.call_soon_threadsafe(cola.put_nowait, e)
+
+    @staticmethod
+    async def _esperar(aguardable, timeout, cancelar):
+        """Espera `aguardable` como máximo `timeout` s, o hasta que se active `cancelar`."""
+        tarea = asyncio.ensure_future(aguardable)
+        esperas = {tarea}
+        if cancelar is not None:
+            esperas.add(asyncio.ensure_future(cancelar.wait()))
+        hechas, pendientes = await asyncio.wait(esperas, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED)
+        for t in pendientes:
+            t.cancel()
+        if tarea in hechas:
+            return tarea.result()
+        if cancelar is not None and cancelar.is_set():
+            raise ConsultaCancelada("consulta cancelada")
+        raise TiempoAgotado("plazo agotado")
+
+    async def _pausa_reintento(self, intento, fin, cancelar, error):
+        loop = asyncio.get_running_loop()
+        espera = self.espera_reintento_s * (2 ** intento) * random.uniform(0.8, 1.2)
+        if intento >= self.reintentos or loop.time() + espera >= fin:
+            raise error
+        print(f"Gemini: {error}; reintento {intento + 1}/{self.reintentos} en {espera:.1f} s.")
+        try:
+            await self._esperar(asyncio.sleep(espera), fin - loop.time(), cancelar)
+        except TiempoAgotado:
+            raise error
+
+    async def generar(self, contenidos, timeout_s=None, cancelar=None):
+        """Retorna el texto completo de la respuesta. Lanza TiempoAgotado, ConsultaCancelada o ErrorGemini."""
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + (timeout_s or self.timeout_s)
+        intento = 0
+        while True:
+            restante = fin - loop.time()
+            try:
+                return await self._esperar(asyncio.to_thread(self._post, contenidos, restante), restante, cancelar)
+            except _ErrorReintentable as e:
+                await self._pausa_reintento(intento, fin, cancelar, e)
+                intento += 1
+
+    async def generar_en_fragmentos(self, contenidos, timeout_s=None, cancelar=None):
+        """
+        Generador asíncrono de fragmentos de texto a medida que llegan.
+        Solo se reintenta si el error llega antes del primer fragmento.
+        """
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + (timeout_s or self.timeout_s)
+        intento = 0
+        recibido = False
+        while True:
+            cola = asyncio.Queue()
+            parar = threading.Event()
+            threading.Thread(target=self._leer_stream, name="gemini-stream", daemon=True,
+                             args=(contenidos, fin - loop.time(), cola, loop, parar)).start()
+            try:
+                while True:
+                    elemento = await self._esperar(cola.get(), fin - loop.time(), cancelar)
+                    if elemento is _FIN:
+                        return
+                    if isinstance(elemento, Exception):
+                        raise elemento
+                    recibido = True
+                    yield elemento
+            except _ErrorReintentable as e:
+                if recibido:
+                    raise ErrorGemini(f"respuesta cortada: {e}") from e
+                await self._pausa_reintento(intento, fin, cancelar, e)
+                intento += 1
+            finally:
+                parar.set()
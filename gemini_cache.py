@@ -0,0 +1,122 @@
+# gemini_cache.py
+import sqlite3
+import threading
+import time
+
+from text_utils import tokenizar
+
+# Palabras que no cambian el sentido de la pregunta ("oye, dime qué tiempo hace" == "qué tiempo hace")
+PALABRAS_VACIAS = {
+    "a", "al", "de", "del", "el", "la", "las", "los", "lo", "un", "una", "unos", "unas", "y", "o", "e",
+    "que", "por", "para", "con", "en", "es", "son",
+    "oye", "dime", "digame", "favor", "porfavor", "sabes", "puedes", "podrias", "quiero", "saber",
+    "gemini", "pregunta", "bueno", "pues", "hola", "gracias",
+}
+
+
+def normalizar_pregunta(pregunta):
+    """
+    Clave de la caché para una pregunta: sin acentos, mayúsculas, signos ni
+    palabras vacías ('¿Qué tiempo hace, por favor?' -> 'tiempo hace').
+    """
+    return " ".join(p for p in tokenizar(pregunta) if p not in PALABRAS_VACIAS)
+
+
+class CacheRespuestas:
+    """
+    Caché local en SQLite de las respuestas de Gemini, por pregunta normalizada.
+
+    Las entradas caducan a los `ttl_s` segundos y, si hay más de `max_entradas`,
+    se eliminan primero las usadas hace más tiempo (LRU). Las preguntas con menos
+    de `min_palabras` palabras significativas ("¿y mañana?") dependen del
+    contexto de la conversación y no se guardan.
+    """
+
+    def __init__(self, db_name="gemini_cache.db", ttl_s=24 * 3600, max_entradas=500, min_palabras=2):
+        self.db_name = db_name
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self.min_palabras = min_palabras
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_name, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    pregunta TEXT NOT NULL,
+                    respuesta TEXT NOT NULL,
+                    creada REAL NOT NULL,
+                    usada REAL NOT NULL,
+                    aciertos INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_respuestas_usada ON respuestas (usada);
+            """)
+
+    def _clave(self, pregunta):
+        clave = normalizar_pregunta(pregunta)
+        return clave if len(clave.split()) >= self.min_palabras else None
+
+    def obtener(self, pregunta):
+        """Retorna la respuesta guardada para la pregunta, o None si no está o caducó."""
+        clave = self._clave(pregunta)
+        if clave is None:
+            return None
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute("SELECT respuesta, creada FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or ahora - fila[1] > self.ttl_s:
+                if fila is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                self.fallos += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE respuestas SET usada = ?, aciertos = aciertos + 1 WHERE clave = ?", (ahora, clave))
+            self.aciertos += 1
+            return fila[0]
+
+    def guardar(self, pregunta, respuesta):
+        """Guarda la respuesta y desaloja las entradas menos usadas si se pasa del límite."""
+        clave = self._clave(pregunta)
+        if clave is None or not respuesta:
+            return False
+        ahora = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, pregunta, respuesta, creada, usada, aciertos) VALUES (?, ?, ?, ?, ?, 0)",
+                (clave, pregunta, respuesta, ahora, ahora))
+            self._conn.execute(
+                "DELETE FROM respuestas WHERE clave IN ("
+                "SELECT clave FROM respuestas ORDER BY usada DESC LIMIT -1 OFFSET ?)", (self.max_entradas,))
+        return True
+
+    def invalidar(self, pregunta):
+        """Elimina la respuesta guardada para la pregunta. Retorna True si existía."""
+        clave = self._clave(pregunta)
+        if clave is None:
+            return False
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,)).rowcount > 0
+
+    def limpiar(self):
+        """Vacía la caché."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM respuestas")
+
+    def tasa_aciertos(self):
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+
+    def estadisticas(self):
+        with self._lock:
+            entradas = self._conn.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        return {"aciertos": self.aciertos, "fallos": self.fallos,
+                "tasa_aciertos": round(self.tasa_aciertos(), 3), "entradas": entradas}
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
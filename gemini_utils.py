@@ -1,50 +1,167 @@
 # gemini_utils.py
-import google.generativeai as genai
-# No necesitamos 'import os' aquí ya que no leeremos variables de entorno ni manejaremos rutas de archivos.
+import threading
+from chat_history import HistorialChat
+from gemini_async import ClienteGeminiAsync, ConsultaCancelada, TiempoAgotado, URL_BASE_GEMINI
+from text_utils import DivisorFrases
+# El SDK de Gemini (lento de importar) y sus modelos se crean en el primer uso,
+# después de que main_test_reminders_sqlite.py llame a configurar_gemini() con la
+# clave de config.json. Así importar este módulo no cuesta nada en el arranque.
 
-# ¡Importante! 'genai.configure(api_key=YOUR_API_KEY)'
-# AHORA SE LLAMARÁ EN main_test_reminders_sqlite.py
-# después de cargar la clave desde config.json.
-# Por lo tanto, no se configura aquí directamente.
+# Instrucciones de estilo: se envían una sola vez como instrucción de sistema, no delante de cada pregunta
+INSTRUCCION_SISTEMA = "Responde en español y con un tono amable y de cuidado a personas adultas, tambien se algo breve con las respuestas."
 
-# Crear la instancia del modelo (fuera de la función para mantener la sesión)
-# El modelo se inicializa una vez que la API ha sido configurada globalmente.
-# Si genai.configure no se ha llamado aún, esto podría fallar.
-# Para asegurar que la inicialización del modelo es segura, la moveremos
-# para que se haga después de que la API esté configurada en main_test_reminders_sqlite.py,
-# o asegurarnos de que `model` y `chat_session` se manejen de una forma que permita la re-configuración.
+MODELO_GEMINI = "gemini-1.5-flash"
 
-# Una forma más robusta es inicializar el modelo y la sesión de chat dentro
-# de una función de inicialización que reciba la clave API, o que confíe
-# en que genai.configure() ya ha sido llamado.
+_api_key = None
+_modelo_resumen = None
+_lock_modelo = threading.Lock()
 
-# Vamos a mantener la inicialización aquí, asumiendo que main_test_reminders_sqlite.py
-# configurará genai *antes* de que este módulo sea realmente usado (es decir, antes de llamar a consultar_gemini).
-# Si hay problemas, podríamos necesitar una función 'init_gemini' aquí.
-model = genai.GenerativeModel("gemini-1.5-flash")
-chat_session = model.start_chat(history=[])
 
+def configurar_gemini(api_key):
+    """Guarda la clave de la API; el SDK se configura al crear el primer modelo."""
+    global _api_key, _modelo_resumen
+    _api_key = api_key
+    _modelo_resumen = None
 
-def consultar_gemini(pregunta):
+
+def _modelo():
+    """Modelo del SDK (sin instrucciones de estilo) para resumir el historial, creado en el primer uso."""
+    global _modelo_resumen
+    with _lock_modelo:
+        if _modelo_resumen is None:
+            import google.generativeai as genai
+            genai.configure(api_key=_api_key)
+            _modelo_resumen = genai.GenerativeModel(MODELO_GEMINI)
+        return _modelo_resumen
+
+
+def resumir_turnos(resumen_anterior, turnos):
+    """Resume con el modelo el resumen anterior y los turnos que salen del historial literal."""
+    conversacion = "\n".join(f"Usuario: {p}\nAsistente: {r}" for p, r in turnos)
+    prompt = ("Resume en español, en menos de 80 palabras, los datos importantes sobre el usuario y los temas "
+              f"de esta conversación.\nResumen previo: {resumen_anterior or 'ninguno'}\n{conversacion}")
+    return _modelo().generate_content(prompt).text
+
+
+# Últimos turnos literales más un resumen de los anteriores (ver configurar_historial)
+historial = HistorialChat(resumir=resumir_turnos)
+
+
+def configurar_historial(max_turnos, presupuesto_tokens):
+    """Cambia los límites del historial del chat (desde config.json)."""
+    historial.max_turnos = max_turnos
+    historial.presupuesto_tokens = presupuesto_tokens
+
+
+# Cliente asíncrono con plazos, reintentos y cancelación (ver configurar_cliente_async)
+cliente_async = None
+
+
+def configurar_cliente_async(api_key, url_base=URL_BASE_GEMINI, timeout_s=15.0, reintentos=2):
+    """Crea el cliente asíncrono; `url_base` puede apuntar al servidor simulado de benchmarks/."""
+    global cliente_async
+    cliente_async = ClienteGeminiAsync(api_key, modelo=MODELO_GEMINI, url_base=url_base, timeout_s=timeout_s,
+                                       reintentos=reintentos, instruccion_sistema=INSTRUCCION_SISTEMA)
+
+
+MENSAJE_SIN_RESPUESTA = "Lo siento, no pude obtener una respuesta clara de Gemini."
+MENSAJE_PLAZO_AGOTADO = "Lo siento, Gemini está tardando demasiado en responder. Inténtalo de nuevo más tarde."
+MENSAJE_ERROR = "Lo siento, hubo un problema al consultar Gemini."
+
+
+def _desde_cache(pregunta, cache):
+    """Respuesta guardada en `cache` (CacheRespuestas) para la pregunta, o None. Un acierto entra al historial."""
+    if cache is None:
+        return None
+    respuesta_guardada = cache.obtener(pregunta)
+    if respuesta_guardada:
+        print(f"Respuesta de Gemini tomada de la caché local (tasa de aciertos {cache.tasa_aciertos():.0%}).")
+        historial.registrar(pregunta, respuesta_guardada)
+    return respuesta_guardada
+
+
+def _registrar_respuesta(pregunta, respuesta, cache):
+    """Guarda una respuesta correcta (nunca los mensajes de error) en el historial y en la caché."""
+    historial.registrar(pregunta, respuesta)
+    if cache is not None:
+        cache.guardar(pregunta, respuesta)
+
+
+def _mensaje_error(e):
+    """Registra el error de la consulta y retorna la frase a decir al usuario."""
+    if isinstance(e, TiempoAgotado):
+        print("Error al consultar Gemini: se agotó el plazo de respuesta.")
+        return MENSAJE_PLAZO_AGOTADO
+    print(f"Error al consultar Gemini: {e}")
+    return MENSAJE_ERROR
+
+
+async def consultar_gemini_async(pregunta, cache=None, cancelar=None):
     """
-    Envía una pregunta a la API de Gemini y devuelve la respuesta.
-    Mantiene el contexto del chat.
-    Asume que genai.configure() ya ha sido llamado en el script principal
-    con la clave API correcta.
+    Envía una pregunta a Gemini y devuelve la respuesta, manteniendo el contexto
+    del chat con un historial acotado (últimos turnos y resumen). No bloquea el
+    bucle de eventos, tiene un plazo máximo y reintentos, y se abandona si se
+    activa `cancelar` (asyncio.Event); en ese caso lanza ConsultaCancelada.
+    Asume que configurar_cliente_async() ya ha sido llamado.
+
+    Si se pasa `cache` (CacheRespuestas), se consulta antes de llamar a la API
+    y se guardan en ella las respuestas correctas (nunca los mensajes de error).
     """
+    respuesta_guardada = _desde_cache(pregunta, cache)
+    if respuesta_guardada:
+        return respuesta_guardada
+
     try:
-        # Prefijo para indicar que la respuesta debe ser en español y amable
-        prefijo = "Responde en español y con un tono amable y de cuidado a personas adultas, tambien se algo breve con las respuestas: "
-        pregunta_modificada = prefijo + pregunta
-        
-        # Enviar el mensaje y obtener la respuesta
-        respuesta = chat_session.send_message(pregunta_modificada)
-        
-        if hasattr(respuesta, 'text'):
-            return respuesta.text 
-        else:
-            return "Lo siento, no pude obtener una respuesta clara de Gemini."
+        texto = await cliente_async.generar(historial.contenido(pregunta), cancelar=cancelar)
+    except ConsultaCancelada:
+        raise
+    except Exception as e:
+        return _mensaje_error(e)
 
+    if not texto:
+        return MENSAJE_SIN_RESPUESTA
+    _registrar_respuesta(pregunta, texto, cache)
+    return texto
+
+
+async def consultar_gemini_en_frases_async(pregunta, cache=None, cancelar=None):
+    """
+    Igual que consultar_gemini_async, pero es un generador asíncrono que entrega
+    la respuesta frase a frase a medida que Gemini la va escribiendo, para
+    empezar a hablar antes de tenerla completa. La respuesta completa se guarda
+    en `cache` al terminar sin errores.
+    """
+    divisor = DivisorFrases()
+    respuesta_guardada = _desde_cache(pregunta, cache)
+    if respuesta_guardada:
+        for frase in divisor.agregar(respuesta_guardada):
+            yield frase
+        resto = divisor.terminar()
+        if resto:
+            yield resto
+        return
+
+    partes = []
+    hubo_frases = False
+    try:
+        async for texto in cliente_async.generar_en_fragmentos(historial.contenido(pregunta), cancelar=cancelar):
+            partes.append(texto)
+            for frase in divisor.agregar(texto):
+                hubo_frases = True
+                yield frase
+        resto = divisor.terminar()
+        if resto:
+            hubo_frases = True
+            yield resto
+    except ConsultaCancelada:
+        raise
     except Exception as e:
-        print(f"Error al consultar Gemini: {e}")
-        return "Lo siento, hubo un problema al consultar Gemini."
\ No newline at end of file
+        mensaje = _mensaje_error(e)
+        if not hubo_frases:
+            yield mensaje
+        return
+
+    if not hubo_frases:
+        yield MENSAJE_SIN_RESPUESTA
+        return
+    _registrar_respuesta(pregunta, "".join(partes), cache)
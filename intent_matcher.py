@@ -0,0 +1,88 @@
+# intent_matcher.py
+from collections import deque, namedtuple
+
+from text_utils import tokenizar
+
+# intencion: nombre del comando; puntuacion: fracción de palabras del texto cubiertas
+# por la variante (0-1]; variante: la variante normalizada que coincidió.
+Coincidencia = namedtuple("Coincidencia", ["intencion", "puntuacion", "variante"])
+
+
+class _Nodo:
+    __slots__ = ("hijos", "fallo", "salidas")
+
+    def __init__(self):
+        self.hijos = {}
+        self.fallo = None
+        self.salidas = []  # (longitud_en_palabras, orden_intencion, intencion, variante)
+
+
+class IntentMatcher:
+    """
+    Buscador de intenciones precompilado (autómata Aho-Corasick sobre palabras).
+
+    Todas las variantes de todos los comandos se normalizan (minúsculas, sin
+    acentos ni puntuación) y se compilan una sola vez. `buscar` recorre el texto
+    en una sola pasada, encuentra todas las variantes presentes como palabras
+    completas ('una' no coincide dentro de 'alguna') y elige la mejor:
+    la variante más larga, luego la que cubre más texto y, si aún empatan,
+    la intención declarada primero.
+    """
+
+    def __init__(self, comandos):
+        self._raiz = _Nodo()
+        self.num_variantes = 0
+        for orden, (intencion, variantes) in enumerate(comandos.items()):
+            for variante in variantes:
+                palabras = tokenizar(variante)
+                if palabras:
+                    self._insertar(palabras, orden, intencion)
+        self._construir_fallos()
+
+    def _insertar(self, palabras, orden, intencion):
+        nodo = self._raiz
+        for palabra in palabras:
+            nodo = nodo.hijos.setdefault(palabra, _Nodo())
+        variante = " ".join(palabras)
+        if not any(salida[2] == intencion for salida in nodo.salidas):
+            nodo.salidas.append((len(palabras), orden, intencion, variante))
+            self.num_variantes += 1
+
+    def _construir_fallos(self):
+        self._raiz.fallo = self._raiz
+        pendientes = deque()
+        for hijo in self._raiz.hijos.values():
+            hijo.fallo = self._raiz
+            pendientes.append(hijo)
+        while pendientes:
+            nodo = pendientes.popleft()
+            for palabra, hijo in nodo.hijos.items():
+                fallo = nodo.fallo
+                while palabra not in fallo.hijos and fallo is not self._raiz:
+                    fallo = fallo.fallo
+                hijo.fallo = fallo.hijos[palabra] if palabra in fallo.hijos and fallo.hijos[palabra] is not hijo else self._raiz
+                # Heredar las coincidencias de los sufijos para no recorrer la cadena de fallos al buscar
+                hijo.salidas = hijo.salidas + hijo.fallo.salidas
+                pendientes.append(hijo)
+
+    def buscar(self, texto):
+        """Retorna la Coincidencia de la mejor intención presente en `texto`, o None."""
+        palabras = tokenizar(texto)
+        if not palabras:
+            return None
+
+        mejor = None
+        nodo = self._raiz
+        for palabra in palabras:
+            while palabra not in nodo.hijos and nodo is not self._raiz:
+                nodo = nodo.fallo
+            nodo = nodo.hijos.get(palabra, self._raiz)
+            for longitud, orden, intencion, variante in nodo.salidas:
+                clave = (longitud, -orden)
+                if mejor is None or clave > mejor[0]:
+                    mejor = (clave, intencion, variante, longitud)
+
+        if mejor is None:
+            return None
+        _, intencion, variante, longitud = mejor
+        return Coincidencia(intencion, longitud / len(palabras), variante)
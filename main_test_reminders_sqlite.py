@@ -1,25 +1,38 @@
+import time
+T_INICIO_PROCESO = time.perf_counter()  # Referencia del perfil de arranque
+
 import os
-import pygame
 import json # <--- ¡Añade esta importación para leer JSON!
 import sys # <--- Añade esta importación para sys.exit() si es necesario en el futuro
 
 # Asegúrate de que estas importaciones son correctas según tus archivos
-from mqtt_utils_A import setup_mqtt, publish_lights_state, last_two_temperatures, fall_detected_flag
+import mqtt_utils_A
+from mqtt_utils_A import setup_mqtt, publish_lights_state, series_sensores, TOPIC_TEMPERATURA, emergencias, sondear_broker, esperar_broker
 from voice_recognition import setup_vosk
-from audio_processing import setup_pyaudio, escuchar_comando, grabar_mensaje_voz, convertir_a_ogg_opus
-from gemini_utils import consultar_gemini # Esta función ahora asume que genai.configure ya fue llamado
-import time
+from audio_processing import setup_captura, escuchar_comando, grabar_mensaje_voz_pcm, codificar_ogg_opus, codificar_wav
+# Las integraciones pesadas (pygame, python-telegram-bot, pywhatkit, SDK de Gemini, pydub)
+# se importan en su primer uso, no aquí: el micrófono queda activo antes tras un reinicio
+from gemini_utils import consultar_gemini_async, consultar_gemini_en_frases_async, configurar_historial, configurar_cliente_async, configurar_gemini
+from gemini_cache import CacheRespuestas
+from gemini_async import ConsultaCancelada, URL_BASE_GEMINI
+from tts_cache import TTSCache
+from tts_engines import MotorConRespaldo, crear_motor
+from speech_queue import ColaVoz, PRIORIDAD_EMERGENCIA, PRIORIDAD_RECORDATORIO, PRIORIDAD_NORMAL
+from intent_matcher import IntentMatcher
+from vad import CompuertaVAD
+from reminder_scheduler import ProgramadorRecordatorios
+from reminder_store import ReminderStore
+from time_parser import interpretar_tiempo, RECURRENCIA_DIARIA, RECURRENCIA_SEMANAL, RECURRENCIA_UNA_VEZ
+from startup_profile import PerfilArranque, GrafoArranque
 import datetime
+import collections
 import threading
 import requests
 import asyncio
-from telegram import Bot
-from telegram.error import TelegramError
-import pywhatkit
 import subprocess
-import re
-import sqlite3
-import google.generativeai as genai # <--- ¡Añade esta importación para configurar Gemini aquí!
+
+perfil_arranque = PerfilArranque(T_INICIO_PROCESO)
+perfil_arranque.registrar("importaciones", T_INICIO_PROCESO, time.perf_counter())
 
 # --- CARGAR CONFIGURACIÓN DESDE ARCHIVO JSON ---
 CONFIG_FILE = "config.json"
@@ -40,7 +53,33 @@ except FileNotFoundError:
         "WHATSAPP_CAREGIVER_NUMBER": "",
         "GEMINI_API_KEY": "",
         "CUSTOM_COMMANDS": {},
-        "SYSTEM_STARTUP_SCRIPT": "Inicio.bat"
+        "SYSTEM_STARTUP_SCRIPT": "Inicio.bat",
+        "TTS_CACHE_DIR": "CacheVoz",
+        "TTS_CACHE_MAX_MB": 50,
+        "TTS_ENGINE": "gtts",
+        "TTS_FALLBACK_ENGINES": ["espeak", "pyttsx3"],
+        "TTS_TIMEOUT_SECONDS": 3,
+        "EARLY_INTENT_DISPATCH": False,
+        "VAD_ENABLED": True,
+        "AUDIO_BUFFER_SECONDS": 30,
+        "VOICE_MESSAGE_TRAILING_SILENCE_SECONDS": 2.0,
+        "REMINDER_GRACE_MINUTES": 10,
+        "GEMINI_CACHE_ENABLED": True,
+        "GEMINI_CACHE_TTL_HOURS": 24,
+        "GEMINI_CACHE_MAX_ENTRIES": 500,
+        "GEMINI_STREAMING": True,
+        "GEMINI_HISTORY_TURNS": 4,
+        "GEMINI_HISTORY_TOKEN_BUDGET": 1500,
+        "GEMINI_BASE_URL": "https://generativelanguage.googleapis.com",
+        "GEMINI_TIMEOUT_SECONDS": 15,
+        "GEMINI_MAX_RETRIES": 2,
+        "MQTT_STARTUP_TIMEOUT_SECONDS": 15,
+        "MQTT_BROKERS": [{"host": "192.168.1.12", "port": 1883}],
+        "MQTT_KEEPALIVE_SECONDS": 60,
+        "MQTT_RECONNECT_MAX_SECONDS": 10,
+        "SENSOR_DB_ENABLED": True,
+        "SENSOR_DB_FLUSH_SECONDS": 30,
+        "TEMPERATURE_TREND_MINUTES": 60
     }
 except json.JSONDecodeError as e:
     print(f"Error al parsear el archivo de configuración JSON: {e}")
@@ -48,23 +87,44 @@ except json.JSONDecodeError as e:
 
 # --- CONFIGURACIÓN DE RUTAS (ahora algunas se obtienen de config) ---
 RESPONSES_DIR = "Respuestas"
-TEMP_AUDIO_DIR = "TempAudio"
 SYSTEM_STARTUP_SCRIPT = config.get("SYSTEM_STARTUP_SCRIPT", "Inicio.bat") # Obtener de config, con fallback
+# Plazo máximo para que el broker acepte conexiones después de lanzar el script de inicio
+MQTT_STARTUP_TIMEOUT_SECONDS = float(config.get("MQTT_STARTUP_TIMEOUT_SECONDS", 15))
+# Brokers por orden de preferencia: si uno cae, el cliente prueba el siguiente al reintentar
+mqtt_utils_A.configurar_brokers(config.get("MQTT_BROKERS") or [{"host": mqtt_utils_A.BROKER_ADDRESS, "port": mqtt_utils_A.BROKER_PORT}],
+                                keepalive=int(config.get("MQTT_KEEPALIVE_SECONDS", 60)),
+                                espera_max_s=float(config.get("MQTT_RECONNECT_MAX_SECONDS", 10)))
 
 if not os.path.exists(RESPONSES_DIR):
     os.makedirs(RESPONSES_DIR)
-if not os.path.exists(TEMP_AUDIO_DIR):
-    os.makedirs(TEMP_AUDIO_DIR)
 
 current_state = "OFF"
 
+# --- CACHÉ DE VOZ SINTETIZADA (frases repetidas se reproducen sin llamar a gTTS) ---
+tts_cache = TTSCache(config.get("TTS_CACHE_DIR", "CacheVoz"),
+                     max_bytes=int(config.get("TTS_CACHE_MAX_MB", 50)) * 1024 * 1024)
+
+# --- MOTOR DE VOZ (principal de config.json y motores locales de respaldo sin red) ---
+TTS_ENGINE = config.get("TTS_ENGINE", "gtts")
+TTS_FALLBACK_ENGINES = config.get("TTS_FALLBACK_ENGINES", ["espeak", "pyttsx3"])
+motor_voz = MotorConRespaldo([crear_motor(nombre) for nombre in [TTS_ENGINE] + [m for m in TTS_FALLBACK_ENGINES if m != TTS_ENGINE]],
+                             timeout=float(config.get("TTS_TIMEOUT_SECONDS", 3)))
+
 # --- CONFIGURACIÓN DE TELEGRAM (ahora usando valores de config) ---
 TELEGRAM_BOT_TOKEN = config.get("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = config.get("TELEGRAM_CHAT_ID")
-# Inicializa el bot solo si el token está presente
-telegram_bot = Bot(token=TELEGRAM_BOT_TOKEN) if TELEGRAM_BOT_TOKEN else None
-if not telegram_bot:
+if not TELEGRAM_BOT_TOKEN:
     print("Advertencia: TELEGRAM_BOT_TOKEN no configurado. Las funciones de Telegram no estarán disponibles.")
+# El bot se crea en el primer envío (ver obtener_bot_telegram)
+telegram_bot = None
+
+def obtener_bot_telegram():
+    """Retorna el bot de Telegram, creándolo (e importando la librería) en el primer uso."""
+    global telegram_bot
+    if telegram_bot is None and TELEGRAM_BOT_TOKEN:
+        from telegram import Bot
+        telegram_bot = Bot(token=TELEGRAM_BOT_TOKEN)
+    return telegram_bot
 
 # --- CONFIGURACIÓN DE WHATSAPP (ahora usando valores de config) ---
 WHATSAPP_CAREGIVER_NUMBER = config.get("WHATSAPP_CAREGIVER_NUMBER") 
@@ -74,49 +134,183 @@ if not WHATSAPP_CAREGIVER_NUMBER:
 # --- CONFIGURACIÓN DE GEMINI (¡AHORA AQUÍ!) ---
 GEMINI_API_KEY = config.get("GEMINI_API_KEY")
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+    configurar_gemini(GEMINI_API_KEY)
+    # Cliente asíncrono: la espera no bloquea el bucle principal y se puede cancelar
+    configurar_cliente_async(GEMINI_API_KEY, config.get("GEMINI_BASE_URL") or URL_BASE_GEMINI,
+                             float(config.get("GEMINI_TIMEOUT_SECONDS", 15)), int(config.get("GEMINI_MAX_RETRIES", 2)))
     print("API de Gemini configurada exitosamente.")
 else:
     print("Advertencia: GEMINI_API_KEY no configurada en config.json. Las funciones de Gemini no funcionarán.")
-
-# --- CONFIGURACIÓN DE BASE DE DATOS SQLite ---
-DB_NAME = "reminders.db"
-
-# --- FUNCIONES DE ASISTENTE ---
-
-def responder_con_voz(texto):
-    """Convierte texto a voz y lo reproduce usando gTTS y pygame."""
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    archivo_respuesta = os.path.join(RESPONSES_DIR, f"respuesta_{timestamp}.mp3")
-
+# Solo los últimos turnos van literales; los anteriores se resumen
+configurar_historial(int(config.get("GEMINI_HISTORY_TURNS", 4)), int(config.get("GEMINI_HISTORY_TOKEN_BUDGET", 1500)))
+
+# Caché local de respuestas: las preguntas repetidas no vuelven a pasar por la API
+cache_gemini = CacheRespuestas(
+    "gemini_cache.db",
+    ttl_s=float(config.get("GEMINI_CACHE_TTL_HOURS", 24)) * 3600,
+    max_entradas=int(config.get("GEMINI_CACHE_MAX_ENTRIES", 500)),
+) if config.get("GEMINI_CACHE_ENABLED", True) else None
+# Última pregunta respondida, para poder olvidar su respuesta si era incorrecta
+ultima_pregunta_gemini = None
+# Tiempo desde que termina la pregunta hasta que empieza a sonar la respuesta
+tiempos_primer_audio_gemini = collections.deque(maxlen=50)
+
+async def responder_gemini(pregunta, en_streaming=True):
+    """
+    Consulta a Gemini sin bloquear el bucle y dice la respuesta. En streaming se
+    dice frase a frase mientras se genera (cada frase se encola y se empieza a
+    sintetizar en cuanto está completa) y se informa del tiempo hasta el primer
+    audio. Si llega una emergencia, la consulta y lo que falte por decir se
+    abandonan al momento. Retorna True si hubo respuesta.
+    """
+    t_pregunta = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    cancelar = asyncio.Event()
+
+    def al_detectar_emergencia(evento):
+        # Llega desde el hilo de MQTT: se pasa al bucle de eventos sin esperar
+        loop.call_soon_threadsafe(cancelar.set)
+
+    emergencias.suscribir(al_detectar_emergencia)
+    if emergencias.activa.is_set():
+        cancelar.set()
+    solicitudes = []
     try:
-        from gtts import gTTS
-        tts = gTTS(text=texto, lang='es')
-        tts.save(archivo_respuesta)
+        if en_streaming:
+            async for frase in consultar_gemini_en_frases_async(pregunta, cache=cache_gemini, cancelar=cancelar):
+                print(f"Gemini (frase {len(solicitudes) + 1}): {frase}")
+                solicitudes.append(responder_con_voz(frase, precargar=True))
+        else:
+            respuesta = await consultar_gemini_async(pregunta, cache=cache_gemini, cancelar=cancelar)
+            print(f"Gemini respondió: {respuesta}")
+            solicitudes.append(responder_con_voz(respuesta))
+    except ConsultaCancelada:
+        print("Consulta a Gemini cancelada por una alerta de emergencia.")
+        for solicitud in solicitudes:
+            solicitud.cancelar()
+        cola_voz.interrumpir()
+        return False
+    finally:
+        emergencias.desuscribir(al_detectar_emergencia)
+    if not solicitudes:
+        return False
+    t_completa = time.perf_counter() - t_pregunta
+    num_frases = len(solicitudes)
 
-        if not pygame.mixer.get_init():
-            pygame.mixer.init()
-            
-        pygame.mixer.music.load(archivo_respuesta)
-        pygame.mixer.music.play()
+    def al_empezar_primera(solicitud):
+        # Desde el hilo de la cola de voz: el bucle de comandos no espera a que suene
+        tiempo = solicitud.t_inicio - t_pregunta
+        tiempos_primer_audio_gemini.append(tiempo)
+        print(f"Gemini: primer audio a los {tiempo * 1000:.0f} ms de la pregunta "
+              f"({num_frases} frases, respuesta completa a los {t_completa * 1000:.0f} ms).")
 
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+    solicitudes[0].al_empezar(al_empezar_primera)
+    return True
 
-    except Exception as e:
-        print(f"Error al reproducir el sonido: {e}")
+# --- CONFIGURACIÓN DE BASE DE DATOS SQLite ---
+DB_NAME = "reminders.db"
+# Una conexión por hilo, en modo WAL, con migraciones de esquema
+reminder_store = ReminderStore(DB_NAME)
 
-    finally:
-        if pygame.mixer.get_init() and pygame.mixer.music.get_busy() == False:
-            pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
-            time.sleep(0.1)
+# --- FUNCIONES DE ASISTENTE ---
 
-        try:
-            if os.path.exists(archivo_respuesta):
-                os.remove(archivo_respuesta)
-        except Exception as e:
-            print(f"Error al eliminar el archivo de audio: {e}")
+# Frases fijas que el asistente puede decir. Se sintetizan al arrancar para que
+# suenen sin latencia (y sin red) desde la caché de voz.
+FRASES_ESTATICAS = [
+    "Luces encendidas.",
+    "Luces apagadas.",
+    "Consultando temperatura",
+    "Lo siento, aún no tengo datos de temperatura recientes.",
+    "Lo siento, la clave de la API de Gemini no está configurada. No puedo responder preguntas.",
+    "De acuerdo, ¿cuál es tu pregunta?",
+    "Lo siento, no he capturado tu pregunta. Por favor, inténtalo de nuevo.",
+    "Lo siento, no pude obtener una respuesta clara de Gemini.",
+    "Lo siento, hubo un problema al consultar a Gemini. Por favor, inténtalo de nuevo más tarde.",
+    "Lo siento, hubo un problema al consultar Gemini.",
+    "Lo siento, Gemini está tardando demasiado en responder. Inténtalo de nuevo más tarde.",
+    "De acuerdo, olvidé esa respuesta. La próxima vez volveré a preguntar.",
+    "No tengo ninguna respuesta guardada que olvidar.",
+    "Lo siento, no tengo configurado ningún método para enviar mensajes al cuidador.",
+    "De acuerdo. ¿Qué mensaje quieres enviar al cuidador? Por favor, di tu mensaje ahora.",
+    "Voy a enviar el siguiente mensaje al cuidador:",
+    "¿Quieres enviar este mensaje? Di 'sí' o 'no' en los próximos 7 segundos.",
+    "¡Mensaje enviado correctamente a Telegram!",
+    "Hubo un error al enviar el mensaje a Telegram.",
+    "No pude enviar el mensaje a Telegram porque no está configurado.",
+    "No pude enviar el mensaje a WhatsApp porque no está configurado.",
+    "No pude enviar el mensaje al cuidador.",
+    "Envío de mensaje cancelado.",
+    "No he capturado ningún mensaje. Intenta de nuevo.",
+    "De acuerdo. ¿Qué te debo recordar y a qué hora? Por ejemplo, 'recordar tomar pastillas a las ocho de la noche'.",
+    "Lo siento, no pude guardar el recordatorio en la base de datos.",
+    "No pude entender la hora del recordatorio. Por favor, intenta de nuevo diciendo la hora claramente.",
+    "Esa hora ya pasó. ¿Quieres que lo programe para mañana a la misma hora? Di 'sí' o 'no'.",
+    "De acuerdo, no guardé el recordatorio.",
+    "No he capturado el recordatorio. Por favor, inténtalo de nuevo.",
+    "No tienes ningún recordatorio programado.",
+    "De acuerdo. ¿Qué recordatorio quieres eliminar? Di el número o una palabra clave del mensaje.",
+    "Recordatorio eliminado.",
+    "De acuerdo, no eliminé ningún recordatorio.",
+    "¿Quieres escuchar más recordatorios? Di 'sí' o 'no'.",
+    "Tienes un recordatorio.",
+    "No encontré ningún recordatorio con esa descripción o número para eliminar.",
+    "No he capturado la descripción del recordatorio a eliminar. Por favor, inténtalo de nuevo.",
+    "Lo siento, no pude encontrar el script para encender el sistema. Por favor, verifique la instalación.",
+    "Intentando encender el servidor de comunicación. Esto puede tardar unos segundos.",
+    "El servidor de comunicación está activo. Conectando al sistema.",
+    "El servidor de comunicación está activo, pero no pude conectar con el sistema. Revise los errores.",
+    "El servidor de comunicación está activo, pero todavía no pude conectar con el sistema. Seguiré intentándolo.",
+    "El sistema ya está conectado.",
+    "Ya estoy encendiendo el sistema, un momento.",
+    "El servidor de comunicación no se pudo iniciar. Por favor, reintente o revise los errores.",
+    "Lo siento, hubo un problema al ejecutar el script de inicio del sistema.",
+    "Sistema de asistencia iniciado y listo para recibir comandos.",
+    "Sistema de asistencia iniciado, pero con problemas de comunicación. Algunas funciones podrían no estar disponibles.",
+    "¡Alerta! Se ha detectado una emergencia. Activando protocolo de seguridad.",
+    "¿Puedes decirme algo más sobre lo que pasó? Si quieres, puedes grabar un mensaje de voz para el cuidador.",
+    "Di 'grabar mensaje' para empezar, o 'cancelar' para continuar sin mensaje de voz.",
+    "Por favor, di tu mensaje de voz después de la señal. Tienes 15 segundos.",
+    "Mensaje de voz adicional enviado al cuidador.",
+    "No pude enviar el mensaje de voz adicional. Se envió una alerta de texto.",
+    "No pude grabar tu mensaje. Ya se envió una alerta de texto.",
+    "Entendido. Se ha enviado la alerta de emergencia principal. Permaneceré atento.",
+    "Cerrando programa.",
+    "Lo siento, se ha producido un error inesperado y necesito reiniciar.",
+]
+
+def precalentar_cache_voz():
+    """Sintetiza todas las frases fijas que aún no están en la caché de voz."""
+    motor_voz.precalentar(tts_cache, FRASES_ESTATICAS, 'es')
+
+def preparar_audio_voz(texto):
+    """Retorna la ruta del audio de la frase, desde la caché o sintetizándola."""
+    archivo_respuesta, _ = motor_voz.sintetizar(tts_cache, texto, 'es')
+    return archivo_respuesta
+
+# Hilo de salida de audio: reproduce las frases por prioridad sin bloquear al que habla
+cola_voz = ColaVoz(preparar_audio_voz)
+
+# Captura del micrófono y lector del reconocedor de comandos (se crean en main_async)
+captura_audio = None
+lector_comandos = None
+
+def responder_con_voz(texto, prioridad=PRIORIDAD_NORMAL, esperar=False, precargar=False):
+    """
+    Encola el texto para decirlo en voz alta y retorna su SolicitudVoz.
+    Si la frase ya se sintetizó antes, el audio se toma de la caché de voz; si no,
+    se sintetiza con el motor configurado, pasando a un motor local si el principal
+    falla o tarda demasiado.
+    Con esperar=True bloquea hasta que la frase termina de sonar (útil antes de
+    escuchar al usuario, para no grabar la propia voz del asistente).
+    Con precargar=True la síntesis empieza ya aunque haya otras frases delante.
+    """
+    solicitud = cola_voz.decir(texto, prioridad, precargar=precargar)
+    if esperar:
+        solicitud.esperar()
+        # Lo capturado mientras hablaba el asistente no es la respuesta del usuario
+        if lector_comandos is not None:
+            lector_comandos.saltar_al_final()
+    return solicitud
 
 def vaciar_carpeta_respuestas():
     """Elimina todos los archivos en la carpeta 'Respuestas' cada 5 minutos."""
@@ -133,15 +327,29 @@ def vaciar_carpeta_respuestas():
 
 async def enviar_mensaje_voz_telegram(chat_id, audio_filepath, caption="Mensaje de voz del sistema de asistencia."):
     """
-    Envía un archivo de audio como mensaje de voz a un chat de Telegram.
+    Envía un audio OGG/Opus como mensaje de voz a un chat de Telegram.
     Ideal para mensajes de emergencia donde el tono es importante.
+    `audio_filepath` puede ser la ruta de un archivo o un objeto en memoria
+    (io.BytesIO, p. ej. el que retorna codificar_ogg_opus). Si no es OGG (el WAV
+    de respaldo de codificar_wav) se envía como archivo de audio.
     """
+    telegram_bot = obtener_bot_telegram()
     if not telegram_bot:
         print("Error: Bot de Telegram no inicializado. No se pudo enviar mensaje de voz.")
         return False
-    try:
-        with open(audio_filepath, 'rb') as audio_file:
+    from telegram.error import TelegramError
+    async def enviar(audio_file):
+        if str(getattr(audio_file, "name", "")).endswith(".ogg"):
             await telegram_bot.send_voice(chat_id=chat_id, voice=audio_file, caption=caption)
+        else:
+            await telegram_bot.send_audio(chat_id=chat_id, audio=audio_file, caption=caption)
+
+    try:
+        if hasattr(audio_filepath, "read"):
+            await enviar(audio_filepath)
+        else:
+            with open(audio_filepath, 'rb') as audio_file:
+                await enviar(audio_file)
         print(f"Mensaje de voz enviado a Telegram a chat_id: {chat_id}")
         return True
     except TelegramError as e:
@@ -163,6 +371,8 @@ def enviar_alerta_whatsapp(phone_number, message_text):
         print("Error: Número de cuidador de WhatsApp no configurado. No se pudo enviar mensaje.")
         return False
     try:
+        # pywhatkit busca un navegador al importarse: solo se carga si de verdad se usa
+        import pywhatkit
         pywhatkit.sendwhatmsg_instantly(phone_number, message_text, wait_time=15, tab_close=True)
         print(f"Mensaje de texto de alerta enviado a WhatsApp a {phone_number}")
         return True
@@ -182,29 +392,48 @@ def enviar_mensaje_telegram_texto(mensaje):
     response = requests.post(url, data=data)
     return response.json()
 
-def is_mosquitto_running():
+def conectar_cliente_mqtt():
     """
-    Verifica si el proceso de Mosquitto está en ejecución en Windows.
-    Retorna True si está corriendo, False en caso contrario.
+    Conecta el cliente MQTT a un broker que ya aceptó el sondeo. Retorna True si
+    lo consigue; si no, el cliente sigue reintentando en segundo plano.
     """
-    try:
-        result = subprocess.run(['tasklist', '/NH', '/FI', 'IMAGENAME eq mosquitto.exe'], 
-                                 capture_output=True, text=True, check=False)
-        
-        if "mosquitto.exe" in result.stdout:
-            return True
-        return False
-    except Exception as e:
-        print(f"Error al verificar el estado de Mosquitto: {e}")
+    if mqtt_utils_A.client.is_connected():
+        return True
+    if setup_mqtt(esperar_s=MQTT_STARTUP_TIMEOUT_SECONDS):
+        print("Cliente MQTT conectado.")
+        return True
+    responder_con_voz("El servidor de comunicación está activo, pero todavía no pude conectar con el sistema. Seguiré intentándolo.")
+    return False
+
+_lock_encender_sistema = threading.Lock()
+
+def encender_sistema_en_segundo_plano():
+    """Lanza iniciar_servidor_mqtt_y_sistema en otro hilo para no frenar la escucha. Retorna False si ya estaba en curso."""
+    if not _lock_encender_sistema.acquire(blocking=False):
         return False
 
+    def encender():
+        try:
+            iniciar_servidor_mqtt_y_sistema()
+        finally:
+            _lock_encender_sistema.release()
+
+    threading.Thread(target=encender, name="encender-sistema", daemon=True).start()
+    return True
+
 # MODIFICACIÓN CLAVE: Esta función ahora también intenta conectar el cliente MQTT
 def iniciar_servidor_mqtt_y_sistema():
     """
-    Ejecuta el script batch para iniciar el servidor MQTT.
-    Luego intenta conectar el cliente MQTT y verifica el estado de Mosquitto.
+    Conecta el cliente MQTT; si el broker no responde, ejecuta el script de inicio
+    del servidor y sondea el puerto del broker (TCP y CONNACK de MQTT) con espera
+    exponencial hasta que acepte conexiones o se agote el plazo.
     Retorna True si la conexión MQTT es exitosa, False en caso contrario.
     """
+    # Si el broker ya está en marcha no hace falta lanzar el script
+    if sondear_broker() == 0:
+        print("Broker MQTT ya activo. Conectando el cliente MQTT.")
+        return conectar_cliente_mqtt()
+
     script_name = SYSTEM_STARTUP_SCRIPT 
     base_dir = os.path.dirname(os.path.abspath(__file__))
     full_script_path = os.path.join(base_dir, script_name)
@@ -212,6 +441,7 @@ def iniciar_servidor_mqtt_y_sistema():
     if not os.path.exists(full_script_path):
         print(f"Error: El script de inicio del sistema no se encuentra en: {full_script_path}")
         responder_con_voz("Lo siento, no pude encontrar el script para encender el sistema. Por favor, verifique la instalación.")
+        setup_mqtt()  # Sin esperar: el cliente se conectará solo si el broker aparece más tarde
         return False
     
     print(f"Intentando ejecutar '{full_script_path}' para iniciar el servidor de comunicación (Mosquitto)...")
@@ -222,39 +452,39 @@ def iniciar_servidor_mqtt_y_sistema():
         subprocess.Popen([full_script_path], shell=True, cwd=base_dir)
         print(f"'{full_script_path}' ejecutado correctamente (comando enviado).")
         
-        # Dar tiempo a Mosquitto para que se inicie completamente
-        time.sleep(7) # Aumentado a 7 segundos para mayor robustez
-
-        if is_mosquitto_running():
-            print("Servidor Mosquitto detectado en ejecución. Intentando conectar el cliente MQTT.")
+        # Seguir en cuanto el broker acepte conexiones, sin una espera fija
+        if esperar_broker(plazo_s=MQTT_STARTUP_TIMEOUT_SECONDS):
+            print("Servidor Mosquitto aceptando conexiones. Intentando conectar el cliente MQTT.")
             responder_con_voz("El servidor de comunicación está activo. Conectando al sistema.")
             
             try:
                 # Intentar configurar el cliente MQTT (desde mqtt_utils_A)
-                setup_mqtt() 
-                print("Cliente MQTT conectado.")
-                return True # Éxito en el inicio y conexión
+                return conectar_cliente_mqtt()
             except Exception as e:
                 print(f"Error al conectar el cliente MQTT después de iniciar Mosquitto: {e}")
                 responder_con_voz("El servidor de comunicación está activo, pero no pude conectar con el sistema. Revise los errores.")
                 return False
         else:
             responder_con_voz("El servidor de comunicación no se pudo iniciar. Por favor, reintente o revise los errores.")
-            print("Error: Mosquitto no se detectó en ejecución después del intento de inicio.")
+            print("Error: el broker MQTT no aceptó conexiones después del intento de inicio.")
+            setup_mqtt()
             return False 
     except Exception as e:
         print(f"Error al ejecutar el script '{full_script_path}': {e}")
         responder_con_voz("Lo siento, hubo un problema al ejecutar el script de inicio del sistema.")
         return False
 
-async def handle_emergency_alert(stream, recognizer, source=""):
+async def handle_emergency_alert(stream, recognizer, evento):
     """
     Función para manejar las acciones a tomar en caso de una emergencia (caída o botón de pánico).
+    `evento` es el EventoEmergencia publicado en el canal de emergencias.
     """
+    source = evento.fuente
+    aviso = responder_con_voz("¡Alerta! Se ha detectado una emergencia. Activando protocolo de seguridad.", prioridad=PRIORIDAD_EMERGENCIA)
+    emergencias.registrar_alerta(evento)
     print(f"--- ¡EMERGENCIA DETECTADA! Fuente: {source} ---")
-    responder_con_voz("¡Alerta! Se ha detectado una emergencia. Activando protocolo de seguridad.")
     
-    current_time_str = datetime.datetime.now().strftime("%I:%M %p del %d/%m/%Y")
+    current_time_str = evento.fecha.strftime("%I:%M %p del %d/%m/%Y")
     emergency_text = f"🚨 ALERTA DE EMERGENCIA 🚨\nSe ha detectado una emergencia ({source}) en el hogar a las {current_time_str}. Por favor, verifique."
     
     # Solo intentar enviar si la configuración de Telegram está presente
@@ -270,70 +500,70 @@ async def handle_emergency_alert(stream, recognizer, source=""):
         print("Advertencia: No se pudo enviar alerta de WhatsApp, número de cuidador no configurado.")
 
     publish_lights_state("ON") 
+    if aviso.t_inicio:
+        print(f"Emergencia ({source}): aviso de voz sonando a los {(aviso.t_inicio - evento.t_deteccion) * 1000:.0f} ms de la detección.")
 
-    responder_con_voz("¿Puedes decirme algo más sobre lo que pasó? Si quieres, puedes grabar un mensaje de voz para el cuidador.")
-    responder_con_voz("Di 'grabar mensaje' para empezar, o 'cancelar' para continuar sin mensaje de voz.")
+    responder_con_voz("¿Puedes decirme algo más sobre lo que pasó? Si quieres, puedes grabar un mensaje de voz para el cuidador.", prioridad=PRIORIDAD_EMERGENCIA)
+    responder_con_voz("Di 'grabar mensaje' para empezar, o 'cancelar' para continuar sin mensaje de voz.", prioridad=PRIORIDAD_EMERGENCIA, esperar=True)
     
     decision = escuchar_comando(stream, recognizer, timeout=7)
 
     if "grabar mensaje" in decision:
-        responder_con_voz("Por favor, di tu mensaje de voz después de la señal. Tienes 15 segundos.")
+        responder_con_voz("Por favor, di tu mensaje de voz después de la señal. Tienes 15 segundos.", prioridad=PRIORIDAD_EMERGENCIA, esperar=True)
         time.sleep(1)
         
-        recorded_file = grabar_mensaje_voz(stream, duration=15, filename_suffix="emergency_voice_message")
+        # El grabador lee con su propio cursor del buffer de captura
+        lector_grabacion = captura_audio.nuevo_lector() if captura_audio else stream
+        # Todo en memoria: PCM -> OGG/Opus -> Telegram, sin archivos temporales
+        t_inicio = time.perf_counter()
+        print("Grabando mensaje de voz de emergencia. Habla ahora...")
+        audio_data = grabar_mensaje_voz_pcm(lector_grabacion, duration=15,
+                                            silencio_final=float(config.get("VOICE_MESSAGE_TRAILING_SILENCE_SECONDS", 2.0)))
+        t_grabado = time.perf_counter()
         
-        if recorded_file and os.path.exists(recorded_file):
-            converted_file = convertir_a_ogg_opus(recorded_file, output_ogg_file_suffix="emergency_voice_message_converted")
-            if converted_file and os.path.exists(converted_file):
-                if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-                    await enviar_mensaje_voz_telegram(TELEGRAM_CHAT_ID, converted_file, caption=f"¡MENSAJE DE VOZ DE EMERGENCIA desde el sistema ({source})!")
-                    responder_con_voz("Mensaje de voz adicional enviado al cuidador.")
+        if len(audio_data) > 0:
+            # Si FFmpeg falla o se cuelga, el mensaje sale igual como WAV (más pesado, pero llega)
+            audio_mensaje = codificar_ogg_opus(audio_data) or codificar_wav(audio_data)
+            t_codificado = time.perf_counter()
+            if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+                enviado = await enviar_mensaje_voz_telegram(TELEGRAM_CHAT_ID, audio_mensaje, caption=f"¡MENSAJE DE VOZ DE EMERGENCIA desde el sistema ({source})!")
+                t_enviado = time.perf_counter()
+                print(f"Mensaje de voz de {len(audio_data) / 16000:.1f} s: grabación {t_grabado - t_inicio:.2f} s, "
+                      f"codificación {(t_codificado - t_grabado) * 1000:.0f} ms ({audio_mensaje.name}, {len(audio_mensaje.getbuffer()) / 1024:.0f} KB), "
+                      f"envío {(t_enviado - t_codificado) * 1000:.0f} ms")
+                if enviado:
+                    responder_con_voz("Mensaje de voz adicional enviado al cuidador.", prioridad=PRIORIDAD_EMERGENCIA)
                 else:
-                    responder_con_voz("No pude enviar el mensaje de voz adicional. Se envió una alerta de texto.")
+                    responder_con_voz("No pude enviar el mensaje de voz adicional. Se envió una alerta de texto.", prioridad=PRIORIDAD_EMERGENCIA)
             else:
-                responder_con_voz("No pude enviar el mensaje de voz adicional. Se envió una alerta de texto.")
+                responder_con_voz("No pude enviar el mensaje de voz adicional. Se envió una alerta de texto.", prioridad=PRIORIDAD_EMERGENCIA)
         else:
-            responder_con_voz("No pude grabar tu mensaje. Ya se envió una alerta de texto.")
+            responder_con_voz("No pude grabar tu mensaje. Ya se envió una alerta de texto.", prioridad=PRIORIDAD_EMERGENCIA)
     else:
-        responder_con_voz("Entendido. Se ha enviado la alerta de emergencia principal. Permaneceré atento.")
+        responder_con_voz("Entendido. Se ha enviado la alerta de emergencia principal. Permaneceré atento.", prioridad=PRIORIDAD_EMERGENCIA)
 
-    global fall_detected_flag
-    fall_detected_flag = False
+    # Los avisos repetidos del mismo incidente que llegaron durante el protocolo ya están atendidos
+    repetidos = emergencias.descartar_pendientes()
+    if repetidos:
+        print(f"Se descartaron {repetidos} avisos de emergencia repetidos recibidos durante el protocolo.")
     print("--- Protocolo de emergencia finalizado ---")
 
 # --- FUNCIONES DE BASE DE DATOS SQLite PARA RECORDATORIOS ---
 
 def init_db():
-    """Inicializa la base de datos de recordatorios y crea la tabla si no existe."""
+    """Inicializa la base de datos de recordatorios y aplica las migraciones pendientes."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                time_hour INTEGER NOT NULL,
-                time_minute INTEGER NOT NULL,
-                message TEXT NOT NULL,
-                last_triggered_date TEXT -- Formato YYYY-MM-DD
-            )
-        """)
-        conn.commit()
-        conn.close()
-        print(f"Base de datos {DB_NAME} inicializada correctamente.")
+        version = reminder_store.migrar()
+        print(f"Base de datos {DB_NAME} inicializada correctamente (esquema v{version}).")
     except Exception as e:
         print(f"Error al inicializar la base de datos: {e}")
 
-def add_reminder_to_db(hour, minute, message):
+def add_reminder_to_db(hour, minute, message, due_date=None, recurrence=RECURRENCIA_DIARIA):
     """Añade un nuevo recordatorio a la base de datos."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO reminders (time_hour, time_minute, message, last_triggered_date) VALUES (?, ?, ?, ?)",
-                       (hour, minute, message, None)) # last_triggered_date comienza como NULL
-        new_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        new_id = reminder_store.agregar(hour, minute, message, due_date, recurrence)
         print(f"Recordatorio añadido a la DB con ID: {new_id}")
+        programador_recordatorios.invalidar()
         return new_id
     except Exception as e:
         print(f"Error al añadir recordatorio a la DB: {e}")
@@ -342,27 +572,7 @@ def add_reminder_to_db(hour, minute, message):
 def get_all_reminders_from_db():
     """Obtiene todos los recordatorios de la base de datos."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, time_hour, time_minute, message, last_triggered_date FROM reminders")
-        rows = cursor.fetchall()
-        conn.close()
-        
-        loaded_reminders = []
-        for row in rows:
-            r_id, r_hour, r_minute, r_message, r_last_date_str = row
-            try:
-                time_obj = datetime.time(r_hour, r_minute)
-                last_triggered_date = datetime.datetime.strptime(r_last_date_str, '%Y-%m-%d').date() if r_last_date_str else None
-                loaded_reminders.append({
-                    'id': r_id,
-                    'time_obj': time_obj,
-                    'message': r_message,
-                    'last_triggered_date': last_triggered_date
-                })
-            except Exception as e:
-                print(f"Error al procesar recordatorio de la DB (ID: {r_id}): {e}")
-        return loaded_reminders
+        return reminder_store.obtener_todos()
     except Exception as e:
         print(f"Error al obtener recordatorios de la DB: {e}")
         return []
@@ -370,11 +580,7 @@ def get_all_reminders_from_db():
 def update_reminder_triggered_date_in_db(reminder_id, new_date_str):
     """Actualiza la fecha de la última vez que se activó un recordatorio."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE reminders SET last_triggered_date = ? WHERE id = ?", (new_date_str, reminder_id))
-        conn.commit()
-        conn.close()
+        reminder_store.actualizar_fecha_disparo(reminder_id, new_date_str)
         print(f"Recordatorio ID {reminder_id} actualizado a fecha: {new_date_str}")
     except Exception as e:
         print(f"Error al actualizar la fecha del recordatorio ID {reminder_id}: {e}")
@@ -382,129 +588,189 @@ def update_reminder_triggered_date_in_db(reminder_id, new_date_str):
 def delete_reminder_from_db_by_id(reminder_id):
     """Elimina un recordatorio de la base de datos por su ID."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-        conn.commit()
-        conn.close()
+        eliminado = reminder_store.eliminar_por_id(reminder_id)
         print(f"Recordatorio ID {reminder_id} eliminado de la DB.")
-        return cursor.rowcount > 0 
+        programador_recordatorios.invalidar()
+        return eliminado
     except Exception as e:
         print(f"Error al eliminar recordatorio ID {reminder_id} de la DB: {e}")
         return False
 
-def delete_reminders_from_db_by_message_part(message_part):
-    """Elimina recordatorios de la base de datos por una parte de su mensaje."""
+def search_reminders_in_db(keywords, limit=5):
+    """Busca recordatorios por palabras clave del mensaje, del más al menos parecido."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM reminders WHERE message LIKE ?", ('%' + message_part + '%',))
-        conn.commit()
-        conn.close()
-        rows_deleted = cursor.rowcount
-        print(f"{rows_deleted} recordatorios eliminados de la DB con mensaje '{message_part}'.")
-        return rows_deleted
+        return reminder_store.buscar(keywords, limite=limit)
     except Exception as e:
-        print(f"Error al eliminar recordatorios por mensaje de la DB: {e}")
+        print(f"Error al buscar recordatorios en la DB: {e}")
+        return []
+
+def list_reminders_page_from_db(limit, offset=0):
+    """Obtiene una página de recordatorios ordenados por hora."""
+    try:
+        return reminder_store.listar(limit, offset)
+    except Exception as e:
+        print(f"Error al listar recordatorios de la DB: {e}")
+        return []
+
+def count_reminders_in_db():
+    """Cuenta los recordatorios guardados."""
+    try:
+        return reminder_store.contar()
+    except Exception as e:
+        print(f"Error al contar recordatorios en la DB: {e}")
         return 0
 
 # --- FUNCIONES DE LÓGICA DE RECORDATORIOS ---
 
+# Recordatorios que se leen de una vez al listarlos, antes de preguntar si seguir
+RECORDATORIOS_POR_PAGINA = 3
+
+DIAS_SEMANA = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+
+def hora_hablada(time_obj):
+    """Formatea una hora para decirla en voz alta (p. ej. '08:30 de la tarde')."""
+    return time_obj.strftime('%I:%M %p').replace('AM', 'de la mañana').replace('PM', 'de la tarde')
+
+def es_afirmativo(texto):
+    """Indica si la respuesta reconocida es un 'sí'."""
+    return any(palabra in ("sí", "si", "claro", "vale") for palabra in (texto or "").lower().split())
+
+def cuando_hablado(time_obj, due_date=None, recurrence=RECURRENCIA_DIARIA):
+    """Describe cuándo suena un recordatorio (p. ej. 'mañana a las 09:30 de la mañana')."""
+    hora = f"a las {hora_hablada(time_obj)}"
+    if recurrence == RECURRENCIA_SEMANAL and due_date:
+        return f"todos los {DIAS_SEMANA[due_date.weekday()]} {hora}"
+    if recurrence != RECURRENCIA_UNA_VEZ or due_date is None:
+        return hora
+    dias = (due_date - datetime.date.today()).days
+    if dias == 0:
+        return f"hoy {hora}"
+    if dias == 1:
+        return f"mañana {hora}"
+    return f"el {DIAS_SEMANA[due_date.weekday()]} {due_date.day} de {MESES[due_date.month - 1]} {hora}"
+
 def parse_time_from_text(text):
     """
     Intenta extraer una hora (HH:MM) del texto en lenguaje natural.
-    Soporta formatos como "a las ocho", "a las tres y cuarto de la tarde", "a las diez y treinta de la noche".
     Retorna un objeto datetime.time o None si no puede parsear.
+    Para la fecha, la repetición y el mensaje usar time_parser.interpretar_tiempo.
     """
-    time_map_hour = {
-        'una': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5, 'seis': 6, 'siete': 7,
-        'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12
-    }
-    time_map_minute = {
-        'cuarto': 15, 'media': 30, 'treinta': 30, 'quince': 15, 'cero': 0, 'y cuarto': 15, 'y media': 30
-    }
+    expresion = interpretar_tiempo(text)
+    return expresion.hora if expresion else None
 
-    # Normalizar texto: reemplazar números en palabras por dígitos
-    for word, num in time_map_hour.items():
-        text = text.replace(word, str(num))
-    for word, num in time_map_minute.items():
-        text = text.replace(word, str(num))
+def disparar_recordatorio(reminder, momento_programado):
+    """Anuncia un recordatorio vencido y guarda la fecha de activación en la base de datos."""
+    responder_con_voz(f"¡Recordatorio! {reminder['message']}", prioridad=PRIORIDAD_RECORDATORIO)
     
-    # Regex para encontrar patrones de tiempo: "a las HH [y MM] [de la MAÑANA/TARDE/NOCHE]"
-    match = re.search(r'a las (\d+)(?: y (\d+))? (?:de la (mañana|tarde|noche))?', text)
+    # Los recordatorios de una sola vez se borran; los demás guardan la fecha de última activación
+    if reminder.get('recurrence') == RECURRENCIA_UNA_VEZ:
+        delete_reminder_from_db_by_id(reminder['id'])
+    else:
+        update_reminder_triggered_date_in_db(reminder['id'], momento_programado.strftime('%Y-%m-%d'))
 
-    if match:
-        hour_str = match.group(1)
-        minute_str = match.group(2)
-        period = match.group(3)
-
-        try:
-            hour = int(hour_str)
-            minute = int(minute_str) if minute_str else 0
-
-            # Ajustar la hora según el período (mañana/tarde/noche)
-            if period == 'tarde' and hour < 12:
-                hour += 12
-            elif period == 'noche': 
-                if hour >= 1 and hour < 12: 
-                    hour += 12
-                elif hour == 12: # 12 de la noche (medianoche)
-                    hour = 0
-            elif period == 'mañana' and hour == 12: # 12 de la mañana (mediodía)
-                hour = 12 
-
-            # Validar rangos de hora y minuto
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                return None
-            
-            return datetime.time(hour, minute)
-        except ValueError:
-            return None 
-    return None 
+# Heap de próximas activaciones; las funciones de añadir/eliminar lo invalidan
+programador_recordatorios = ProgramadorRecordatorios(
+    get_all_reminders_from_db, disparar_recordatorio,
+    margen_gracia=datetime.timedelta(minutes=float(config.get("REMINDER_GRACE_MINUTES", 10))))
 
 def check_reminders_thread_func():
     """
-    Hilo en segundo plano para verificar y activar recordatorios desde la base de datos.
+    Hilo en segundo plano para activar recordatorios.
+    Duerme hasta el próximo recordatorio en lugar de revisar la tabla cada minuto.
     """
-    print("Iniciando hilo de verificación de recordatorios...")
-    while True:
-        now = datetime.datetime.now()
-        current_date = now.date()
-        current_time = now.time()
-
-        # Cargar recordatorios frescos de la DB en cada ciclo
-        reminders_from_db = get_all_reminders_from_db() 
-        
-        for reminder in reminders_from_db: 
-            if reminder['time_obj'].hour == current_time.hour and \
-               reminder['time_obj'].minute == current_time.minute and \
-               (reminder['last_triggered_date'] is None or reminder['last_triggered_date'] != current_date):
-                
-                print(f"Activando recordatorio: {reminder['message']} a las {current_time.strftime('%H:%M')}")
-                responder_con_voz(f"¡Recordatorio! {reminder['message']}")
-                
-                # Actualizar la fecha de última activación en la base de datos
-                update_reminder_triggered_date_in_db(reminder['id'], current_date.strftime('%Y-%m-%d'))
-        
-        # Dormir hasta el inicio del siguiente minuto para una verificación precisa
-        time.sleep(60 - now.second if now.second != 0 else 60) 
+    programador_recordatorios.ejecutar()
 
 # --- FUNCIÓN PRINCIPAL ASÍNCRONA ---
 
-async def main_async():
-    global current_state
-    
-    # 1. Configurar audio y reconocimiento de voz primero
-    recognizer = setup_vosk()
-    p, stream = setup_pyaudio()
+# --- TEMPERATURA (series en memoria de mqtt_utils_A: responder no toca el disco) ---
+TEMPERATURA_VENTANA_S = float(config.get("TEMPERATURE_TREND_MINUTES", 60)) * 60
+
+def numero_hablado(valor):
+    """Número con una cifra decimal y coma, sin ',0' (p. ej. 21.5 -> '21,5', 2.0 -> '2')."""
+    texto = f"{valor:.1f}"
+    return (texto[:-2] if texto.endswith(".0") else texto).replace(".", ",")
+
+def grados_hablados(valor):
+    texto = numero_hablado(valor)
+    return f"{texto} grado" if texto in ("1", "-1") else f"{texto} grados"
+
+def periodo_hablado(segundos):
+    """'la última hora', 'los últimos 20 minutos'..."""
+    minutos = max(1, round(segundos / 60))
+    if minutos == 60:
+        return "la última hora"
+    if minutos % 60 == 0:
+        return f"las últimas {minutos // 60} horas"
+    return "el último minuto" if minutos == 1 else f"los últimos {minutos} minutos"
+
+def hace_hablado(segundos):
+    """'hace un minuto', 'hace 3 horas'..."""
+    minutos = max(1, round(segundos / 60))
+    if minutos < 60:
+        return "hace un minuto" if minutos == 1 else f"hace {minutos} minutos"
+    horas = round(minutos / 60)
+    return "hace una hora" if horas == 1 else f"hace {horas} horas"
+
+def resumen_temperatura():
+    """
+    Frase con la temperatura actual de cada sensor y su tendencia en la ventana
+    configurada (p. ej. 'subió 2 grados en la última hora'), o None si no hay datos.
+    """
+    frases = []
+    # Primero el sensor principal, luego las habitaciones por orden alfabético
+    for topico in sorted(series_sensores.series, key=lambda t: (t != TOPIC_TEMPERATURA, t)):
+        serie = series_sensores.serie(topico)
+        lugar = "" if topico == TOPIC_TEMPERATURA else f" en {topico.split('/')[1].replace('_', ' ')}"
+        est = serie.estadisticas(TEMPERATURA_VENTANA_S)
+        if est is None:
+            t, valor = serie.ultimo()
+            frases.append(f"La última temperatura{lugar} que recibí, {hace_hablado(time.time() - t)}, era de {grados_hablados(valor)}.")
+            continue
+        frase = f"La temperatura actual{lugar} es de {grados_hablados(est.actual)}"
+        # Hace falta al menos un par de minutos de lecturas para hablar de tendencia
+        if est.lecturas >= 2 and est.duracion_s >= 120:
+            periodo = periodo_hablado(min(TEMPERATURA_VENTANA_S, est.duracion_s))
+            if abs(est.cambio) < 0.5:
+                frase += f"; se ha mantenido estable en {periodo}"
+                if numero_hablado(est.minimo) != numero_hablado(est.maximo):
+                    frase += f", entre {numero_hablado(est.minimo)} y {grados_hablados(est.maximo)}"
+            else:
+                frase += f"; {'subió' if est.cambio > 0 else 'bajó'} {grados_hablados(abs(est.cambio))} en {periodo}"
+        frases.append(frase + ".")
+    return " ".join(frases) or None
 
-    # 2. Intentar iniciar el sistema (servidor MQTT y cliente) automáticamente al inicio
-    system_started_successfully = iniciar_servidor_mqtt_y_sistema()
+async def main_async():
+    global current_state, captura_audio, lector_comandos, ultima_pregunta_gemini
     
-    if system_started_successfully:
-        responder_con_voz("Sistema de asistencia iniciado y listo para recibir comandos.")
-    else:
-        responder_con_voz("Sistema de asistencia iniciado, pero con problemas de comunicación. Algunas funciones podrían no estar disponibles.")
+    # 0. Arranque en paralelo: el modelo de voz, el micrófono, el servidor MQTT y las cachés
+    # se preparan a la vez; el bucle principal solo espera a lo que necesita para escuchar.
+    def iniciar_captura():
+        # La captura corre en su propio hilo: no se pierde audio mientras el asistente está ocupado
+        captura = setup_captura(segundos_buffer=int(config.get("AUDIO_BUFFER_SECONDS", 30)))
+        perfil_arranque.hito("micrófono activo")
+        return captura
+
+    def anunciar_sistema(system_started_successfully):
+        if system_started_successfully:
+            responder_con_voz("Sistema de asistencia iniciado y listo para recibir comandos.")
+        else:
+            responder_con_voz("Sistema de asistencia iniciado, pero con problemas de comunicación. Algunas funciones podrían no estar disponibles.")
+        perfil_arranque.hito("sistema completo")
+        print(perfil_arranque.informe())
+
+    # Historial de los sensores en SQLite, escrito por lotes en segundo plano
+    if config.get("SENSOR_DB_ENABLED", True):
+        series_sensores.iniciar_persistencia("sensores.db", intervalo_s=float(config.get("SENSOR_DB_FLUSH_SECONDS", 30)))
+
+    grafo_arranque = GrafoArranque(perfil_arranque)
+    grafo_arranque.agregar("mezclador de audio", cola_voz.reproductor.iniciar)
+    grafo_arranque.agregar("caché de voz", precalentar_cache_voz)
+    grafo_arranque.agregar("modelo Vosk", setup_vosk)
+    grafo_arranque.agregar("captura de audio", iniciar_captura)
+    # Intentar iniciar el sistema (servidor MQTT y cliente) automáticamente al inicio, sin frenar la escucha
+    grafo_arranque.agregar("MQTT y sistema", iniciar_servidor_mqtt_y_sistema)
+    grafo_arranque.agregar("anuncio de inicio", anunciar_sistema, depende_de=("MQTT y sistema",))
 
     # Iniciar hilos de tareas en segundo plano
     threading.Thread(target=vaciar_carpeta_respuestas, daemon=True).start()
@@ -524,6 +790,7 @@ async def main_async():
         "añadir recordatorio": ["pon un recordatorio", "recuérdame", "añadir recordatorio de pastillas", "programar recordatorio"],
         "listar recordatorios": ["qué recordatorios tengo", "mis recordatorios", "dime mis recordatorios"],
         "eliminar recordatorio": ["borrar recordatorio", "quitar recordatorio", "eliminar recordatorio"],
+        "olvidar respuesta": ["olvida esa respuesta", "esa respuesta está mal", "respuesta incorrecta"],
     }
     
     # Fusionar los comandos personalizados del archivo de configuración
@@ -533,37 +800,71 @@ async def main_async():
         else:
             comandos[key] = value # Añadir nuevos comandos
 
+    # Compuerta de actividad de voz: en una habitación en silencio no se decodifica nada
+    vad = CompuertaVAD() if config.get("VAD_ENABLED", True) else None
+
+    # Compilar todas las variantes una sola vez: cada comando se resuelve en una pasada
+    matcher_intenciones = IntentMatcher(comandos)
+    print(f"Buscador de intenciones compilado: {len(comandos)} comandos, {matcher_intenciones.num_variantes} variantes.")
+
+    # 1. Para escuchar solo hacen falta el modelo de voz y el micrófono
+    recognizer = grafo_arranque.esperar("modelo Vosk")
+    captura_audio = grafo_arranque.esperar("captura de audio")
+    stream = lector_comandos = captura_audio.nuevo_lector()
+
+    def al_detectar_emergencia(evento):
+        # Se ejecuta en el hilo de MQTT: corta al instante la escucha y la frase en curso
+        lector_comandos.interrumpir()
+        cola_voz.interrumpir()
+    emergencias.suscribir(al_detectar_emergencia)
+    perfil_arranque.hito("listo para comandos")
+    print(perfil_arranque.informe())
+
     try:
         while True:
-            global fall_detected_flag
-            if fall_detected_flag:
-                print("¡Caída detectada! Activando manejo de emergencia.")
-                await handle_emergency_alert(stream, recognizer, source="detección de caída")
+            evento = emergencias.siguiente()
+            if evento is not None:
+                print(f"¡Emergencia ({evento.fuente})! Activando manejo de emergencia.")
+                await handle_emergency_alert(stream, recognizer, evento)
                 continue 
 
-            comando = escuchar_comando(stream, recognizer) 
+            # Con EARLY_INTENT_DISPATCH se actúa en cuanto el resultado parcial muestra una intención estable
+            comando = escuchar_comando(stream, recognizer,
+                                       matcher=matcher_intenciones if config.get("EARLY_INTENT_DISPATCH", False) else None,
+                                       vad=vad, interrumpir=emergencias.activa) 
+            if emergencias.activa.is_set():
+                continue
             print(f"Comando detectado: {comando}")
 
-            if any(variant in comando for variant in comandos["encender luces"]):
+            # El bucle vuelve a escuchar mientras el asistente aún habla: descartar su propia voz
+            if cola_voz.es_eco(comando):
+                print(f"Ignorando eco de la voz del asistente: '{comando}'")
+                continue
+
+            coincidencia = matcher_intenciones.buscar(comando)
+            intencion = coincidencia.intencion if coincidencia else None
+            if coincidencia:
+                print(f"Intención detectada: '{intencion}' (puntuación {coincidencia.puntuacion:.2f})")
+
+            if intencion == "encender luces":
                 publish_lights_state("ON")
                 current_state = "ON"
                 respuesta = "Luces encendidas."
                 print(respuesta)
                 responder_con_voz(respuesta)
 
-            elif any(variant in comando for variant in comandos["apagar luces"]):
+            elif intencion == "apagar luces":
                 publish_lights_state("OFF")
                 current_state = "OFF"
                 respuesta = "Luces apagadas."
                 print(respuesta)
                 responder_con_voz(respuesta)
 
-            elif any(variant in comando for variant in comandos["temperatura"]):
+            elif intencion == "temperatura":
                 print("Consultando temperatura...")
                 responder_con_voz("Consultando temperatura")
-                if last_two_temperatures:
-                    respuesta = f"La temperatura actual es de {last_two_temperatures[-1]} grados Celsius."
-                    time.sleep(1)
+                respuesta = resumen_temperatura()
+                if respuesta:
                     print(respuesta)
                     responder_con_voz(respuesta)
                 else:
@@ -571,16 +872,18 @@ async def main_async():
                     print(respuesta)
                     responder_con_voz(respuesta)
 
-            elif any(variant in comando for variant in comandos["gemini"]):
+            elif intencion == "gemini":
                 print("Comando Gemini detectado.")
                 if not GEMINI_API_KEY:
                     responder_con_voz("Lo siento, la clave de la API de Gemini no está configurada. No puedo responder preguntas.")
                     print("Error: Clave API de Gemini no configurada.")
                     continue
 
-                responder_con_voz("De acuerdo, ¿cuál es tu pregunta?")
+                responder_con_voz("De acuerdo, ¿cuál es tu pregunta?", esperar=True)
                 time.sleep(1.0)
-                pregunta_a_gemini = escuchar_comando(stream, recognizer, timeout=12)
+                pregunta_a_gemini = escuchar_comando(stream, recognizer, timeout=12, interrumpir=emergencias.activa)
+                if emergencias.activa.is_set():
+                    continue
                 
                 if not pregunta_a_gemini:
                     responder_con_voz("Lo siento, no he capturado tu pregunta. Por favor, inténtalo de nuevo.")
@@ -589,43 +892,48 @@ async def main_async():
 
                 print(f"Pregunta a Gemini: '{pregunta_a_gemini}'")
                 try:
-                    # Llamada a consultar_gemini, que ahora no necesita la API_KEY como argumento
-                    respuesta_gemini = consultar_gemini(pregunta_a_gemini)
-                    if respuesta_gemini:
-                        print(f"Gemini respondió: {respuesta_gemini}")
-                        responder_con_voz(respuesta_gemini)
-                    else:
-                        responder_con_voz("Lo siento, no pude obtener una respuesta clara de Gemini.")
+                    # Consulta asíncrona con plazo: el bucle sigue atento a una alerta de caída
+                    if await responder_gemini(pregunta_a_gemini, en_streaming=config.get("GEMINI_STREAMING", True)):
+                        ultima_pregunta_gemini = pregunta_a_gemini
                 except Exception as e:
                     print(f"Error al consultar Gemini: {e}")
                     responder_con_voz("Lo siento, hubo un problema al consultar a Gemini. Por favor, inténtalo de nuevo más tarde.")
 
-            elif any(variant in comando for variant in comandos["hora"]): 
+            elif intencion == "olvidar respuesta":
+                if cache_gemini and ultima_pregunta_gemini and cache_gemini.invalidar(ultima_pregunta_gemini):
+                    responder_con_voz("De acuerdo, olvidé esa respuesta. La próxima vez volveré a preguntar.")
+                else:
+                    responder_con_voz("No tengo ninguna respuesta guardada que olvidar.")
+                ultima_pregunta_gemini = None
+
+            elif intencion == "hora": 
                 hora_actual = datetime.datetime.now().strftime("%I:%M %p")
                 respuesta = f"La hora actual es {hora_actual}."
                 print(respuesta)
                 responder_con_voz(respuesta)
             
-            elif any(variant in comando for variant in comandos["mensaje cuidador"]): 
+            elif intencion == "mensaje cuidador": 
                 print("Comando 'mensaje cuidador' detectado.")
                 if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID) and not WHATSAPP_CAREGIVER_NUMBER:
                     responder_con_voz("Lo siento, no tengo configurado ningún método para enviar mensajes al cuidador.")
                     print("Error: Métodos de envío de mensajes al cuidador no configurados.")
                     continue
 
-                responder_con_voz("De acuerdo. ¿Qué mensaje quieres enviar al cuidador? Por favor, di tu mensaje ahora.")
+                responder_con_voz("De acuerdo. ¿Qué mensaje quieres enviar al cuidador? Por favor, di tu mensaje ahora.", esperar=True)
                 time.sleep(2.0)
-                mensaje_para_cuidador = escuchar_comando(stream, recognizer, timeout=25)
+                mensaje_para_cuidador = escuchar_comando(stream, recognizer, timeout=25, interrumpir=emergencias.activa)
+                if emergencias.activa.is_set():
+                    continue
                 print(f"Mensaje para cuidador capturado: '{mensaje_para_cuidador}'")
 
                 if mensaje_para_cuidador:
                     responder_con_voz("Voy a enviar el siguiente mensaje al cuidador:")
-                    time.sleep(0.5)
                     responder_con_voz(mensaje_para_cuidador)
                     
-                    time.sleep(2.0)
-                    responder_con_voz("¿Quieres enviar este mensaje? Di 'sí' o 'no' en los próximos 7 segundos.")
-                    confirmacion = escuchar_comando(stream, recognizer, timeout=7)
+                    responder_con_voz("¿Quieres enviar este mensaje? Di 'sí' o 'no' en los próximos 7 segundos.", esperar=True)
+                    confirmacion = escuchar_comando(stream, recognizer, timeout=7, interrumpir=emergencias.activa)
+                    if emergencias.activa.is_set():
+                        continue
                     
                     if "sí" in confirmacion.lower() or "si" in confirmacion.lower():
                         try:
@@ -654,16 +962,13 @@ async def main_async():
                 else:
                     responder_con_voz("No he capturado ningún mensaje. Intenta de nuevo.")
 
-            elif any(variant in comando for variant in comandos["fecha y dia"]):
+            elif intencion == "fecha y dia":
                 print("Comando de fecha y día detectado.")
                 current_date = datetime.datetime.now()
                 
-                dias_semana = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
-                meses_anyo = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
-                
-                dia_semana_str = dias_semana[current_date.weekday()]
+                dia_semana_str = DIAS_SEMANA[current_date.weekday()]
                 dia_mes = current_date.day
-                mes_str = meses_anyo[current_date.month - 1]
+                mes_str = MESES[current_date.month - 1]
                 anyo = current_date.year
 
                 respuesta_fecha = f"Hoy es {dia_semana_str}, {dia_mes} de {mes_str} de {anyo}."
@@ -672,22 +977,38 @@ async def main_async():
                 responder_con_voz(respuesta_fecha)
 
             # --- LÓGICA PARA AÑADIR RECORDATORIO ---
-            elif any(variant in comando for variant in comandos["añadir recordatorio"]):
+            elif intencion == "añadir recordatorio":
                 print("Comando para añadir recordatorio detectado.")
-                responder_con_voz("De acuerdo. ¿Qué te debo recordar y a qué hora? Por ejemplo, 'recordar tomar pastillas a las ocho de la noche'.")
+                responder_con_voz("De acuerdo. ¿Qué te debo recordar y a qué hora? Por ejemplo, 'recordar tomar pastillas a las ocho de la noche'.", esperar=True)
                 time.sleep(1.0)
-                recordatorio_str = escuchar_comando(stream, recognizer, timeout=15)
+                recordatorio_str = escuchar_comando(stream, recognizer, timeout=15, interrumpir=emergencias.activa)
+                if emergencias.activa.is_set():
+                    continue
 
                 if recordatorio_str:
-                    time_obj = parse_time_from_text(recordatorio_str)
+                    expresion = interpretar_tiempo(recordatorio_str)
                     
-                    if time_obj:
-                        message_raw = re.sub(r'(?:a las \d+(?: y \d+)? (?:de la (?:mañana|tarde|noche))?)|(?:recuerdame\s?)', '', recordatorio_str, flags=re.IGNORECASE).strip()
-                        message = message_raw if message_raw else "un evento"
-
-                        new_id = add_reminder_to_db(time_obj.hour, time_obj.minute, message.strip())
+                    if expresion:
+                        message = expresion.mensaje or "un evento"
+                        fecha = expresion.fecha
+
+                        # Uno de una sola vez para una hora que ya pasó no se guarda sin preguntar
+                        if expresion.recurrencia == RECURRENCIA_UNA_VEZ:
+                            hoy = datetime.date.today()
+                            if datetime.datetime.combine(fecha or hoy, expresion.hora) <= datetime.datetime.now():
+                                responder_con_voz("Esa hora ya pasó. ¿Quieres que lo programe para mañana a la misma hora? Di 'sí' o 'no'.", esperar=True)
+                                respuesta = escuchar_comando(stream, recognizer, timeout=5, interrumpir=emergencias.activa)
+                                if emergencias.activa.is_set():
+                                    continue
+                                if not es_afirmativo(respuesta):
+                                    responder_con_voz("De acuerdo, no guardé el recordatorio.")
+                                    continue
+                                fecha = hoy + datetime.timedelta(days=1)
+
+                        new_id = add_reminder_to_db(expresion.hora.hour, expresion.hora.minute, message,
+                                                    fecha, expresion.recurrencia)
                         if new_id:
-                            responder_con_voz(f"Recordatorio de '{message.strip()}' con ID {new_id} programado para las {time_obj.strftime('%I:%M %p').replace('AM', 'de la mañana').replace('PM', 'de la tarde')}.")
+                            responder_con_voz(f"Recordatorio de '{message}' con ID {new_id} programado para {cuando_hablado(expresion.hora, fecha, expresion.recurrencia)}.")
                         else:
                             responder_con_voz("Lo siento, no pude guardar el recordatorio en la base de datos.")
                     else:
@@ -696,62 +1017,94 @@ async def main_async():
                     responder_con_voz("No he capturado el recordatorio. Por favor, inténtalo de nuevo.")
 
             # --- LÓGICA PARA LISTAR RECORDATORIOS ---
-            elif any(variant in comando for variant in comandos["listar recordatorios"]):
+            # Se leen por páginas, una frase corta por recordatorio, en lugar de un solo texto enorme
+            elif intencion == "listar recordatorios":
                 print("Comando para listar recordatorios detectado.")
-                all_reminders = get_all_reminders_from_db()
-                if all_reminders:
-                    response_text = "Tienes los siguientes recordatorios:"
-                    for r in all_reminders:
-                        time_str = r['time_obj'].strftime('%I:%M %p').replace('AM', 'de la mañana').replace('PM', 'de la tarde')
-                        response_text += f" Recordatorio número {r['id']}: '{r['message']}' a las {time_str}."
-                    print(response_text)
-                    responder_con_voz(response_text)
+                total = count_reminders_in_db()
+                if total:
+                    responder_con_voz(f"Tienes {total} recordatorios." if total > 1 else "Tienes un recordatorio.")
+                    offset = 0
+                    while offset < total:
+                        for r in list_reminders_page_from_db(RECORDATORIOS_POR_PAGINA, offset):
+                            frase = f"Recordatorio número {r['id']}: '{r['message']}' {cuando_hablado(r['time_obj'], r['due_date'], r['recurrence'])}."
+                            print(frase)
+                            responder_con_voz(frase)
+                        offset += RECORDATORIOS_POR_PAGINA
+                        if offset < total:
+                            responder_con_voz("¿Quieres escuchar más recordatorios? Di 'sí' o 'no'.", esperar=True)
+                            respuesta = escuchar_comando(stream, recognizer, timeout=5, interrumpir=emergencias.activa)
+                            if emergencias.activa.is_set() or not es_afirmativo(respuesta):
+                                break
                 else:
                     responder_con_voz("No tienes ningún recordatorio programado.")
             
             # --- LÓGICA PARA ELIMINAR RECORDATORIO ---
-            elif any(variant in comando for variant in comandos["eliminar recordatorio"]):
+            elif intencion == "eliminar recordatorio":
                 print("Comando para eliminar recordatorio detectado.")
-                responder_con_voz("De acuerdo. ¿Qué recordatorio quieres eliminar? Di el número o una palabra clave del mensaje.")
+                responder_con_voz("De acuerdo. ¿Qué recordatorio quieres eliminar? Di el número o una palabra clave del mensaje.", esperar=True)
                 time.sleep(1.0)
-                eliminar_str = escuchar_comando(stream, recognizer, timeout=10)
+                eliminar_str = escuchar_comando(stream, recognizer, timeout=10, interrumpir=emergencias.activa)
+                if emergencias.activa.is_set():
+                    continue
 
                 if eliminar_str:
-                    rows_deleted = 0
                     try:
                         eliminar_id = int(eliminar_str.strip())
                         if delete_reminder_from_db_by_id(eliminar_id):
-                            rows_deleted = 1
-                    except ValueError:
-                        rows_deleted = delete_reminders_from_db_by_message_part(eliminar_str.strip())
-                    
-                    if rows_deleted > 0:
-                        if rows_deleted == 1:
                             responder_con_voz("Recordatorio eliminado.")
                         else:
-                            responder_con_voz(f"{rows_deleted} recordatorios eliminados.")
-                    else:
-                        responder_con_voz("No encontré ningún recordatorio con esa descripción o número para eliminar.")
+                            responder_con_voz("No encontré ningún recordatorio con esa descripción o número para eliminar.")
+                    except ValueError:
+                        # Por palabra clave: confirmar solo el candidato más parecido, nunca borrar todos los que coincidan
+                        candidatos = search_reminders_in_db(eliminar_str.strip())
+                        if candidatos:
+                            r = candidatos[0]
+                            pregunta = f"¿Quieres eliminar el recordatorio número {r['id']}: '{r['message']}' {cuando_hablado(r['time_obj'], r['due_date'], r['recurrence'])}? Di 'sí' o 'no'."
+                            if len(candidatos) > 1:
+                                pregunta = f"Encontré {len(candidatos)} recordatorios parecidos. El más parecido es este. " + pregunta
+                            responder_con_voz(pregunta, esperar=True)
+                            respuesta = escuchar_comando(stream, recognizer, timeout=7, interrumpir=emergencias.activa)
+                            if emergencias.activa.is_set():
+                                continue
+                            if es_afirmativo(respuesta) and delete_reminder_from_db_by_id(r['id']):
+                                responder_con_voz("Recordatorio eliminado.")
+                            else:
+                                responder_con_voz("De acuerdo, no eliminé ningún recordatorio.")
+                        else:
+                            responder_con_voz("No encontré ningún recordatorio con esa descripción o número para eliminar.")
                 else:
                     responder_con_voz("No he capturado la descripción del recordatorio a eliminar. Por favor, inténtalo de nuevo.")
 
             # --- LÓGICA PRINCIPAL DEL COMANDO: ENCENDER SISTEMA ---
             # Este comando ahora re-intenta la secuencia de inicio
-            elif any(variant in comando for variant in comandos["encender sistema"]):
+            elif intencion == "encender sistema":
                 print("Comando 'encender sistema' detectado. Re-iniciando el proceso de activación.")
-                iniciar_servidor_mqtt_y_sistema()
+                if mqtt_utils_A.client.is_connected():
+                    responder_con_voz("El sistema ya está conectado.")
+                elif not encender_sistema_en_segundo_plano():
+                    responder_con_voz("Ya estoy encendiendo el sistema, un momento.")
             
     except KeyboardInterrupt:
         print("Cerrando programa por interrupción del teclado...")
-        responder_con_voz("Cerrando programa.")
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        if vad:
+            print(vad.resumen())
+        if cache_gemini:
+            print(f"Caché de respuestas de Gemini: {cache_gemini.estadisticas()}")
+        print(f"Latencia detección -> alerta de emergencia: {emergencias.estadisticas()}")
+        print(f"Mensajes MQTT por tópico: {mqtt_utils_A.enrutador.estadisticas()}")
+        print(f"Bandeja de salida MQTT: {mqtt_utils_A.bandeja_salida.estadisticas()}")
+        print(f"Conexión MQTT: {mqtt_utils_A.gestor_conexion.estadisticas()}")
+        series_sensores.cerrar()
+        print(f"Lecturas de sensores guardadas: {series_sensores.lecturas_escritas} en {series_sensores.lotes_escritos} lotes.")
+        responder_con_voz("Cerrando programa.", esperar=True)
+        cola_voz.detener()
+        captura_audio.detener()
+        print(f"Captura de audio: {captura_audio.estadisticas([lector_comandos])}")
     except Exception as e:
         print(f"Se ha producido un error inesperado en el bucle principal: {e}")
-        responder_con_voz("Lo siento, se ha producido un error inesperado y necesito reiniciar.")
+        responder_con_voz("Lo siento, se ha producido un error inesperado y necesito reiniciar.", esperar=True)
 
 if __name__ == "__main__":
-    init_db() # Inicializar la base de datos al inicio
-    pygame.mixer.init() 
+    with perfil_arranque.fase("base de datos"):
+        init_db() # Inicializar la base de datos al inicio
     asyncio.run(main_async())
\ No newline at end of file
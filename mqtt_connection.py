@@ -0,0 +1,151 @@
+# mqtt_connection.py
+import random
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+CONECTANDO = "conectando"
+CONECTADO = "conectado"
+RECONECTANDO = "reconectando"
+DESCONECTADO = "desconectado"
+
+
+class GestorConexionMQTT:
+    """
+    Conexión del cliente MQTT sin bloquear a quien la pide.
+
+    `iniciar` usa connect_async y el hilo de red de paho (loop_start), así que
+    retorna al momento; el hilo de paho hace los intentos. Tras cada fallo se
+    espera con retroceso exponencial y variación aleatoria (para que varios
+    dispositivos no reintenten a la vez) y, si hay varios brokers configurados,
+    se prueba el siguiente. Los oyentes de `al_cambiar_estado` reciben
+    (estado, host, puerto) en el hilo de paho; al pasar a CONECTADO es donde hay
+    que volver a suscribirse, porque la sesión se inicia limpia.
+    """
+
+    def __init__(self, client, brokers, keepalive=60, espera_min_s=0.5, espera_max_s=30.0):
+        self.client = client
+        self.keepalive = keepalive
+        self.espera_min_s = espera_min_s
+        self.espera_max_s = espera_max_s
+        self.estado = DESCONECTADO
+        self.fallos_seguidos = 0
+        self.espera_s = 0.0  # Espera antes del próximo intento
+        self.conexiones = 0
+        self.t_ultima_conexion = None
+        self.conectado = threading.Event()
+        self._brokers = []
+        self._indice = 0
+        self._oyentes = []
+        self._iniciado = False
+        self._lock = threading.Lock()
+        self.configurar(brokers)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_connect_fail = self._on_connect_fail
+
+    def configurar(self, brokers, keepalive=None, espera_max_s=None):
+        """`brokers`: lista de {"host": ..., "port": ...} (o tuplas), en orden de preferencia."""
+        lista = [(b["host"], int(b.get("port", 1883))) if isinstance(b, dict) else (b[0], int(b[1])) for b in brokers]
+        if not lista:
+            raise ValueError("Hace falta al menos un broker MQTT.")
+        with self._lock:
+            self._brokers = lista
+            self._indice = 0
+        if keepalive is not None:
+            self.keepalive = keepalive
+        if espera_max_s is not None:
+            self.espera_max_s = espera_max_s
+
+    def broker_actual(self):
+        with self._lock:
+            return self._brokers[self._indice]
+
+    def al_cambiar_estado(self, oyente):
+        """Registra `oyente(estado, host, puerto)`; se llama en el hilo de red de paho."""
+        self._oyentes.append(oyente)
+        return oyente
+
+    def _cambiar_estado(self, estado):
+        self.estado = estado
+        host, puerto = self.broker_actual()
+        for oyente in list(self._oyentes):
+            try:
+                oyente(estado, host, puerto)
+            except Exception as e:
+                print(f"Error en un oyente del estado de la conexión MQTT: {e}")
+
+    def iniciar(self):
+        """Empieza a conectar en segundo plano y retorna enseguida. Llamarlo otra vez no hace nada."""
+        with self._lock:
+            if self._iniciado:
+                return False
+            self._iniciado = True
+        host, puerto = self.broker_actual()
+        print(f"Conectando en segundo plano al broker MQTT {host}:{puerto}...")
+        self._cambiar_estado(CONECTANDO)
+        self.client.reconnect_delay_set(self.espera_min_s, self.espera_min_s)
+        self.client.connect_async(host, puerto, self.keepalive)
+        self.client.loop_start()
+        return True
+
+    def esperar_conexion(self, timeout=None):
+        """Bloquea hasta que haya conexión o venza `timeout`. Retorna True si está conectado."""
+        return self.conectado.wait(timeout)
+
+    def detener(self):
+        with self._lock:
+            if not self._iniciado:
+                return
+            self._iniciado = False
+        self.client.disconnect()
+        self.client.loop_stop()
+        self.conectado.clear()
+        self._cambiar_estado(DESCONECTADO)
+
+    def estadisticas(self):
+        host, puerto = self.broker_actual()
+        return {"estado": self.estado, "broker": f"{host}:{puerto}", "conexiones": self.conexiones,
+                "fallos_seguidos": self.fallos_seguidos}
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            # paho llama después a on_disconnect, que programa el reintento
+            host, puerto = self.broker_actual()
+            print(f"El broker MQTT {host}:{puerto} rechazó la conexión: {mqtt.connack_string(rc)}")
+            return
+        self.fallos_seguidos = 0
+        self.conexiones += 1
+        self.t_ultima_conexion = time.time()
+        host, puerto = self.broker_actual()
+        print(f"Conexión exitosa al broker MQTT {host}:{puerto}" + (" (reconexión)." if self.conexiones > 1 else "."))
+        self.conectado.set()
+        self._cambiar_estado(CONECTADO)
+
+    def _on_disconnect(self, client, userdata, rc):
+        self.conectado.clear()
+        if rc == 0 or not self._iniciado:
+            return  # Desconexión pedida
+        self._programar_reintento(f"conexión perdida ({mqtt.error_string(rc)})")
+
+    def _on_connect_fail(self, client, userdata):
+        self._programar_reintento("no se pudo conectar")
+
+    def _programar_reintento(self, motivo):
+        """En el hilo de paho, antes de su espera: fija la espera del próximo intento y el broker a probar."""
+        self.fallos_seguidos += 1
+        base = min(self.espera_max_s, self.espera_min_s * 2 ** (self.fallos_seguidos - 1))
+        espera = self.espera_s = base / 2 + random.uniform(0, base / 2)
+        anterior = self.broker_actual()
+        with self._lock:
+            if len(self._brokers) > 1:
+                self._indice = (self._indice + 1) % len(self._brokers)
+        host, puerto = self.broker_actual()
+        if (host, puerto) != anterior:
+            self.client.connect_async(host, puerto, self.keepalive)
+        # Con mínimo y máximo iguales, paho espera exactamente `espera` antes del siguiente intento
+        self.client.reconnect_delay_set(espera, espera)
+        destino = f" con {host}:{puerto}" if (host, puerto) != anterior else ""
+        print(f"MQTT: {motivo} con {anterior[0]}:{anterior[1]}; intento {self.fallos_seguidos + 1} en {espera:.1f} s{destino}.")
+        self._cambiar_estado(RECONECTANDO)
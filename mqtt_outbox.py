@@ -0,0 +1,193 @@
+# mqtt_outbox.py
+import sqlite3
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+
+class BandejaSalida:
+    """
+    Cola persistente (SQLite) de los mensajes MQTT a publicar.
+
+    Todo mensaje se guarda antes de enviarse y se borra cuando el broker lo
+    confirma (`confirmar`, desde on_publish), así que sobrevive a cortes del
+    broker y a reinicios del programa. Con `coalescer=True` un mensaje de estado
+    sustituye al pendiente del mismo tópico: solo se envía el último estado.
+    Cada mensaje se entrega al cliente MQTT una sola vez por ejecución: los QoS 1
+    que paho ya tiene (enviados o aceptados sin conexión) los reenvía él mismo
+    al reconectar, con el mismo mid. Por eso, tras un corte, `vaciar` no envía
+    nada nuevo hasta que el broker confirma esos reenvíos (`confirmar` retorna
+    True en ese momento), y así se conserva el orden. Si hay más de
+    `max_pendientes`, se descartan los más antiguos.
+
+    `publicar(topico, payload, qos, retain)` debe retornar el MQTTMessageInfo de
+    paho (o algo con `rc` y `mid`).
+    """
+
+    def __init__(self, db_name="mqtt_outbox.db", max_pendientes=1000):
+        self.db_name = db_name
+        self.max_pendientes = max_pendientes
+        self.encolados = 0
+        self.coalescidos = 0
+        self.descartados = 0
+        self.enviados = 0
+        self.confirmados = 0
+        self.ultimo_vaciado = None  # (mensajes, segundos hasta confirmarlos todos) del último vaciado al (re)conectar
+        self._conn = None
+        self._lock = threading.Lock()  # Base de datos y mensajes en vuelo
+        self._lock_envio = threading.Lock()  # Un solo vaciado a la vez, para conservar el orden
+        self._en_vuelo = {}  # mid -> id de la fila
+        self._confirmados_antes = set()  # mids confirmados antes de registrarse como en vuelo
+        self._reenvios = set()  # mids en vuelo al cortarse la conexión, que paho reenvía al reconectar
+        self._ultimo_id_enviado = 0
+        self._vaciado = None  # [t_inicio, mensajes, terminado_de_enviar] del vaciado al (re)conectar en curso
+        self._medir_vaciado = True  # El primer vaciado tras conectar es el que se mide
+
+    def _db(self):
+        # La base se abre en el primer uso: importar el módulo no crea archivos
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_name, timeout=5.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS salida (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        topico TEXT NOT NULL,
+                        payload BLOB NOT NULL,
+                        qos INTEGER NOT NULL,
+                        retain INTEGER NOT NULL,
+                        clave TEXT,
+                        creado REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_salida_clave ON salida (clave);
+                """)
+        return self._conn
+
+    def encolar(self, topico, payload, qos=1, retain=False, coalescer=False):
+        """Guarda el mensaje para enviarlo. Retorna cuántos mensajes quedan pendientes."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        with self._lock:
+            conn = self._db()
+            with conn:
+                if coalescer:
+                    self.coalescidos += conn.execute("DELETE FROM salida WHERE clave = ?", (topico,)).rowcount
+                conn.execute("INSERT INTO salida (topico, payload, qos, retain, clave, creado) VALUES (?, ?, ?, ?, ?, ?)",
+                             (topico, payload, qos, int(retain), topico if coalescer else None, time.time()))
+                pendientes = conn.execute("SELECT COUNT(*) FROM salida").fetchone()[0]
+                if pendientes > self.max_pendientes:
+                    sobran = pendientes - self.max_pendientes
+                    conn.execute("DELETE FROM salida WHERE id IN (SELECT id FROM salida ORDER BY id LIMIT ?)", (sobran,))
+                    self.descartados += sobran
+                    pendientes = self.max_pendientes
+                    print(f"Bandeja de salida MQTT llena: se descartaron los {sobran} mensajes más antiguos.")
+            self.encolados += 1
+        return pendientes
+
+    def vaciar(self, publicar, esta_conectado=lambda: True):
+        """
+        Envía en orden los mensajes pendientes que aún no se entregaron al
+        cliente MQTT. Se detiene al primer fallo. Retorna cuántos envió.
+        """
+        enviados = 0
+        if not esta_conectado():
+            return enviados
+        with self._lock_envio:
+            with self._lock:
+                if self._reenvios:
+                    # Lo nuevo espera a que paho termine de reenviar lo anterior
+                    return enviados
+                filas = self._db().execute(
+                    "SELECT id, topico, payload, qos, retain FROM salida WHERE id > ? ORDER BY id",
+                    (self._ultimo_id_enviado,)).fetchall()
+                if filas and self._medir_vaciado:
+                    self._vaciado = [time.perf_counter(), 0, False]
+                self._medir_vaciado = False
+            for id_fila, topico, payload, qos, retain in filas:
+                if not esta_conectado():
+                    break
+                # Sin el lock: paho llama a on_publish (confirmar) con sus propios locks tomados
+                info = publicar(topico, payload, qos, bool(retain))
+                # Sin conexión, paho se queda igualmente los QoS > 0 y los envía al reconectar
+                if info.rc != mqtt.MQTT_ERR_SUCCESS and not (qos > 0 and info.rc == mqtt.MQTT_ERR_NO_CONN):
+                    print(f"No se pudo enviar el mensaje MQTT a {topico} (rc={info.rc}); queda en la bandeja.")
+                    break
+                with self._lock:
+                    self._ultimo_id_enviado = id_fila
+                    self.enviados += 1
+                    enviados += 1
+                    if self._vaciado is not None:
+                        self._vaciado[1] += 1
+                    if info.mid in self._confirmados_antes:
+                        self._confirmados_antes.discard(info.mid)
+                        self._borrar(id_fila)
+                    else:
+                        self._en_vuelo[info.mid] = id_fila
+                        if info.rc == mqtt.MQTT_ERR_NO_CONN:
+                            self._reenvios.add(info.mid)
+                if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    break
+            with self._lock:
+                if self._vaciado is not None:
+                    self._vaciado[2] = True
+                    self._medir_fin_vaciado()
+        return enviados
+
+    def confirmar(self, mid):
+        """
+        El broker confirmó el mensaje `mid` (callback on_publish): se borra de la
+        bandeja. Retorna True si era el último reenvío pendiente tras un corte,
+        es decir, si ya se puede volver a `vaciar`.
+        """
+        with self._lock:
+            id_fila = self._en_vuelo.pop(mid, None)
+            if id_fila is None:
+                self._confirmados_antes.add(mid)
+                return False
+            self._borrar(id_fila)
+            if mid in self._reenvios:
+                self._reenvios.discard(mid)
+                return not self._reenvios
+            return False
+
+    def _borrar(self, id_fila):
+        with self._conn:
+            self._conn.execute("DELETE FROM salida WHERE id = ?", (id_fila,))
+        self.confirmados += 1
+        self._medir_fin_vaciado()
+
+    def _medir_fin_vaciado(self):
+        # El vaciado termina cuando ya se envió todo y el broker lo confirmó
+        if self._vaciado is not None and self._vaciado[2] and not self._en_vuelo:
+            inicio, mensajes, _ = self._vaciado
+            self._vaciado = None
+            self.ultimo_vaciado = (mensajes, time.perf_counter() - inicio)
+
+    def desconectado(self):
+        """Lo enviado sin confirmar lo reenvía paho al reconectar; lo nuevo espera a que se confirme."""
+        with self._lock:
+            self._reenvios = set(self._en_vuelo)
+            self._confirmados_antes.clear()
+            self._vaciado = None
+            self._medir_vaciado = True
+
+    def pendientes(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM salida").fetchone()[0]
+
+    def estadisticas(self):
+        estadisticas = {"pendientes": self.pendientes(), "encolados": self.encolados, "coalescidos": self.coalescidos,
+                        "descartados": self.descartados, "enviados": self.enviados, "confirmados": self.confirmados}
+        if self.ultimo_vaciado:
+            mensajes, segundos = self.ultimo_vaciado
+            estadisticas["ultimo_vaciado"] = {"mensajes": mensajes, "segundos": round(segundos, 3),
+                                              "mensajes_por_segundo": round(mensajes / segundos, 1) if segundos else None}
+        return estadisticas
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
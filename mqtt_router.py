@@ -0,0 +1,220 @@
+# mqtt_router.py
+import collections
+import itertools
+import queue
+import threading
+import time
+
+
+class _Nodo:
+    __slots__ = ("hijos", "valores")
+
+    def __init__(self):
+        self.hijos = {}
+        self.valores = []
+
+
+class ArbolTopicos:
+    """
+    Árbol (trie) de filtros de tópicos MQTT por niveles, con comodines `+` (un
+    nivel) y `#` (el resto de niveles, incluido el nivel padre). Buscar un tópico
+    recorre solo las ramas que pueden coincidir, y el resultado de cada tópico se
+    guarda en una caché que se invalida al agregar filtros.
+    """
+
+    def __init__(self, max_cache=4096):
+        self._raiz = _Nodo()
+        self._cache = {}
+        self.max_cache = max_cache
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validar(filtro):
+        niveles = filtro.split("/")
+        for i, nivel in enumerate(niveles):
+            if "#" in nivel and (nivel != "#" or i != len(niveles) - 1):
+                raise ValueError(f"Filtro MQTT inválido '{filtro}': '#' debe ocupar solo el último nivel.")
+            if "+" in nivel and nivel != "+":
+                raise ValueError(f"Filtro MQTT inválido '{filtro}': '+' debe ocupar un nivel completo.")
+        return niveles
+
+    def agregar(self, filtro, valor):
+        niveles = self.validar(filtro)
+        with self._lock:
+            nodo = self._raiz
+            for nivel in niveles:
+                nodo = nodo.hijos.setdefault(nivel, _Nodo())
+            nodo.valores.append(valor)
+            self._cache.clear()
+
+    def buscar(self, topico):
+        """Retorna la lista de valores de todos los filtros que coinciden con `topico`."""
+        with self._lock:
+            resultado = self._cache.get(topico)
+            if resultado is None:
+                resultado = []
+                # Los comodines del primer nivel no coinciden con tópicos de sistema ($SYS/...)
+                self._buscar(self._raiz, topico.split("/"), 0, resultado, topico.startswith("$"))
+                if len(self._cache) >= self.max_cache:
+                    self._cache.clear()
+                self._cache[topico] = resultado
+            return resultado
+
+    def _buscar(self, nodo, niveles, i, resultado, sistema):
+        if i == len(niveles):
+            resultado.extend(nodo.valores)
+            resto = nodo.hijos.get("#")  # 'a/#' también coincide con 'a'
+            if resto is not None:
+                resultado.extend(resto.valores)
+            return
+        hijo = nodo.hijos.get(niveles[i])
+        if hijo is not None:
+            self._buscar(hijo, niveles, i + 1, resultado, sistema)
+        if i == 0 and sistema:
+            return
+        hijo = nodo.hijos.get("+")
+        if hijo is not None:
+            self._buscar(hijo, niveles, i + 1, resultado, sistema)
+        resto = nodo.hijos.get("#")
+        if resto is not None:
+            resultado.extend(resto.valores)
+
+
+Manejador = collections.namedtuple("Manejador", ["filtro", "funcion", "urgente"])
+
+
+class _MetricasTopico:
+    __slots__ = ("recibidos", "procesados", "descartados", "errores", "profundidad_max", "latencias")
+
+    def __init__(self, max_latencias):
+        self.recibidos = 0
+        self.procesados = 0
+        self.descartados = 0
+        self.errores = 0
+        self.profundidad_max = 0
+        self.latencias = collections.deque(maxlen=max_latencias)
+
+
+class EnrutadorMQTT:
+    """
+    Reparte los mensajes MQTT entre los manejadores registrados por filtro
+    (con comodines) y los ejecuta en un grupo acotado de hilos, fuera del hilo de
+    red de paho: `despachar` solo busca en el árbol y encola, así un manejador
+    lento no retrasa los keepalive ni los flujos QoS.
+
+    Cada tópico tiene su propia cola, acotada a `max_cola_topico` mensajes (si
+    se llena se descartan los más antiguos), y sus mensajes se procesan en orden
+    y de uno en uno. Los tópicos con algún manejador `urgente` (emergencias)
+    pasan delante de los demás cuando todos los hilos están ocupados.
+    """
+
+    def __init__(self, max_hilos=4, max_cola_topico=1000, max_latencias=500):
+        self.max_hilos = max_hilos
+        self.max_cola_topico = max_cola_topico
+        self.max_latencias = max_latencias
+        self.sin_manejador = 0
+        self._arbol = ArbolTopicos()
+        self._suscripciones = {}  # filtro -> qos
+        self._colas = {}  # tópico -> deque de (t_recibido, payload)
+        self._metricas = {}
+        self._activos = set()  # Tópicos en la cola de listos o en proceso
+        self._listos = queue.PriorityQueue()
+        self._secuencia = itertools.count()
+        self._lock = threading.Lock()
+        self._hilos = []
+
+    def registrar(self, filtro, funcion, qos=0, urgente=False):
+        """Registra `funcion(topico, payload)` para los tópicos que coinciden con `filtro`."""
+        self._arbol.agregar(filtro, Manejador(filtro, funcion, urgente))
+        with self._lock:
+            self._suscripciones[filtro] = max(qos, self._suscripciones.get(filtro, 0))
+        return funcion
+
+    def suscripciones(self):
+        """Lista de (filtro, qos) a suscribir en el broker."""
+        with self._lock:
+            return list(self._suscripciones.items())
+
+    def despachar(self, topico, payload):
+        """Encola el mensaje para sus manejadores. Retorna False si ningún filtro coincide."""
+        manejadores = self._arbol.buscar(topico)
+        if not manejadores:
+            self.sin_manejador += 1
+            return False
+        ahora = time.perf_counter()
+        with self._lock:
+            cola = self._colas.get(topico)
+            if cola is None:
+                cola = self._colas[topico] = collections.deque()
+                self._metricas[topico] = _MetricasTopico(self.max_latencias)
+            metricas = self._metricas[topico]
+            if len(cola) >= self.max_cola_topico:
+                cola.popleft()
+                metricas.descartados += 1
+            cola.append((ahora, payload))
+            metricas.recibidos += 1
+            metricas.profundidad_max = max(metricas.profundidad_max, len(cola))
+            if topico not in self._activos:
+                self._activos.add(topico)
+                self._encolar_listo(topico, manejadores)
+            if not self._hilos:
+                self._iniciar()
+        return True
+
+    def _encolar_listo(self, topico, manejadores):
+        prioridad = 0 if any(m.urgente for m in manejadores) else 1
+        self._listos.put((prioridad, next(self._secuencia), topico))
+
+    def _iniciar(self):
+        for i in range(self.max_hilos):
+            hilo = threading.Thread(target=self._trabajador, name=f"mqtt-manejador-{i}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def _trabajador(self):
+        while True:
+            _, _, topico = self._listos.get()
+            if topico is None:
+                return
+            with self._lock:
+                t_recibido, payload = self._colas[topico].popleft()
+            manejadores = self._arbol.buscar(topico)
+            errores = 0
+            for manejador in manejadores:
+                try:
+                    manejador.funcion(topico, payload)
+                except Exception as e:
+                    errores += 1
+                    print(f"Error en el manejador MQTT de '{manejador.filtro}' para '{topico}': {e}")
+            latencia = time.perf_counter() - t_recibido
+            with self._lock:
+                metricas = self._metricas[topico]
+                metricas.procesados += 1
+                metricas.errores += errores
+                metricas.latencias.append(latencia)
+                if self._colas[topico]:
+                    self._encolar_listo(topico, manejadores)
+                else:
+                    self._activos.discard(topico)
+
+    def estadisticas(self):
+        """Por tópico: mensajes recibidos, procesados, descartados, cola y latencia recepción -> fin del manejador."""
+        with self._lock:
+            resultado = {}
+            for topico, m in self._metricas.items():
+                latencias = sorted(m.latencias)
+                resultado[topico] = {
+                    "recibidos": m.recibidos, "procesados": m.procesados, "descartados": m.descartados,
+                    "errores": m.errores, "en_cola": len(self._colas[topico]), "profundidad_max": m.profundidad_max,
+                    "latencia_mediana_ms": round(latencias[len(latencias) // 2] * 1000, 2) if latencias else None,
+                    "latencia_p95_ms": round(latencias[int(len(latencias) * 0.95)] * 1000, 2) if latencias else None,
+                    "latencia_max_ms": round(latencias[-1] * 1000, 2) if latencias else None,
+                }
+            return resultado
+
+    def detener(self):
+        """Termina los hilos cuando acaben los mensajes que ya tienen en curso."""
+        with self._lock:
+            hilos, self._hilos = self._hilos, []
+        for _ in hilos:
+            self._listos.put((-1, -1, None))
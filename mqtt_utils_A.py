@@ -1,88 +1,187 @@
 # mqtt_utils_A.py
 import paho.mqtt.client as mqtt
+import os
+import socket
 import threading
 import time # Asegúrate de importar time para usar time.sleep
+from emergency_events import CanalEmergencias
+from mqtt_connection import CONECTADO, GestorConexionMQTT
+from mqtt_outbox import BandejaSalida
+from mqtt_router import EnrutadorMQTT
+from sensor_series import SeriesSensores
 
-BROKER_ADDRESS = "192.168.1.12"  # ¡Mantén esta IP!
+BROKER_ADDRESS = "192.168.1.12"  # ¡Mantén esta IP! (broker por defecto; MQTT_BROKERS en config.json lo cambia)
+BROKER_PORT = 1883
 TOPIC_LUCES = "robot/luces"
 TOPIC_TEMPERATURA = "robot/temperatura"
+TOPIC_TEMPERATURA_HABITACIONES = "hogar/+/temperatura"  # Un sensor por habitación: hogar/<habitación>/temperatura
 TOPIC_CAIDA_DETECTADA = "hogar/emergencia/caida/detectada"
+TOPIC_BOTON_PANICO = "hogar/emergencia/panico/pulsado"
 
 client = mqtt.Client()
+# Conexión en segundo plano con reintentos (retroceso exponencial con variación aleatoria) y brokers alternativos
+gestor_conexion = GestorConexionMQTT(client, [{"host": BROKER_ADDRESS, "port": BROKER_PORT}])
 
-last_two_temperatures = []
-fall_detected_flag = False
-fall_flag_lock = threading.Lock() 
-
-def on_connect(client, userdata, flags, rc):
-    """Callback cuando el cliente MQTT se conecta al broker."""
-    if rc == 0:
-        print("Conexión exitosa al broker MQTT.")
-        client.subscribe(TOPIC_TEMPERATURA)
-        client.subscribe(TOPIC_CAIDA_DETECTADA)
-        print(f"Suscrito a tópico: {TOPIC_TEMPERATURA}")
-        print(f"Suscrito a tópico: {TOPIC_CAIDA_DETECTADA}")
+# Histórico en memoria de cada sensor (buffer circular por tópico); main activa el guardado en SQLite
+series_sensores = SeriesSensores()
+# Las caídas y el botón de pánico se entregan como eventos, no como una bandera a consultar
+emergencias = CanalEmergencias()
+# Manejadores por filtro de tópico (admite + y #), ejecutados fuera del hilo de red de paho.
+# Para un sensor nuevo basta con enrutador.registrar(filtro, funcion) antes de conectar.
+enrutador = EnrutadorMQTT()
+# Todo lo que se publica pasa por una bandeja persistente: si el broker no está, se envía al reconectar
+bandeja_salida = BandejaSalida("mqtt_outbox.db")
+
+def manejar_temperatura(topico, payload):
+    # Los sensores publican a ritmo alto: nada de imprimir cada lectura
+    try:
+        series_sensores.registrar(topico, float(payload.decode()))
+    except ValueError:
+        print(f"Mensaje de temperatura inválido en {topico}: {payload.decode(errors='replace')}")
+
+def manejar_caida(topico, payload):
+    # Primero el evento (interrumpe al momento lo que esté haciendo el asistente), luego el registro
+    emergencias.publicar("detección de caída", payload.decode(errors="replace"))
+    print(f"¡Mensaje de ALERTA DE CAÍDA recibido!: {payload.decode(errors='replace')}")
+
+def manejar_boton_panico(topico, payload):
+    emergencias.publicar("botón de pánico", payload.decode(errors="replace"))
+    print(f"¡Botón de PÁNICO pulsado!: {payload.decode(errors='replace')}")
+
+enrutador.registrar(TOPIC_TEMPERATURA, manejar_temperatura)
+enrutador.registrar(TOPIC_TEMPERATURA_HABITACIONES, manejar_temperatura)
+enrutador.registrar(TOPIC_CAIDA_DETECTADA, manejar_caida, qos=1, urgente=True)
+enrutador.registrar(TOPIC_BOTON_PANICO, manejar_boton_panico, qos=1, urgente=True)
+
+@gestor_conexion.al_cambiar_estado
+def al_cambiar_estado_conexion(estado, host, port):
+    """Oyente del gestor de conexión: suscripciones y bandeja de salida en cada (re)conexión."""
+    if estado == CONECTADO:
+        # Sesión limpia: en cada reconexión hay que volver a suscribirse
+        suscripciones = enrutador.suscripciones()
+        client.subscribe(suscripciones)  # Una sola petición SUBSCRIBE con todos los filtros
+        for filtro, qos in suscripciones:
+            print(f"Suscrito a tópico: {filtro} (QoS {qos})")
+        # Enviar lo que quedó pendiente mientras no había conexión, fuera del hilo de red
+        threading.Thread(target=vaciar_bandeja_salida, name="mqtt-bandeja", daemon=True).start()
     else:
-        print(f"Error al conectar al broker MQTT, código: {rc} - {mqtt.connack_string(rc)}")
-        # Aquí puedes añadir más lógica de depuración si rc indica un problema específico.
-        # Por ejemplo, si rc=5, es un error de autenticación/autorización.
+        # paho reenviará al reconectar lo enviado sin confirmar
+        bandeja_salida.desconectado()
+
+def on_publish(client, userdata, mid):
+    """Callback cuando el broker confirma un mensaje publicado."""
+    if bandeja_salida.confirmar(mid):
+        # paho terminó de reenviar lo que quedó en vuelo: ahora lo que se encoló durante el corte
+        threading.Thread(target=vaciar_bandeja_salida, name="mqtt-bandeja", daemon=True).start()
+
+def vaciar_bandeja_salida():
+    """Envía en orden lo pendiente en la bandeja de salida. Retorna cuántos mensajes envió."""
+    enviados = bandeja_salida.vaciar(client.publish, client.is_connected)
+    if enviados > 1:
+        print(f"Bandeja de salida MQTT: {enviados} mensajes pendientes enviados.")
+    return enviados
+
+def publicar(topico, payload, qos=1, retain=False, coalescer=False):
+    """
+    Publica a través de la bandeja de salida: el mensaje se guarda primero y se
+    envía ya si hay conexión o, si no, en cuanto se reconecte. Con coalescer=True
+    (mensajes de estado) solo se conserva el último pendiente del tópico.
+    Retorna True si se envió ya.
+    """
+    bandeja_salida.encolar(topico, payload, qos, retain, coalescer)
+    return vaciar_bandeja_salida() > 0
 
 def on_message(client, userdata, msg):
-    """Callback para manejar los mensajes recibidos desde el broker MQTT."""
-    global last_two_temperatures 
-    global fall_detected_flag
-    
-    if msg.topic == TOPIC_TEMPERATURA:
-        try:
-            temperature = float(msg.payload.decode()) 
-            print(f"Temperatura recibida: {temperature}")
-
-            last_two_temperatures.append(temperature)
-            if len(last_two_temperatures) > 2:
-                last_two_temperatures.pop(0)
-            print(f"Últimas temperaturas: {last_two_temperatures}")
-        except ValueError:
-            print(f"Mensaje de temperatura inválido: {msg.payload.decode()}")
-        except Exception as e:
-            print(f"Error procesando mensaje de temperatura: {e}")
-    
-    elif msg.topic == TOPIC_CAIDA_DETECTADA:
-        with fall_flag_lock:
-            fall_detected_flag = True
-        print(f"¡Mensaje de ALERTA DE CAÍDA recibido!: {msg.payload.decode()}")
-
-def setup_mqtt():
-    """Configura y conecta el cliente MQTT con reintentos."""
-    client.on_connect = on_connect
+    """Callback para los mensajes recibidos desde el broker MQTT: solo los encola para sus manejadores."""
+    if not enrutador.despachar(msg.topic, msg.payload):
+        print(f"Mensaje sin manejador en el tópico {msg.topic}")
+
+def _leer_exacto(sock, n):
+    datos = b""
+    while len(datos) < n:
+        trozo = sock.recv(n - len(datos))
+        if not trozo:
+            raise ConnectionError("el broker cerró la conexión")
+        datos += trozo
+    return datos
+
+def sondear_broker(host=None, port=None, timeout_s=1.0):
+    """
+    Comprueba si el broker acepta clientes MQTT: abre el puerto TCP, envía un
+    CONNECT (MQTT 3.1.1, sesión limpia) y lee el CONNACK. Sin `host` se sondea el
+    broker que está usando el gestor de conexión.
+    Retorna el código de retorno del CONNACK (0 = aceptado) o None si el broker
+    no respondió (puerto cerrado, sin ruta, tiempo agotado...).
+    """
+    if host is None:
+        host, port = gestor_conexion.broker_actual()
+    id_cliente = f"sondeo-{os.getpid()}".encode()
+    resto = b"\x00\x04MQTT\x04\x02\x00\x0a" + len(id_cliente).to_bytes(2, "big") + id_cliente
+    try:
+        with socket.create_connection((host, port), timeout=timeout_s) as sock:
+            sock.settimeout(timeout_s)
+            sock.sendall(bytes([0x10, len(resto)]) + resto)
+            connack = _leer_exacto(sock, 4)
+            if connack[0] != 0x20:
+                print(f"Sondeo MQTT: respuesta inesperada del broker ({connack.hex()}).")
+                return None
+            if connack[3] == 0:
+                sock.sendall(b"\xe0\x00")  # DISCONNECT
+            return connack[3]
+    except OSError:  # Incluye ConnectionRefusedError y socket.timeout
+        return None
+
+def esperar_broker(host=None, port=None, plazo_s=15.0, espera_inicial_s=0.1, espera_max_s=0.5):
+    """
+    Sondea el broker con espera exponencial hasta que acepte la conexión o se
+    agote `plazo_s`. Retorna True en cuanto el broker está listo y False si no
+    llega a estarlo; si el broker responde pero rechaza la conexión (por ejemplo
+    por autenticación) falla enseguida, porque reintentar no lo arreglaría.
+    """
+    if host is None:
+        host, port = gestor_conexion.broker_actual()
+    inicio = time.monotonic()
+    fin = inicio + plazo_s
+    espera = espera_inicial_s
+    intento = 0
+    while True:
+        intento += 1
+        rc = sondear_broker(host, port, timeout_s=max(0.1, min(1.0, fin - time.monotonic())))
+        if rc == 0:
+            print(f"Broker MQTT listo en {host}:{port} tras {time.monotonic() - inicio:.2f} s ({intento} sondeos).")
+            return True
+        if rc is not None:
+            print(f"El broker MQTT en {host}:{port} rechazó la conexión: {mqtt.connack_string(rc)}")
+            return False
+        restante = fin - time.monotonic()
+        if restante <= 0:
+            print(f"El broker MQTT en {host}:{port} no respondió en {plazo_s:.0f} s ({intento} sondeos).")
+            return False
+        time.sleep(min(espera, restante))
+        espera = min(espera * 2, espera_max_s)
+
+def configurar_brokers(brokers, keepalive=None, espera_max_s=None):
+    """Cambia los brokers (lista de {"host", "port"}, por orden de preferencia) antes de setup_mqtt."""
+    gestor_conexion.configurar(brokers, keepalive, espera_max_s)
+
+def setup_mqtt(esperar_s=0):
+    """
+    Empieza a conectar el cliente MQTT en segundo plano y retorna enseguida: si
+    el broker no está, el hilo de red de paho sigue reintentando por su cuenta.
+    Con `esperar_s` > 0 espera como mucho ese tiempo a la primera conexión.
+    Retorna True si el cliente quedó conectado.
+    """
     client.on_message = on_message
-    
-    max_retries = 10  # Aumenta los intentos
-    retry_delay_seconds = 3 # Espera más entre reintentos
-    
-    for i in range(max_retries):
-        try:
-            print(f"Intento {i+1}/{max_retries}: Conectando a broker MQTT en: {BROKER_ADDRESS}:{1883}...")
-            # Usar 'port' en lugar de 'mqtt_port' para consistencia con la sintaxis de paho-mqtt
-            client.connect(BROKER_ADDRESS, port=1883, keepalive=60) 
-            client.loop_start() # Inicia el loop de red en un hilo separado
-            print("Cliente MQTT: Loop de red iniciado exitosamente.")
-            return # Conexión exitosa, salir de la función
-        except ConnectionRefusedError: # Específico para cuando el broker no está escuchando
-            print(f"Conexión rechazada por el broker. Asegúrate de que Mosquitto está corriendo y escuchando en {BROKER_ADDRESS}:1883.")
-        except Exception as e:
-            print(f"Error general al conectar con el broker MQTT (Intento {i+1}): {e}")
-        
-        if i < max_retries - 1:
-            print(f"Reintentando conexión en {retry_delay_seconds} segundos...")
-            time.sleep(retry_delay_seconds)
-        else:
-            print("Máximo de reintentos de conexión MQTT alcanzado. El cliente no pudo conectar.")
-            # Puedes considerar aquí una notificación de fallo grave si la conexión MQTT es indispensable.
+    client.on_publish = on_publish
+    gestor_conexion.iniciar()
+    return gestor_conexion.esperar_conexion(esperar_s) if esperar_s > 0 else client.is_connected()
 
 def publish_lights_state(state):
-    """Publica el estado de las luces en el broker MQTT."""
-    if client.is_connected():
-        client.publish(TOPIC_LUCES, state, qos=1)
+    """
+    Publica el estado de las luces en el broker MQTT. Si no hay conexión, el
+    último estado pedido se envía al reconectar (un ON seguido de OFF solo envía OFF).
+    """
+    if publicar(TOPIC_LUCES, state, qos=1, coalescer=True):
         print(f"Publicado en {TOPIC_LUCES}: {state}")
     else:
-        print("Error: Cliente MQTT no conectado. No se pudo publicar el estado de las luces. (Desde publish_lights_state)")
\ No newline at end of file
+        print(f"Cliente MQTT no conectado: estado de las luces '{state}' guardado para enviarlo al reconectar.")
\ No newline at end of file
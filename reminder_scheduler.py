@@ -0,0 +1,155 @@
+# reminder_scheduler.py
+import collections
+import datetime
+import heapq
+import threading
+
+from time_parser import RECURRENCIA_SEMANAL, RECURRENCIA_UNA_VEZ
+
+
+class ProgramadorRecordatorios:
+    """
+    Programador de recordatorios con un min-heap de próximas activaciones.
+
+    Los recordatorios se cargan una sola vez y solo se recargan cuando alguien
+    llama a `invalidar()` (al añadir o eliminar). El hilo duerme exactamente
+    hasta el próximo recordatorio, así que el costo de cada ciclo no depende del
+    tamaño de la tabla. Si el hilo se despierta tarde (o el equipo estuvo
+    ocupado), los recordatorios que vencieron desde su última revisión y hace
+    menos de `margen_gracia` se disparan igual; los más antiguos pasan a su
+    siguiente repetición (o se descartan si eran de una sola vez). Solo se
+    recupera lo que venció mientras el programador corría: un recordatorio
+    recién creado (o cargado al arrancar) cuya hora de hoy ya pasó empieza en
+    su siguiente repetición, y si es de una sola vez no se programa.
+
+    Args:
+        cargar: función sin argumentos que retorna la lista de recordatorios
+            (dicts con 'id', 'time_obj', 'message', 'last_triggered_date', 'due_date' y 'recurrence').
+        disparar: función (recordatorio, momento_programado) llamada al vencer.
+        margen_gracia (datetime.timedelta): retraso máximo para disparar un recordatorio perdido.
+    """
+
+    # Tope de espera: protege contra cambios de hora del sistema
+    ESPERA_MAXIMA_S = 300
+
+    def __init__(self, cargar, disparar, margen_gracia=datetime.timedelta(minutes=10), reloj=datetime.datetime.now):
+        self.cargar = cargar
+        self.disparar = disparar
+        self.margen_gracia = margen_gracia
+        self.reloj = reloj
+        self._heap = []
+        self._sucio = True
+        self._detenido = False
+        self._disparados = {}  # id -> fecha del último disparo (por si la base de datos no se actualizó)
+        self._conocidos = set()  # ids cargados en la reconstrucción anterior
+        self._ultima_revision = None  # Último momento en que el hilo miró el reloj
+        self._cond = threading.Condition()
+        self.latencias_s = collections.deque(maxlen=100)  # Retraso de cada disparo respecto a su hora
+
+    def invalidar(self):
+        """Marca la lista como obsoleta: se recargará antes del próximo cálculo."""
+        with self._cond:
+            self._sucio = True
+            self._cond.notify()
+
+    def detener(self):
+        with self._cond:
+            self._detenido = True
+            self._cond.notify()
+
+    def _proxima_activacion(self, recordatorio, ahora, desde):
+        """
+        Fecha y hora de la próxima activación pendiente del recordatorio, o None
+        si ya no tiene más. Las activaciones anteriores a `desde` no se recuperan.
+        """
+        fecha_inicio = recordatorio.get('due_date')
+        ultima = max(filter(None, (recordatorio['last_triggered_date'], self._disparados.get(recordatorio['id']))), default=None)
+        if recordatorio.get('recurrence') == RECURRENCIA_UNA_VEZ:
+            if ultima is not None:
+                return None
+            momento = datetime.datetime.combine(fecha_inicio or ahora.date(), recordatorio['time_obj'])
+            if momento < desde:
+                print(f"Recordatorio ID {recordatorio['id']} de una sola vez para el {momento:%Y-%m-%d a las %H:%M}: "
+                      "esa hora ya pasó, no se programa.")
+                return None
+            return momento
+
+        dia = max(ahora.date(), fecha_inicio) if fecha_inicio else ahora.date()
+        if recordatorio.get('recurrence') == RECURRENCIA_SEMANAL and fecha_inicio:
+            dia += datetime.timedelta(days=(fecha_inicio.weekday() - dia.weekday()) % 7)
+        momento = datetime.datetime.combine(dia, recordatorio['time_obj'])
+        if (ultima is not None and ultima >= dia) or momento < desde:
+            momento = self._siguiente(recordatorio, momento)
+        return momento
+
+    @staticmethod
+    def _siguiente(recordatorio, momento):
+        """Activación que sigue a `momento` según la repetición, o None si no se repite."""
+        recurrencia = recordatorio.get('recurrence')
+        if recurrencia == RECURRENCIA_UNA_VEZ:
+            return None
+        return momento + datetime.timedelta(days=7 if recurrencia == RECURRENCIA_SEMANAL else 1)
+
+    def _programar(self, momento, recordatorio):
+        if momento is not None:
+            heapq.heappush(self._heap, (momento, recordatorio['id'], recordatorio))
+
+    def _reconstruir(self, ahora):
+        # Recuperar solo lo que venció desde la última revisión (y dentro del margen)
+        recuperar_desde = max(self._ultima_revision, ahora - self.margen_gracia) if self._ultima_revision else ahora
+        recordatorios = self.cargar()
+        self._heap = []
+        for r in recordatorios:
+            desde = recuperar_desde if r['id'] in self._conocidos else ahora
+            momento = self._proxima_activacion(r, ahora, desde)
+            if momento is not None:
+                self._heap.append((momento, r['id'], r))
+        heapq.heapify(self._heap)
+        self._conocidos = {r['id'] for r in recordatorios}
+        self._sucio = False
+
+    def _siguiente_vencido(self):
+        """Espera hasta que venza un recordatorio y lo saca del heap. Retorna None si se detuvo."""
+        with self._cond:
+            while not self._detenido:
+                ahora = self.reloj()
+                if self._sucio:
+                    self._reconstruir(ahora)
+                if self._heap:
+                    momento, _, recordatorio = self._heap[0]
+                    espera = (momento - ahora).total_seconds()
+                    if espera <= 0:
+                        heapq.heappop(self._heap)
+                        siguiente = self._siguiente(recordatorio, momento)
+                        if ahora - momento > self.margen_gracia:
+                            print(f"Recordatorio ID {recordatorio['id']} perdido (vencía el {momento:%Y-%m-%d a las %H:%M}); "
+                                  + ("se reprograma." if siguiente else "se descarta."))
+                            self._programar(siguiente, recordatorio)
+                            continue
+                        # Dejar programada la próxima ocurrencia antes de disparar
+                        self._disparados[recordatorio['id']] = momento.date()
+                        self._programar(siguiente, recordatorio)
+                        return recordatorio, momento
+                    self._ultima_revision = ahora
+                    self._cond.wait(min(espera, self.ESPERA_MAXIMA_S))
+                else:
+                    self._ultima_revision = ahora
+                    self._cond.wait(self.ESPERA_MAXIMA_S)
+        return None
+
+    def ejecutar(self):
+        """Bucle del hilo de recordatorios."""
+        print("Iniciando hilo de verificación de recordatorios...")
+        while True:
+            vencido = self._siguiente_vencido()
+            if vencido is None:
+                break
+            recordatorio, momento = vencido
+            latencia = (self.reloj() - momento).total_seconds()
+            self.latencias_s.append(latencia)
+            print(f"Activando recordatorio ID {recordatorio['id']} programado para las {momento:%H:%M} "
+                  f"(retraso {latencia * 1000:.0f} ms).")
+            try:
+                self.disparar(recordatorio, momento)
+            except Exception as e:
+                print(f"Error al activar el recordatorio ID {recordatorio['id']}: {e}")
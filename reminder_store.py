@@ -0,0 +1,187 @@
+# reminder_store.py
+import datetime
+import sqlite3
+import threading
+
+from text_utils import tokenizar
+from time_parser import RECURRENCIA_DIARIA
+
+# Cada migración lleva la base de datos a la versión siguiente (PRAGMA user_version).
+# Nunca modificar una migración ya publicada: añadir una nueva al final.
+MIGRACIONES = [
+    # 1: tabla original de recordatorios
+    """
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        time_hour INTEGER NOT NULL,
+        time_minute INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        last_triggered_date TEXT -- Formato YYYY-MM-DD
+    );
+    """,
+    # 2: índice por hora de activación
+    """
+    CREATE INDEX IF NOT EXISTS idx_reminders_hora ON reminders (time_hour, time_minute);
+    """,
+    # 3: índice de texto completo (FTS5) de los mensajes, sin acentos, sincronizado por triggers
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reminders_fts USING fts5(
+        message, content='reminders', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS reminders_fts_insert AFTER INSERT ON reminders BEGIN
+        INSERT INTO reminders_fts (rowid, message) VALUES (new.id, new.message);
+    END;
+    CREATE TRIGGER IF NOT EXISTS reminders_fts_delete AFTER DELETE ON reminders BEGIN
+        INSERT INTO reminders_fts (reminders_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END;
+    CREATE TRIGGER IF NOT EXISTS reminders_fts_update AFTER UPDATE OF message ON reminders BEGIN
+        INSERT INTO reminders_fts (reminders_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO reminders_fts (rowid, message) VALUES (new.id, new.message);
+    END;
+    INSERT INTO reminders_fts (reminders_fts) VALUES ('rebuild');
+    """,
+    # 4: fecha de la primera (o única) activación y tipo de repetición; los recordatorios existentes siguen siendo diarios
+    """
+    ALTER TABLE reminders ADD COLUMN due_date TEXT; -- Formato YYYY-MM-DD
+    ALTER TABLE reminders ADD COLUMN recurrence TEXT NOT NULL DEFAULT 'diaria';
+    """,
+]
+
+# Palabras que no ayudan a distinguir un recordatorio de otro
+PALABRAS_VACIAS = {
+    "a", "al", "de", "del", "el", "la", "las", "los", "lo", "un", "una", "unos", "unas", "y", "o", "que",
+    "mi", "mis", "me", "por", "para", "con", "en", "recordatorio", "recordatorios", "borrar", "eliminar", "quitar",
+}
+
+
+class ReminderStore:
+    """
+    Acceso a la base de datos de recordatorios.
+
+    Cada hilo (bucle principal, hilo de recordatorios) usa su propia conexión,
+    abierta una sola vez y en modo WAL, así que las lecturas de un hilo no
+    bloquean las escrituras del otro. Las consultas usan siempre el mismo texto
+    SQL para aprovechar la caché de sentencias preparadas de cada conexión.
+    """
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._local = threading.local()
+        self._lock_migracion = threading.Lock()
+        self._migrada = False
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, timeout=5.0, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock_migracion:
+                if not self._migrada:
+                    self._aplicar_migraciones(conn)
+        return conn
+
+    def _aplicar_migraciones(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for numero, sql in enumerate(MIGRACIONES[version:], start=version + 1):
+            # Cada migración y su número de versión se aplican en una sola transacción
+            conn.executescript(f"BEGIN; {sql} PRAGMA user_version = {numero}; COMMIT;")
+            print(f"Base de datos {self.db_name}: migración {numero} aplicada.")
+        self._migrada = True
+
+    def migrar(self):
+        """Abre la conexión (aplicando las migraciones pendientes) y retorna la versión del esquema."""
+        return self._conexion().execute("PRAGMA user_version").fetchone()[0]
+
+    def agregar(self, hour, minute, message, due_date=None, recurrence=RECURRENCIA_DIARIA):
+        """
+        Inserta un recordatorio y retorna su ID.
+        `due_date` (datetime.date) es la primera activación; `recurrence` es una de las RECURRENCIA_* de time_parser.
+        """
+        conn = self._conexion()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO reminders (time_hour, time_minute, message, last_triggered_date, due_date, recurrence) "
+                "VALUES (?, ?, ?, NULL, ?, ?)",
+                (hour, minute, message, due_date.isoformat() if due_date else None, recurrence))
+        return cursor.lastrowid
+
+    def obtener_todos(self):
+        """
+        Retorna todos los recordatorios como diccionarios con objetos de fecha y
+        hora, sin orden (el programador los ordena en su heap). Solo lo llama el
+        programador al reconstruir, es decir, cuando la tabla cambió, no en cada
+        revisión; las fechas se convierten aquí porque el programador las compara
+        con `datetime.date`.
+        """
+        rows = self._conexion().execute(
+            "SELECT id, time_hour, time_minute, message, last_triggered_date, due_date, recurrence FROM reminders"
+        ).fetchall()
+        return self._a_diccionarios(rows)
+
+    def contar(self):
+        """Número total de recordatorios."""
+        return self._conexion().execute("SELECT COUNT(*) FROM reminders").fetchone()[0]
+
+    def listar(self, limite, desplazamiento=0):
+        """Retorna una página de recordatorios, ordenados por hora (usa el índice por hora)."""
+        rows = self._conexion().execute(
+            "SELECT id, time_hour, time_minute, message, last_triggered_date, due_date, recurrence FROM reminders "
+            "ORDER BY time_hour, time_minute, id LIMIT ? OFFSET ?", (limite, desplazamiento)
+        ).fetchall()
+        return self._a_diccionarios(rows)
+
+    def buscar(self, texto, limite=5):
+        """
+        Busca recordatorios por palabras clave del mensaje usando el índice FTS5.
+        Cada palabra se busca por prefijo ('pastilla' encuentra 'pastillas') y sin
+        acentos. Retorna los recordatorios ordenados del más al menos parecido (bm25).
+        """
+        palabras = [p for p in tokenizar(texto) if p not in PALABRAS_VACIAS]
+        if not palabras:
+            return []
+        consulta = " OR ".join(f'"{p}"*' for p in palabras)
+        rows = self._conexion().execute(
+            "SELECT r.id, r.time_hour, r.time_minute, r.message, r.last_triggered_date, r.due_date, r.recurrence "
+            "FROM reminders_fts JOIN reminders r ON r.id = reminders_fts.rowid "
+            "WHERE reminders_fts MATCH ? ORDER BY bm25(reminders_fts) LIMIT ?", (consulta, limite)
+        ).fetchall()
+        return self._a_diccionarios(rows)
+
+    @staticmethod
+    def _a_diccionarios(rows):
+        recordatorios = []
+        for r_id, r_hour, r_minute, r_message, r_last_date_str, r_due_date_str, r_recurrence in rows:
+            try:
+                recordatorios.append({
+                    'id': r_id,
+                    'time_obj': datetime.time(r_hour, r_minute),
+                    'message': r_message,
+                    'last_triggered_date': datetime.date.fromisoformat(r_last_date_str) if r_last_date_str else None,
+                    'due_date': datetime.date.fromisoformat(r_due_date_str) if r_due_date_str else None,
+                    'recurrence': r_recurrence,
+                })
+            except ValueError as e:
+                print(f"Error al procesar recordatorio de la DB (ID: {r_id}): {e}")
+        return recordatorios
+
+    def actualizar_fecha_disparo(self, reminder_id, new_date_str):
+        """Guarda la fecha (YYYY-MM-DD) de la última activación."""
+        conn = self._conexion()
+        with conn:
+            conn.execute("UPDATE reminders SET last_triggered_date = ? WHERE id = ?", (new_date_str, reminder_id))
+
+    def eliminar_por_id(self, reminder_id):
+        """Elimina un recordatorio. Retorna True si existía."""
+        conn = self._conexion()
+        with conn:
+            cursor = conn.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+        return cursor.rowcount > 0
+
+    def cerrar(self):
+        """Cierra la conexión del hilo actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
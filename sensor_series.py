@@ -0,0 +1,158 @@
+# sensor_series.py
+import collections
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+EstadisticasSerie = collections.namedtuple(
+    "EstadisticasSerie", ["lecturas", "actual", "minimo", "maximo", "media", "pendiente_por_hora", "cambio", "duracion_s"])
+
+
+class SerieSensor:
+    """
+    Serie temporal de un sensor en un buffer circular NumPy de tamaño fijo.
+
+    `agregar` es O(1) y no reserva memoria; las estadísticas de una ventana
+    (mínimo, máximo, media y tendencia por mínimos cuadrados) se calculan de forma
+    vectorizada sobre el buffer, sin reordenarlo: ninguna depende del orden.
+    """
+
+    def __init__(self, capacidad=16384):
+        self.capacidad = int(capacidad)
+        self._t = np.empty(self.capacidad, dtype=np.float64)
+        self._v = np.empty(self.capacidad, dtype=np.float64)
+        self.total = 0  # Lecturas recibidas desde el inicio (no se reinicia)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    def agregar(self, t, valor):
+        with self._lock:
+            i = self.total % self.capacidad
+            self._t[i] = t
+            self._v[i] = valor
+            self.total += 1
+
+    def ultimo(self):
+        """Retorna (t, valor) de la lectura más reciente, o None si no hay lecturas."""
+        with self._lock:
+            if not self.total:
+                return None
+            i = (self.total - 1) % self.capacidad
+            return float(self._t[i]), float(self._v[i])
+
+    def estadisticas(self, segundos, ahora=None):
+        """
+        Estadísticas de las lecturas de los últimos `segundos` (EstadisticasSerie),
+        o None si no hay ninguna. `cambio` es la variación según la recta de
+        tendencia a lo largo de la ventana cubierta por las lecturas.
+        """
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            if not self.total:
+                return None
+            n = len(self)
+            en_ventana = self._t[:n] >= ahora - segundos
+            t = self._t[:n][en_ventana]
+            v = self._v[:n][en_ventana]
+            actual = float(self._v[(self.total - 1) % self.capacidad])
+        if not len(v):
+            return None
+        media = v.mean()
+        duracion = float(t.max() - t.min())
+        pendiente = 0.0
+        if duracion > 0:
+            dt = t - t.mean()
+            pendiente = float((dt * (v - media)).sum() / (dt * dt).sum())
+        return EstadisticasSerie(len(v), actual, float(v.min()), float(v.max()), float(media),
+                                 pendiente * 3600, pendiente * duracion, duracion)
+
+
+class SeriesSensores:
+    """
+    Series en memoria por tópico de sensor, con historial opcional en SQLite.
+
+    Las lecturas se guardan al momento en su SerieSensor (las consultas no tocan
+    el disco) y, si se llama a `iniciar_persistencia`, se acumulan y un hilo las
+    escribe por lotes en una sola transacción cada `intervalo_s` segundos o en
+    cuanto se juntan `max_lote` lecturas.
+    """
+
+    def __init__(self, capacidad=16384):
+        self.capacidad = capacidad
+        self.series = {}
+        self.lotes_escritos = 0
+        self.lecturas_escritas = 0
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._hay_lote = threading.Event()
+        self._parar = threading.Event()
+        self._hilo = None
+        self.max_lote = 500
+
+    def registrar(self, topico, valor, t=None):
+        t = time.time() if t is None else t
+        serie = self.series.get(topico)
+        if serie is None:
+            with self._lock:
+                serie = self.series.setdefault(topico, SerieSensor(self.capacidad))
+        serie.agregar(t, valor)
+        if self._hilo is not None:
+            with self._lock:
+                self._pendientes.append((topico, t, valor))
+                if len(self._pendientes) >= self.max_lote:
+                    self._hay_lote.set()
+
+    def serie(self, topico):
+        return self.series.get(topico)
+
+    def iniciar_persistencia(self, db_name="sensores.db", intervalo_s=30.0, max_lote=500):
+        """Arranca el hilo que guarda las lecturas en `db_name` por lotes."""
+        self.max_lote = max_lote
+        self._hilo = threading.Thread(target=self._escritor, args=(db_name, intervalo_s),
+                                      name="sensores-sqlite", daemon=True)
+        self._hilo.start()
+
+    def _escritor(self, db_name, intervalo_s):
+        conn = sqlite3.connect(db_name, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS lecturas (
+                    topico TEXT NOT NULL,
+                    t REAL NOT NULL,
+                    valor REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_lecturas_topico_t ON lecturas (topico, t);
+            """)
+        try:
+            while True:
+                self._hay_lote.wait(intervalo_s)
+                self._hay_lote.clear()
+                parar = self._parar.is_set()  # Se marca antes de despertar: este lote es el último
+                with self._lock:
+                    lote, self._pendientes = self._pendientes, []
+                if lote:
+                    try:
+                        with conn:
+                            conn.executemany("INSERT INTO lecturas (topico, t, valor) VALUES (?, ?, ?)", lote)
+                        self.lotes_escritos += 1
+                        self.lecturas_escritas += len(lote)
+                    except sqlite3.Error as e:
+                        print(f"Error al guardar {len(lote)} lecturas de sensores: {e}")
+                if parar:
+                    return
+        finally:
+            conn.close()
+
+    def cerrar(self):
+        """Escribe las lecturas pendientes y detiene el hilo de persistencia."""
+        if self._hilo is not None:
+            self._parar.set()
+            self._hay_lote.set()
+            self._hilo.join(timeout=5)
+            self._hilo = None
@@ -0,0 +1,235 @@
+# speech_queue.py
+import concurrent.futures
+import itertools
+import queue
+import threading
+import time
+
+# Menor número = mayor prioridad
+PRIORIDAD_EMERGENCIA = 0
+PRIORIDAD_RECORDATORIO = 1
+PRIORIDAD_NORMAL = 2
+
+
+class SolicitudVoz:
+    """
+    Manejador de una frase encolada para reproducir.
+
+    `futuro` se resuelve con True si la frase se reprodujo completa y con False
+    si se interrumpió o canceló. `empezo` se activa al empezar a sonar, y
+    entonces se llama a las funciones registradas con `al_empezar`.
+    """
+
+    def __init__(self, texto, prioridad, secuencia):
+        self.texto = texto
+        self.prioridad = prioridad
+        self.secuencia = secuencia
+        self.futuro = concurrent.futures.Future()
+        self.empezo = threading.Event()
+        self.audio = None  # Future con la ruta del audio si se preparó por adelantado
+        self.t_encolada = time.perf_counter()
+        self.t_inicio = None
+        self.t_fin = None
+        self._al_empezar = []
+        self._lock = threading.Lock()
+
+    def __lt__(self, otra):
+        return (self.prioridad, self.secuencia) < (otra.prioridad, otra.secuencia)
+
+    def esperar(self, timeout=None):
+        """Bloquea hasta que la frase termine. Retorna True si se reprodujo completa."""
+        return self.futuro.result(timeout)
+
+    def cancelar(self):
+        """Cancela la frase si aún no empezó a sonar."""
+        return self.futuro.cancel()
+
+    def al_empezar(self, funcion):
+        """
+        Llama a `funcion(solicitud)` cuando la frase empiece a sonar (en el hilo
+        de la cola), o ya mismo si ya empezó. Si la frase nunca suena (falla la
+        síntesis, se cancela o la corta una emergencia) no se llama.
+        """
+        with self._lock:
+            if not self.empezo.is_set():
+                self._al_empezar.append(funcion)
+                return
+        funcion(self)
+
+    def _marcar_inicio(self):
+        with self._lock:
+            self.t_inicio = time.perf_counter()
+            self.empezo.set()
+            funciones, self._al_empezar = self._al_empezar, []
+        for funcion in funciones:
+            try:
+                funcion(self)
+            except Exception as e:
+                print(f"Error en un aviso de inicio de frase: {e}")
+
+
+class ReproductorPygame:
+    """
+    Reproduce archivos de audio con pygame.mixer.music (solo desde el hilo de la cola).
+    pygame se importa e inicializa en el primer uso o al llamar a `iniciar()`.
+    """
+
+    # Cada cuánto se comprueba si hay que parar (una emergencia corta la frase en este plazo)
+    PERIODO_SONDEO_S = 0.01
+
+    def __init__(self):
+        self._lock_inicio = threading.Lock()
+
+    def iniciar(self):
+        """Importa pygame e inicializa el mezclador (se puede llamar por adelantado en segundo plano)."""
+        with self._lock_inicio:  # El arranque y la primera frase pueden llegar a la vez
+            import pygame
+
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            return pygame
+
+    def reproducir(self, ruta, debe_parar):
+        """Reproduce `ruta` hasta terminar o hasta que `debe_parar()` sea True. Retorna True si terminó."""
+        pygame = self.iniciar()
+        pygame.mixer.music.load(ruta)
+        pygame.mixer.music.play()
+        try:
+            while pygame.mixer.music.get_busy():
+                if debe_parar():
+                    return False
+                time.sleep(self.PERIODO_SONDEO_S)
+            return True
+        finally:
+            # Solo se libera el archivo: queda en la caché para la próxima vez
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+
+
+class ColaVoz:
+    """
+    Hilo dedicado de salida de audio con cola de prioridad.
+
+    Las frases se reproducen de una en una, por prioridad y luego en orden de
+    llegada, así que un recordatorio espera a que termine la frase actual.
+    Una frase de emergencia interrumpe la frase en curso si es de menor prioridad.
+
+    Args:
+        preparar_audio: función texto -> ruta del archivo de audio a reproducir.
+        reproductor: objeto con `reproducir(ruta, debe_parar)`.
+    """
+
+    def __init__(self, preparar_audio, reproductor=None):
+        self.preparar_audio = preparar_audio
+        self.reproductor = reproductor or ReproductorPygame()
+        self._cola = queue.PriorityQueue()
+        self._secuencia = itertools.count()
+        self._actual = None
+        self._interrumpir = threading.Event()
+        self._lock = threading.Lock()
+        self._recientes = []  # (t_fin, texto) de las últimas frases reproducidas
+        self._ocioso = threading.Event()
+        self._ocioso.set()
+        self._pendientes = 0
+        # Síntesis por adelantado de las frases encoladas con precargar=True
+        self._preparador = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="voz-prep")
+        self._hilo = threading.Thread(target=self._bucle, name="cola-voz", daemon=True)
+        self._hilo.start()
+
+    def decir(self, texto, prioridad=PRIORIDAD_NORMAL, precargar=False):
+        """
+        Encola una frase y retorna su SolicitudVoz sin esperar a que suene.
+        Con precargar=True el audio se empieza a preparar ya, en segundo plano,
+        en lugar de cuando le llegue el turno (útil para varias frases seguidas).
+        """
+        solicitud = SolicitudVoz(texto, prioridad, next(self._secuencia))
+        if precargar:
+            solicitud.audio = self._preparador.submit(self.preparar_audio, texto)
+        with self._lock:
+            self._pendientes += 1
+            self._ocioso.clear()
+            actual = self._actual
+            if prioridad == PRIORIDAD_EMERGENCIA and actual is not None and actual.prioridad > prioridad:
+                self._interrumpir.set()
+        self._cola.put(solicitud)
+        return solicitud
+
+    def interrumpir(self):
+        """Detiene la frase en curso (las encoladas siguen su turno)."""
+        with self._lock:
+            if self._actual is not None:
+                self._interrumpir.set()
+
+    def hablando(self):
+        """True si hay una frase sonando o pendiente."""
+        return not self._ocioso.is_set()
+
+    def esperar_silencio(self, timeout=None):
+        """Bloquea hasta que no quede nada por decir. Retorna False si venció el timeout."""
+        return self._ocioso.wait(timeout)
+
+    def es_eco(self, texto, ventana=3.0):
+        """
+        Indica si `texto` reconocido por el micrófono parece ser la propia voz
+        del asistente (está contenido en una frase que sonaba o acaba de sonar).
+        """
+        texto = (texto or "").strip().lower()
+        # Una sola palabra coincide con demasiadas frases: no se considera eco
+        if len(texto.split()) < 2:
+            return False
+        ahora = time.perf_counter()
+        with self._lock:
+            candidatas = [t for fin, t in self._recientes if ahora - fin <= ventana]
+            if self._actual is not None:
+                candidatas.append(self._actual.texto.lower())
+        return any(texto in frase for frase in candidatas)
+
+    def _bucle(self):
+        while True:
+            solicitud = self._cola.get()
+            if isinstance(solicitud, _Centinela):
+                break
+            try:
+                if not solicitud.futuro.set_running_or_notify_cancel():
+                    continue
+                with self._lock:
+                    self._actual = solicitud
+                    self._interrumpir.clear()
+                try:
+                    ruta = solicitud.audio.result() if solicitud.audio else self.preparar_audio(solicitud.texto)
+                    completa = False
+                    # Una emergencia pudo llegar mientras se sintetizaba esta frase
+                    if not self._interrumpir.is_set():
+                        solicitud._marcar_inicio()
+                        completa = self.reproductor.reproducir(ruta, self._interrumpir.is_set)
+                    if not completa:
+                        print(f"Frase interrumpida: '{solicitud.texto}'")
+                    solicitud.futuro.set_result(completa)
+                except Exception as e:
+                    print(f"Error al reproducir el sonido: {e}")
+                    solicitud.futuro.set_result(False)
+                finally:
+                    solicitud.t_fin = time.perf_counter()
+                    with self._lock:
+                        self._actual = None
+                        self._recientes.append((solicitud.t_fin, solicitud.texto.lower()))
+                        self._recientes = self._recientes[-5:]
+            finally:
+                with self._lock:
+                    self._pendientes -= 1
+                    if self._pendientes == 0:
+                        self._ocioso.set()
+
+    def detener(self):
+        """Interrumpe lo que suena y termina el hilo de la cola."""
+        self.interrumpir()
+        self._preparador.shutdown(wait=False)
+        # El centinela tiene la prioridad más baja: se procesa después de lo ya encolado
+        self._cola.put(_Centinela())
+
+
+class _Centinela(SolicitudVoz):
+    """Marca de fin para el hilo de la cola."""
+
+    def __init__(self):
+        super().__init__("", float("inf"), float("inf"))
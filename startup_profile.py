@@ -0,0 +1,110 @@
+# startup_profile.py
+import contextlib
+import threading
+import time
+from concurrent.futures import Future
+
+
+class PerfilArranque:
+    """
+    Línea de tiempo de las fases del arranque (importaciones, modelo de voz,
+    micrófono, MQTT...), medida desde `t_inicio` (time.perf_counter() al
+    empezar el proceso). Se puede usar desde varios hilos a la vez.
+    """
+
+    def __init__(self, t_inicio=None):
+        self.t_inicio = t_inicio if t_inicio is not None else time.perf_counter()
+        self.fases = []  # (nombre, inicio_s, fin_s, hilo)
+        self.hitos = []  # (nombre, t_s)
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre, inicio, fin):
+        """Guarda una fase a partir de sus marcas de time.perf_counter()."""
+        with self._lock:
+            self.fases.append((nombre, inicio - self.t_inicio, fin - self.t_inicio, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def fase(self, nombre):
+        """Mide el bloque `with` como una fase del arranque."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, inicio, time.perf_counter())
+
+    def hito(self, nombre):
+        """Marca un instante (p. ej. 'micrófono activo')."""
+        with self._lock:
+            self.hitos.append((nombre, time.perf_counter() - self.t_inicio))
+
+    def informe(self):
+        """Texto con las fases ordenadas por inicio y una barra proporcional a su duración."""
+        with self._lock:
+            fases = sorted(self.fases, key=lambda f: f[1])
+            hitos = list(self.hitos)
+        total = max([f[2] for f in fases] + [t for _, t in hitos] + [1e-9])
+        ancho = 40
+        lineas = ["Perfil de arranque (segundos desde el inicio del proceso):"]
+        for nombre, inicio, fin, hilo in fases:
+            desde = int(inicio / total * ancho)
+            barra = " " * desde + "#" * max(1, int(fin / total * ancho) - desde)
+            lineas.append(f"  {nombre:<28} {inicio:6.2f} → {fin:6.2f} ({fin - inicio:5.2f} s) |{barra:<{ancho}}| {hilo}")
+        for nombre, t in hitos:
+            lineas.append(f"  * {nombre}: {t:.2f} s")
+        return "\n".join(lineas)
+
+
+class GrafoArranque:
+    """
+    Ejecuta las tareas del arranque en paralelo, cada una en su hilo, respetando
+    sus dependencias: una tarea empieza en cuanto terminan las que necesita y
+    recibe sus resultados como argumentos. Cada tarea queda registrada como fase
+    en el PerfilArranque; quien espera un resultado solo se bloquea por esa tarea.
+
+    Las dependencias deben agregarse antes que las tareas que las usan, así el
+    grafo no puede tener ciclos.
+    """
+
+    def __init__(self, perfil):
+        self.perfil = perfil
+        self._tareas = {}
+
+    def agregar(self, nombre, funcion, depende_de=()):
+        """Lanza `funcion(*resultados_de_dependencias)` en segundo plano. Retorna su Future."""
+        for dependencia in depende_de:
+            if dependencia not in self._tareas:
+                raise ValueError(f"La tarea de arranque '{nombre}' depende de '{dependencia}', que no está definida.")
+        futuro = Future()
+        self._tareas[nombre] = futuro
+        threading.Thread(target=self._ejecutar, args=(nombre, funcion, depende_de, futuro),
+                         name=f"arranque-{nombre}", daemon=True).start()
+        return futuro
+
+    def _ejecutar(self, nombre, funcion, depende_de, futuro):
+        try:
+            argumentos = [self._tareas[d].result() for d in depende_de]
+        except BaseException as e:
+            print(f"Arranque: '{nombre}' no se ejecuta porque falló una dependencia ({e!r}).")
+            futuro.set_exception(e)
+            return
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*argumentos)
+        except BaseException as e:  # También SystemExit (p. ej. setup_vosk sin modelo): se relanza al esperar
+            self.perfil.registrar(f"{nombre} (falló)", inicio, time.perf_counter())
+            print(f"Arranque: falló '{nombre}': {e!r}")
+            futuro.set_exception(e)
+            return
+        self.perfil.registrar(nombre, inicio, time.perf_counter())
+        futuro.set_result(resultado)
+
+    def esperar(self, nombre, timeout=None):
+        """Bloquea hasta que termine la tarea y retorna su resultado (o relanza su error)."""
+        futuro = self._tareas[nombre]
+        if futuro.done():
+            return futuro.result()
+        inicio = time.perf_counter()
+        try:
+            return futuro.result(timeout)
+        finally:
+            self.perfil.registrar(f"espera: {nombre}", inicio, time.perf_counter())
@@ -0,0 +1,71 @@
+# text_utils.py
+import re
+import unicodedata
+
+_NO_PALABRA = re.compile(r"[^\w\s]")
+_ESPACIOS = re.compile(r"\s+")
+# Fin de frase: . ! ? … o salto de línea, seguidos de espacio (no parte "3.5" ni "Sr.Pérez")
+_FIN_FRASE = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Marcas de formato de Markdown que el sintetizador leería en voz alta
+_MARKDOWN = re.compile(r"[*_#`]+|^\s*[-•]\s+", re.MULTILINE)
+
+
+def quitar_acentos(texto):
+    """Quita tildes y diéresis ('recuérdame' -> 'recuerdame', 'ñ' -> 'n')."""
+    descompuesto = unicodedata.normalize("NFD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza texto reconocido o escrito para poder compararlo:
+    minúsculas, sin acentos, sin signos de puntuación y con espacios simples.
+    """
+    texto = quitar_acentos((texto or "").lower())
+    texto = _NO_PALABRA.sub(" ", texto)
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+def tokenizar(texto):
+    """Normaliza el texto y lo divide en palabras."""
+    return normalizar_texto(texto).split()
+
+
+class DivisorFrases:
+    """
+    Divide un texto que llega por fragmentos (respuesta en streaming) en frases
+    completas, para poder decir la primera mientras llegan las siguientes.
+    Las frases de menos de `min_caracteres` se juntan con la siguiente, para no
+    pagar una síntesis por cada "Sí." suelto.
+    """
+
+    def __init__(self, min_caracteres=40):
+        self.min_caracteres = min_caracteres
+        self._pendiente = ""
+
+    def agregar(self, fragmento):
+        """Añade un fragmento y retorna la lista de frases que quedaron completas."""
+        self._pendiente += fragmento
+        partes = _FIN_FRASE.split(self._pendiente)
+        # La última parte puede estar a medias: se guarda hasta el próximo fragmento
+        self._pendiente = partes.pop()
+        frases, actual = [], ""
+        for parte in partes:
+            actual = f"{actual} {parte}".strip() if actual else parte.strip()
+            if len(actual) >= self.min_caracteres:
+                frases.append(actual)
+                actual = ""
+        if actual:
+            self._pendiente = f"{actual} {self._pendiente}"
+        return [f for f in (limpiar_markdown(f) for f in frases) if f]
+
+    def terminar(self):
+        """Retorna lo que queda sin decir al acabar el texto (o None)."""
+        resto = limpiar_markdown(self._pendiente)
+        self._pendiente = ""
+        return resto or None
+
+
+def limpiar_markdown(texto):
+    """Quita asteriscos, almohadillas y viñetas de un texto con formato Markdown."""
+    return _ESPACIOS.sub(" ", _MARKDOWN.sub("", texto)).strip()
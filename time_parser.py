@@ -0,0 +1,302 @@
+# time_parser.py
+import collections
+import datetime
+import re
+
+
+# Cómo se repite un recordatorio (valor de la columna `recurrence`)
+RECURRENCIA_DIARIA = "diaria"
+RECURRENCIA_SEMANAL = "semanal"
+RECURRENCIA_UNA_VEZ = "una_vez"
+
+ExpresionTiempo = collections.namedtuple("ExpresionTiempo", ["hora", "fecha", "recurrencia", "mensaje"])
+ExpresionTiempo.__doc__ = """
+Resultado de interpretar un recordatorio dicho en lenguaje natural.
+
+hora (datetime.time), fecha (datetime.date de la primera activación o None si
+es desde hoy), recurrencia (RECURRENCIA_*) y mensaje (el texto sin la parte de
+la hora, con sus acentos originales).
+"""
+
+# --- Tablas precompiladas (se construyen una sola vez al importar) ---
+
+_NUMEROS = {
+    "cero": 0, "un": 1, "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12,
+    "trece": 13, "catorce": 14, "quince": 15, "dieciseis": 16, "diecisiete": 17,
+    "dieciocho": 18, "diecinueve": 19, "veinte": 20, "veintiun": 21, "veintiuno": 21,
+    "veintiuna": 21, "veintidos": 22, "veintitres": 23, "veinticuatro": 24,
+    "veinticinco": 25, "veintiseis": 26, "veintisiete": 27, "veintiocho": 28, "veintinueve": 29,
+}
+# Decenas que se combinan con "y" + unidad ("treinta y cinco")
+_DECENAS = {"treinta": 30, "cuarenta": 40, "cincuenta": 50}
+_FRACCIONES = {"cuarto": 15, "media": 30}
+_PERIODOS = {"madrugada", "manana", "mediodia", "tarde", "noche"}
+_DIAS_SEMANA = {"lunes": 0, "martes": 1, "miercoles": 2, "jueves": 3, "viernes": 4, "sabado": 5, "domingo": 6}
+_DIAS_SEMANA_PLURAL = dict(_DIAS_SEMANA, sabados=5, domingos=6)
+_MESES = {m: i for i, m in enumerate(("enero febrero marzo abril mayo junio julio agosto septiembre "
+                                     "octubre noviembre diciembre").split(), start=1)}
+_UNIDADES_TIEMPO = {"minuto": 1, "minutos": 1, "hora": 60, "horas": 60}
+_DIARIO = {"dia", "dias", "manana", "mananas", "tarde", "tardes", "noche", "noches"}
+# Palabras de orden al inicio del mensaje ("recuérdame que ...")
+_ORDENES = {"recuerdame", "recordarme", "recordar", "recuerda", "avisame", "recordatorio", "que", "de", "para"}
+# Palabras que quedan colgando al quitar la hora ("tomar la pastilla a")
+_CONECTORES = {"a", "al", "de", "del", "el", "la", "las", "los", "y", "para", "que", "desde", "por", "en"}
+
+# Palabras con las que puede empezar una expresión de tiempo; el resto se salta sin más comprobaciones
+_INICIOS = {"a", "al", "en", "dentro", "diariamente", "cada", "todos", "todas", "los", "el", "de", "por", "del",
+            "esta", "hoy", "pasado", "manana"}
+
+_TOKEN = re.compile(r"\w+")
+# Quita los acentos del español sin cambiar la longitud del texto (las posiciones siguen valiendo)
+_SIN_ACENTOS = str.maketrans("áéíóúüñàèìòù", "aeiouunaeiou")
+
+
+def _leer_numero(norm, i):
+    """Lee un número (dígitos o palabras) en la posición i. Retorna (valor, siguiente) o None."""
+    if i >= len(norm):
+        return None
+    palabra = norm[i]
+    if palabra.isdigit():
+        return int(palabra), i + 1
+    if palabra in _NUMEROS:
+        return _NUMEROS[palabra], i + 1
+    if palabra in _DECENAS:
+        valor = _DECENAS[palabra]
+        if i + 2 < len(norm) and norm[i + 1] == "y" and norm[i + 2] in _NUMEROS and _NUMEROS[norm[i + 2]] < 10:
+            return valor + _NUMEROS[norm[i + 2]], i + 3
+        return valor, i + 1
+    return None
+
+
+def _leer_reloj(norm, i):
+    """
+    Lee una hora de reloj ("ocho", "ocho y cuarto", "siete treinta y dos",
+    "nueve menos diez", "8 30", "ocho en punto"). Retorna (hora, minutos, signo, siguiente) o None.
+    """
+    leido = _leer_numero(norm, i)
+    if leido is None or leido[0] > 24:
+        return None
+    hora, i = leido
+    minutos, signo = 0, 1
+    if i + 1 < len(norm) and norm[i] in ("y", "menos"):
+        signo = 1 if norm[i] == "y" else -1
+        if norm[i + 1] in _FRACCIONES:
+            minutos, i = _FRACCIONES[norm[i + 1]], i + 2
+        else:
+            leido = _leer_numero(norm, i + 1)
+            if leido is not None and leido[0] < 60:
+                minutos, i = leido[0], leido[1]
+            else:
+                signo = 1
+    else:
+        # "siete treinta", "8 30": minutos sin "y"
+        leido = _leer_numero(norm, i)
+        if leido is not None and leido[0] < 60 and (norm[i].isdigit() or leido[0] >= 10):
+            minutos, i = leido
+    if norm[i:i + 2] == ["en", "punto"]:
+        i += 2
+    return hora, minutos, signo, i
+
+
+def _leer_periodo(norm, i):
+    """Lee "de la tarde", "por la mañana", "del mediodía", "de la madrugada". Retorna (periodo, siguiente) o None."""
+    if norm[i:i + 2] in (["de", "la"], ["por", "la"], ["en", "la"]) and i + 2 < len(norm) and norm[i + 2] in _PERIODOS:
+        return norm[i + 2], i + 3
+    if norm[i:i + 2] in (["del", "mediodia"], ["al", "mediodia"]):
+        return "mediodia", i + 2
+    return None
+
+
+def _ajustar_periodo(hora, periodo):
+    """Pasa una hora de 12 a 24 horas según el periodo del día."""
+    if periodo in ("tarde", "mediodia") and hora < 12:
+        return hora + 12
+    if periodo == "noche":
+        if 5 <= hora < 12:
+            return hora + 12
+        if hora == 12:
+            return 0
+    if periodo == "madrugada" and hora == 12:
+        return 0
+    return hora
+
+
+def _proximo_dia_semana(desde, dia_semana):
+    return desde + datetime.timedelta(days=(dia_semana - desde.weekday()) % 7)
+
+
+def interpretar_tiempo(texto, ahora=None):
+    """
+    Interpreta un recordatorio dicho en lenguaje natural en una sola pasada sobre
+    sus palabras. Entiende horas ("a las ocho y cuarto de la tarde", "a las siete
+    treinta y dos"), tiempos relativos ("en veinte minutos", "dentro de una hora y
+    media"), fechas ("mañana", "pasado mañana", "el lunes", "el cinco de marzo") y
+    repeticiones ("cada día", "todos los días", "los lunes").
+
+    Sin fecha ni repetición explícita el recordatorio es diario, como siempre.
+    Retorna un ExpresionTiempo, o None si no hay una hora reconocible.
+    """
+    ahora = ahora or datetime.datetime.now()
+    texto = texto or ""
+    coincidencias = list(_TOKEN.finditer(texto.lower().translate(_SIN_ACENTOS)))
+    norm = [m.group() for m in coincidencias]
+    originales = [texto[m.start():m.end()] for m in coincidencias]
+    usados = [False] * len(norm)
+
+    reloj = None        # (hora, minutos, signo)
+    periodo = None
+    relativo = None     # minutos desde ahora
+    fecha = None
+    dia_semana = None
+    recurrencia = None
+
+    def consumir(desde, hasta):
+        for k in range(desde, hasta):
+            usados[k] = True
+        return hasta
+
+    i = 0
+    while i < len(norm):
+        palabra = norm[i]
+        if palabra not in _INICIOS:
+            i += 1
+            continue
+        siguiente = norm[i + 1] if i + 1 < len(norm) else None
+
+        # "a las ocho ...", "a la una ..."
+        if palabra == "a" and siguiente in ("las", "la") and reloj is None:
+            leido = _leer_reloj(norm, i + 2)
+            if leido is not None:
+                reloj, j = leido[:3], leido[3]
+                periodo_leido = _leer_periodo(norm, j)
+                if periodo_leido:
+                    periodo, j = periodo_leido
+                i = consumir(i, j)
+                continue
+            if siguiente == "la" and norm[i + 2:i + 3] == ["medianoche"]:
+                reloj, i = (0, 0, 1), consumir(i, i + 3)
+                continue
+
+        if palabra in ("al", "a") and siguiente in ("mediodia", "medianoche") and reloj is None:
+            reloj = (12, 0, 1) if siguiente == "mediodia" else (0, 0, 1)
+            i = consumir(i, i + 2)
+            continue
+
+        # "en veinte minutos", "dentro de una hora y media", "en media hora", "en un cuarto de hora"
+        if palabra in ("en", "dentro") and relativo is None:
+            j = i + 2 if palabra == "dentro" and siguiente == "de" else i + 1
+            total = None
+            if norm[j:j + 2] == ["media", "hora"]:
+                total, j = 30, j + 2
+            elif norm[j:j + 4] == ["un", "cuarto", "de", "hora"]:
+                total, j = 15, j + 4
+            else:
+                leido = _leer_numero(norm, j)
+                if leido is not None and leido[1] < len(norm) and norm[leido[1]] in _UNIDADES_TIEMPO:
+                    total = leido[0] * _UNIDADES_TIEMPO[norm[leido[1]]]
+                    j = leido[1] + 1
+                    # "... y media", "... y cuarto", "... y diez minutos"
+                    if total % 60 == 0 and j + 1 < len(norm) and norm[j] == "y":
+                        if norm[j + 1] in _FRACCIONES:
+                            total, j = total + _FRACCIONES[norm[j + 1]], j + 2
+                        else:
+                            extra = _leer_numero(norm, j + 1)
+                            if extra is not None and extra[1] < len(norm) and norm[extra[1]] in ("minuto", "minutos"):
+                                total, j = total + extra[0], extra[1] + 1
+            if total is not None:
+                relativo = total
+                i = consumir(i, j)
+                continue
+
+        # "cada día", "cada lunes", "todos los días", "todas las noches", "los martes", "diariamente"
+        if palabra == "diariamente":
+            recurrencia = RECURRENCIA_DIARIA
+            i = consumir(i, i + 1)
+            continue
+        if palabra == "cada" and siguiente is not None:
+            if siguiente in _DIARIO:
+                recurrencia, i = RECURRENCIA_DIARIA, consumir(i, i + 2)
+                continue
+            if siguiente in _DIAS_SEMANA_PLURAL:
+                recurrencia, dia_semana, i = RECURRENCIA_SEMANAL, _DIAS_SEMANA_PLURAL[siguiente], consumir(i, i + 2)
+                continue
+        if palabra in ("todos", "todas") and siguiente in ("los", "las") and i + 2 < len(norm):
+            if norm[i + 2] in _DIARIO:
+                recurrencia, i = RECURRENCIA_DIARIA, consumir(i, i + 3)
+                continue
+            if norm[i + 2] in _DIAS_SEMANA_PLURAL:
+                recurrencia, dia_semana, i = RECURRENCIA_SEMANAL, _DIAS_SEMANA_PLURAL[norm[i + 2]], consumir(i, i + 3)
+                continue
+        if palabra == "los" and siguiente in _DIAS_SEMANA_PLURAL:
+            recurrencia, dia_semana, i = RECURRENCIA_SEMANAL, _DIAS_SEMANA_PLURAL[siguiente], consumir(i, i + 2)
+            continue
+
+        # "el lunes", "el cinco de marzo", "el 5 de marzo"
+        if palabra == "el" and siguiente in _DIAS_SEMANA:
+            dia_semana, i = _DIAS_SEMANA[siguiente], consumir(i, i + 2)
+            continue
+        if palabra == "el":
+            leido = _leer_numero(norm, i + 1)
+            resto = norm[leido[1]:leido[1] + 2] if leido is not None else []
+            if len(resto) == 2 and resto[0] == "de" and resto[1] in _MESES:
+                dia, mes = leido[0], _MESES[resto[1]]
+                try:
+                    fecha = datetime.date(ahora.year, mes, dia)
+                    if fecha < ahora.date():
+                        fecha = fecha.replace(year=ahora.year + 1)
+                except ValueError:
+                    fecha = None
+                else:
+                    i = consumir(i, leido[1] + 2)
+                    continue
+
+        # "de la tarde" suelto ("mañana por la tarde a las cinco"), "esta noche"
+        periodo_leido = _leer_periodo(norm, i)
+        if periodo_leido:
+            periodo, j = periodo_leido
+            i = consumir(i, j)
+            continue
+        if palabra == "esta" and siguiente in ("manana", "tarde", "noche"):
+            periodo, fecha, i = siguiente, ahora.date(), consumir(i, i + 2)
+            continue
+
+        # "hoy", "mañana", "pasado mañana"
+        if palabra == "hoy":
+            fecha, i = ahora.date(), consumir(i, i + 1)
+            continue
+        if palabra == "pasado" and siguiente == "manana":
+            fecha, i = ahora.date() + datetime.timedelta(days=2), consumir(i, i + 2)
+            continue
+        if palabra == "manana":
+            fecha, i = ahora.date() + datetime.timedelta(days=1), consumir(i, i + 1)
+            continue
+
+        i += 1
+
+    if relativo is not None:
+        momento = ahora + datetime.timedelta(minutes=relativo)
+        hora, fecha = momento.time().replace(second=0, microsecond=0), momento.date()
+        recurrencia = recurrencia or RECURRENCIA_UNA_VEZ
+    elif reloj is not None:
+        hora_reloj, minutos, signo = reloj
+        total = (_ajustar_periodo(hora_reloj % 24, periodo) * 60 + signo * minutos) % (24 * 60)
+        hora = datetime.time(total // 60, total % 60)
+        if dia_semana is not None:
+            # El mismo día de la semana cuenta solo si la hora aún no pasó
+            desde = ahora.date() if datetime.datetime.combine(ahora.date(), hora) > ahora else ahora.date() + datetime.timedelta(days=1)
+            fecha = _proximo_dia_semana(desde, dia_semana)
+        if recurrencia is None:
+            recurrencia = RECURRENCIA_UNA_VEZ if fecha is not None else RECURRENCIA_DIARIA
+    else:
+        return None
+
+    # El mensaje es lo que no forma parte de la hora, sin las palabras de orden del inicio
+    restantes = [(o, n) for o, n, u in zip(originales, norm, usados) if not u]
+    while restantes and restantes[0][1] in _ORDENES:
+        restantes.pop(0)
+    while restantes and restantes[-1][1] in _CONECTORES:
+        restantes.pop()
+    mensaje = " ".join(o for o, _ in restantes)
+
+    return ExpresionTiempo(hora, fecha, recurrencia, mensaje)
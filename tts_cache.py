@@ -0,0 +1,118 @@
+# tts_cache.py
+import hashlib
+import os
+import threading
+
+
+class TTSCache:
+    """
+    Caché en disco de audio sintetizado, direccionada por contenido.
+
+    Cada archivo se identifica por el hash de (texto, idioma, motor), así que la
+    misma frase nunca se vuelve a sintetizar. Cuando el tamaño total supera
+    `max_bytes` se eliminan primero los archivos usados hace más tiempo (LRU,
+    usando la fecha de modificación como marca de último uso).
+    """
+
+    def __init__(self, directorio="CacheVoz", max_bytes=50 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+        if not os.path.exists(self.directorio):
+            os.makedirs(self.directorio)
+
+        # Limpiar restos de escrituras interrumpidas y calcular el tamaño actual
+        self._tamanos = {}
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            if not os.path.isfile(ruta):
+                continue
+            if nombre.endswith(".tmp"):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+                continue
+            self._tamanos[ruta] = os.path.getsize(ruta)
+        self.tamano_total = sum(self._tamanos.values())
+
+    @staticmethod
+    def clave(texto, lang, engine):
+        """Devuelve la clave de contenido (sha256) para una frase."""
+        contenido = f"{engine}\x00{lang}\x00{texto.strip()}"
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def ruta(self, texto, lang, engine, extension="mp3"):
+        """Ruta del archivo de audio correspondiente a la frase (exista o no)."""
+        return os.path.join(self.directorio, f"{self.clave(texto, lang, engine)}.{extension}")
+
+    def obtener(self, texto, lang, engine, extension="mp3"):
+        """
+        Retorna la ruta del audio si ya está en caché, o None.
+        Un acierto actualiza la marca de último uso del archivo.
+        """
+        ruta = self.ruta(texto, lang, engine, extension)
+        with self._lock:
+            if ruta not in self._tamanos:
+                return None
+            try:
+                os.utime(ruta, None)
+            except OSError:
+                # El archivo desapareció por fuera de la caché
+                self.tamano_total -= self._tamanos.pop(ruta)
+                return None
+            self.aciertos += 1
+        return ruta
+
+    def obtener_o_sintetizar(self, texto, lang, engine, sintetizar, extension="mp3"):
+        """
+        Retorna la ruta del audio de la frase, sintetizándolo con
+        `sintetizar(texto, ruta_salida)` solo si no estaba en caché.
+        """
+        ruta = self.obtener(texto, lang, engine, extension)
+        if ruta:
+            return ruta
+
+        ruta = self.ruta(texto, lang, engine, extension)
+        # Escribir en un archivo temporal y renombrar, para no dejar audios a medias
+        ruta_tmp = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            sintetizar(texto, ruta_tmp)
+            os.replace(ruta_tmp, ruta)
+        finally:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+
+        with self._lock:
+            self.fallos += 1
+            self.tamano_total -= self._tamanos.get(ruta, 0)
+            self._tamanos[ruta] = os.path.getsize(ruta)
+            self.tamano_total += self._tamanos[ruta]
+            self._desalojar(conservar=ruta)
+        return ruta
+
+    def _desalojar(self, conservar=None):
+        """Elimina los archivos menos usados hasta quedar bajo el límite. Requiere el lock."""
+        if self.tamano_total <= self.max_bytes:
+            return
+
+        def ultimo_uso(ruta):
+            try:
+                return os.path.getmtime(ruta)
+            except OSError:
+                return 0
+
+        for ruta in sorted(self._tamanos, key=ultimo_uso):
+            if self.tamano_total <= self.max_bytes:
+                break
+            if ruta == conservar:
+                continue
+            try:
+                os.remove(ruta)
+            except OSError as e:
+                print(f"Error al eliminar audio de la caché {ruta}: {e}")
+                continue
+            self.tamano_total -= self._tamanos.pop(ruta)
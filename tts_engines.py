@@ -0,0 +1,232 @@
+# tts_engines.py
+import concurrent.futures
+import importlib.util
+import shutil
+import subprocess
+import threading
+import time
+
+
+class TTSEngine:
+    """Interfaz común de los motores de síntesis de voz."""
+
+    nombre = "base"
+    extension = "mp3"
+    requiere_red = False
+
+    def disponible(self):
+        """Indica si el motor puede usarse en este equipo."""
+        return True
+
+    def sintetizar(self, texto, lang, archivo_salida):
+        """Sintetiza `texto` y guarda el audio en `archivo_salida`."""
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Motor en la nube de Google Translate (gTTS). Necesita red."""
+
+    nombre = "gtts"
+    extension = "mp3"
+    requiere_red = True
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def disponible(self):
+        # Se comprueba sin importar: gtts se carga en la primera síntesis
+        return importlib.util.find_spec("gtts") is not None
+
+    def sintetizar(self, texto, lang, archivo_salida):
+        from gtts import gTTS
+        tts = gTTS(text=texto, lang=lang, timeout=self.timeout)
+        tts.save(archivo_salida)
+
+
+class EspeakEngine(TTSEngine):
+    """Motor local (sin red) usando el ejecutable espeak-ng o espeak."""
+
+    nombre = "espeak"
+    extension = "wav"
+
+    def __init__(self, velocidad=150, timeout=10):
+        self.velocidad = velocidad
+        self.timeout = timeout
+        self.ejecutable = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def disponible(self):
+        return self.ejecutable is not None
+
+    def sintetizar(self, texto, lang, archivo_salida):
+        if not self.ejecutable:
+            raise RuntimeError("espeak no está instalado.")
+        subprocess.run([self.ejecutable, "-v", lang, "-s", str(self.velocidad), "-w", archivo_salida, texto],
+                       check=True, capture_output=True, timeout=self.timeout)
+
+
+class Pyttsx3Engine(TTSEngine):
+    """Motor local (sin red) usando pyttsx3 (SAPI5 en Windows, espeak en Linux)."""
+
+    nombre = "pyttsx3"
+    extension = "wav"
+
+    def __init__(self, velocidad=150):
+        self.velocidad = velocidad
+        # pyttsx3 no es seguro entre hilos
+        self._lock = threading.Lock()
+
+    def disponible(self):
+        return importlib.util.find_spec("pyttsx3") is not None
+
+    def sintetizar(self, texto, lang, archivo_salida):
+        import pyttsx3
+        with self._lock:
+            engine = pyttsx3.init()
+            engine.setProperty("rate", self.velocidad)
+            for voz in engine.getProperty("voices"):
+                idiomas = [l.decode() if isinstance(l, bytes) else str(l) for l in (voz.languages or [])]
+                if any(lang in idioma for idioma in idiomas) or lang in voz.id.lower():
+                    engine.setProperty("voice", voz.id)
+                    break
+            engine.save_to_file(texto, archivo_salida)
+            engine.runAndWait()
+            engine.stop()
+
+
+MOTORES_TTS = {
+    GTTSEngine.nombre: GTTSEngine,
+    EspeakEngine.nombre: EspeakEngine,
+    Pyttsx3Engine.nombre: Pyttsx3Engine,
+}
+
+
+def crear_motor(nombre, **opciones):
+    """
+    Crea un motor de voz a partir de su nombre en config.json. Si el nombre no
+    existe lo avisa y retorna None: un error en la configuración no debe
+    impedir que arranque el asistente.
+    """
+    if nombre not in MOTORES_TTS:
+        print(f"Advertencia: motor de voz desconocido: '{nombre}' (opciones: {', '.join(MOTORES_TTS)}). Se ignora.")
+        return None
+    return MOTORES_TTS[nombre](**opciones)
+
+
+class MotorConRespaldo:
+    """
+    Cadena de motores de voz con respaldo automático.
+
+    Se prueba cada motor en orden; si uno falla o tarda más de `timeout`
+    segundos se pasa al siguiente. Un motor que falló se salta durante
+    `enfriamiento` segundos, para no pagar el timeout en cada frase mientras
+    la red está caída. Una síntesis lenta que se abandonó sigue en segundo
+    plano y deja su audio en la caché para la próxima vez.
+
+    El audio en caché de un motor de respaldo solo se usa si el principal no
+    puede sintetizar; esas frases se vuelven a sintetizar en segundo plano con
+    el principal cuando vuelve a responder.
+
+    Los motores None (nombre desconocido) o no disponibles se ignoran; si no
+    queda ninguno, las frases solo se escriben en el log.
+    """
+
+    def __init__(self, motores, timeout=3.0, enfriamiento=60, max_por_resintetizar=200):
+        motores = [m for m in motores if m is not None]
+        self.motores = [m for m in motores if m.disponible()]
+        no_disponibles = [m.nombre for m in motores if m not in self.motores]
+        if no_disponibles:
+            print(f"Advertencia: motores de voz no disponibles: {', '.join(no_disponibles)}")
+        if not self.motores:
+            print("Advertencia: ningún motor de voz disponible. Las frases solo se mostrarán como texto.")
+        self.timeout = timeout
+        self.enfriamiento = enfriamiento
+        self.max_por_resintetizar = max_por_resintetizar
+        self._fallido_hasta = {}
+        self._por_resintetizar = set()  # (texto, lang) servidos con la voz de un motor de respaldo
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+
+    def _en_enfriamiento(self, motor):
+        return time.time() < self._fallido_hasta.get(motor.nombre, 0)
+
+    def sintetizar(self, cache, texto, lang):
+        """
+        Retorna (ruta_audio, nombre_motor) para la frase.
+        Cada motor, en orden, primero busca la frase en su caché y, si no está,
+        la sintetiza; se pasa al siguiente solo si este falla, tarda o está en
+        enfriamiento.
+        """
+        if not self.motores:
+            print(f"(Sin voz) {texto}")
+            raise RuntimeError("Ningún motor de voz disponible.")
+
+        ultimo_error = None
+        for i, motor in enumerate(self.motores):
+            ruta = cache.obtener(texto, lang, motor.nombre, motor.extension)
+            if ruta:
+                return self._entregar(cache, texto, lang, i, ruta)
+
+            es_ultimo = i == len(self.motores) - 1
+            if self._en_enfriamiento(motor) and not es_ultimo:
+                continue
+
+            futuro = self._executor.submit(
+                cache.obtener_o_sintetizar, texto, lang, motor.nombre,
+                lambda t, ruta, m=motor: m.sintetizar(t, lang, ruta), motor.extension)
+            try:
+                # Al último motor no se le pone límite: es la última opción
+                ruta = futuro.result(timeout=None if es_ultimo else self.timeout)
+                self._fallido_hasta.pop(motor.nombre, None)
+                return self._entregar(cache, texto, lang, i, ruta)
+            except concurrent.futures.TimeoutError:
+                ultimo_error = f"el motor '{motor.nombre}' tardó más de {self.timeout} s"
+            except Exception as e:
+                ultimo_error = f"el motor '{motor.nombre}' falló: {e}"
+            print(f"Advertencia: {ultimo_error}. Usando motor de respaldo.")
+            self._fallido_hasta[motor.nombre] = time.time() + self.enfriamiento
+
+        raise RuntimeError(f"No se pudo sintetizar la frase: {ultimo_error}")
+
+    def _entregar(self, cache, texto, lang, indice, ruta):
+        """Anota las frases servidas por un respaldo y, si respondió el principal, rehace las anotadas."""
+        motor = self.motores[indice]
+        if indice > 0:
+            with self._lock:
+                if len(self._por_resintetizar) < self.max_por_resintetizar:
+                    self._por_resintetizar.add((texto, lang))
+        else:
+            with self._lock:
+                pendientes, self._por_resintetizar = self._por_resintetizar, set()
+            for texto_pendiente, lang_pendiente in pendientes:
+                self._executor.submit(self._resintetizar, cache, texto_pendiente, lang_pendiente)
+        return ruta, motor.nombre
+
+    def _resintetizar(self, cache, texto, lang):
+        """En segundo plano: deja en caché la frase con la voz del motor principal."""
+        principal = self.motores[0]
+        try:
+            cache.obtener_o_sintetizar(texto, lang, principal.nombre,
+                                       lambda t, ruta: principal.sintetizar(t, lang, ruta), principal.extension)
+        except Exception as e:
+            print(f"No se pudo volver a sintetizar con '{principal.nombre}' la frase '{texto}': {e}")
+            with self._lock:
+                self._por_resintetizar.add((texto, lang))
+
+    def precalentar(self, cache, frases, lang):
+        """
+        Sintetiza por adelantado las frases que aún no están en caché,
+        usando la misma cadena de respaldo. Retorna el número de frases listas.
+        """
+        if not self.motores:
+            print("Caché de voz sin precalentar: no hay ningún motor de voz disponible.")
+            return 0
+        inicio = time.time()
+        listas = 0
+        for frase in frases:
+            try:
+                self.sintetizar(cache, frase, lang)
+                listas += 1
+            except Exception as e:
+                print(f"No se pudo precalentar la frase '{frase}': {e}")
+        print(f"Caché de voz precalentada: {listas} de {len(frases)} frases listas en {time.time() - inicio:.1f} s.")
+        return listas
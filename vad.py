@@ -0,0 +1,138 @@
+# vad.py
+import collections
+import time
+
+import numpy as np
+
+
+class CompuertaVAD:
+    """
+    Detector de actividad de voz (energía + cruces por cero) para no decodificar silencio.
+
+    Cada bloque de audio se divide en tramas cortas; una trama es voz si su
+    energía supera el piso de ruido en `margen_db` y su tasa de cruces por cero
+    es la de una voz (o si la energía es claramente alta). El piso de ruido es
+    un percentil bajo de la energía de todas las tramas de los últimos
+    `ventana_ruido_s` segundos, también las marcadas como voz (entre palabras
+    siempre hay fondo), así que sube si el ambiente se vuelve más ruidoso y
+    baja si se vuelve más silencioso; nunca baja de `piso_min_db`, para que
+    el silencio digital no deje la compuerta abierta para siempre. Si la
+    compuerta sigue abierta más de `max_voz_continua_s`, el piso se re-estima
+    con la mediana de la ventana. Mientras hay silencio los bloques se
+    guardan en un pre-roll corto que se entrega junto con el primer bloque de
+    voz, para no cortar la primera sílaba; tras la voz se siguen entregando
+    bloques durante `hangover_s` para que Vosk detecte el final de la frase.
+    """
+
+    def __init__(self, fs=16000, tam_trama=512, margen_db=9.0, zcr_max=0.35, min_tramas_voz=2,
+                 pre_roll_s=0.5, hangover_s=1.0, bloque_muestras=4096, piso_inicial_db=-60.0,
+                 ventana_ruido_s=3.0, percentil_ruido=10.0, piso_min_db=-70.0, max_voz_continua_s=15.0):
+        self.fs = fs
+        self.tam_trama = tam_trama
+        self.margen_db = margen_db
+        self.zcr_max = zcr_max
+        self.min_tramas_voz = min_tramas_voz
+        self.percentil_ruido = percentil_ruido
+        self.piso_min_db = piso_min_db
+        self.piso_ruido_db = max(piso_inicial_db, piso_min_db)
+        self.max_voz_continua_s = max_voz_continua_s
+        # Energías (dB) de las tramas de los últimos bloques, voz incluida
+        self._energias = collections.deque(maxlen=max(1, int(round(ventana_ruido_s * fs / bloque_muestras))))
+        self._voz_continua_s = 0.0
+        self.reestimaciones = 0
+        bloques_pre_roll = max(1, int(round(pre_roll_s * fs / bloque_muestras)))
+        self.bloques_hangover = max(1, int(round(hangover_s * fs / bloque_muestras)))
+        self._pre_roll = collections.deque(maxlen=bloques_pre_roll)
+        self._hangover = 0
+
+        # Contadores
+        self.bloques_totales = 0
+        self.bloques_omitidos = 0
+        self.tiempo_vad_s = 0.0
+        self._decodificaciones = 0
+        self._tiempo_decodificacion_s = 0.0
+
+    def es_voz(self, muestras):
+        """Indica si el bloque (array int16) contiene voz y actualiza el piso de ruido."""
+        num_tramas = len(muestras) // self.tam_trama
+        if num_tramas == 0:
+            return False
+        tramas = muestras[:num_tramas * self.tam_trama].reshape(num_tramas, self.tam_trama).astype(np.float32) / 32768.0
+
+        energia_db = 10.0 * np.log10(np.mean(tramas * tramas, axis=1) + 1e-10)
+        signos = np.signbit(tramas)
+        zcr = np.count_nonzero(signos[:, 1:] != signos[:, :-1], axis=1) / (self.tam_trama - 1)
+
+        umbral = self.piso_ruido_db + self.margen_db
+        voz = (energia_db > umbral) & ((zcr < self.zcr_max) | (energia_db > umbral + 10.0))
+
+        hay_voz = int(np.count_nonzero(voz)) >= self.min_tramas_voz
+
+        self._energias.append(energia_db)
+        ventana = np.concatenate(self._energias)
+        self._voz_continua_s = self._voz_continua_s + len(muestras) / self.fs if hay_voz else 0.0
+        if self._voz_continua_s > self.max_voz_continua_s:
+            # Nadie habla tanto rato sin pausa: el fondo subió y el percentil aún no lo refleja
+            piso = float(np.median(ventana))
+            self._voz_continua_s = 0.0
+            self.reestimaciones += 1
+        else:
+            piso = float(np.percentile(ventana, self.percentil_ruido))
+        self.piso_ruido_db = max(piso, self.piso_min_db)
+
+        return hay_voz
+
+    def filtrar(self, data):
+        """
+        Recibe un bloque de bytes int16 y retorna la lista de bloques que deben
+        pasarse al reconocedor (vacía si es silencio).
+        """
+        inicio = time.process_time()
+        self.bloques_totales += 1
+        hay_voz = self.es_voz(np.frombuffer(data, dtype=np.int16))
+
+        if hay_voz:
+            # Los bloques del pre-roll sí se decodifican: ya no cuentan como omitidos
+            self.bloques_omitidos -= len(self._pre_roll)
+            bloques = list(self._pre_roll) + [data]
+            self._pre_roll.clear()
+            self._hangover = self.bloques_hangover
+        elif self._hangover > 0:
+            self._hangover -= 1
+            bloques = [data]
+        else:
+            self._pre_roll.append(data)
+            self.bloques_omitidos += 1
+            bloques = []
+
+        self.tiempo_vad_s += time.process_time() - inicio
+        return bloques
+
+    def reiniciar(self):
+        """Olvida el pre-roll y el hangover (el piso de ruido se conserva)."""
+        self._pre_roll.clear()
+        self._hangover = 0
+
+    def registrar_decodificacion(self, segundos_cpu):
+        """Registra el tiempo de CPU de una llamada al reconocedor, para estimar el ahorro."""
+        self._decodificaciones += 1
+        self._tiempo_decodificacion_s += segundos_cpu
+
+    def estadisticas(self):
+        """Retorna un diccionario con la fracción de audio omitido y el tiempo de CPU ahorrado."""
+        costo_bloque = self._tiempo_decodificacion_s / self._decodificaciones if self._decodificaciones else 0.0
+        return {
+            "bloques_totales": self.bloques_totales,
+            "bloques_omitidos": self.bloques_omitidos,
+            "fraccion_omitida": self.bloques_omitidos / self.bloques_totales if self.bloques_totales else 0.0,
+            "piso_ruido_db": self.piso_ruido_db,
+            "reestimaciones_piso": self.reestimaciones,
+            "cpu_ahorrada_s": max(0.0, self.bloques_omitidos * costo_bloque - self.tiempo_vad_s),
+        }
+
+    def resumen(self):
+        """Texto corto con las estadísticas, para el log."""
+        e = self.estadisticas()
+        return (f"VAD: {e['fraccion_omitida'] * 100:.1f}% del audio omitido "
+                f"({e['bloques_omitidos']}/{e['bloques_totales']} bloques), "
+                f"CPU ahorrada ~{e['cpu_ahorrada_s']:.1f} s, piso de ruido {e['piso_ruido_db']:.1f} dBFS")
@@ -1,5 +1,4 @@
 # voice_recognition.py
-from vosk import Model, KaldiRecognizer
 import json
 import os
 import sys # <--- ¡Añade esta línea!
@@ -16,6 +15,9 @@ def setup_vosk():
         print("Asegúrate de haber descargado y descomprimido el modelo allí.")
         sys.exit(1) # <--- ¡Cambia 'exit()' por 'sys.exit(1)'!
 
+    # vosk se importa aquí: cargarlo forma parte de la fase del modelo de voz, no de las importaciones
+    from vosk import Model, KaldiRecognizer
+
     model = Model(model_path)
     recognizer = KaldiRecognizer(model, 16000) 
     return recognizer